@@ -1,35 +1,18 @@
 import streamlit as st
 import pandas as pd
 import io
-from io import BytesIO, StringIO
-import zipfile
+from io import StringIO
 import os
 import tempfile
-
-# Función helper para guardar CSV con fechas en formato DD/MM/YYYY
-def guardar_csv_con_fechas(df, ruta_archivo):
-    """
-    Guarda un DataFrame a CSV con fechas en formato DD/MM/YYYY como texto
-
-    Args:
-        df: DataFrame a guardar
-        ruta_archivo: Ruta del archivo CSV de salida
-    """
-    # Crear una copia para no modificar el original
-    df_export = df.copy()
-
-    # Convertir columnas de fecha datetime a string DD/MM/YYYY
-    columnas_fecha = ['start_date', 'end_date', 'last_approval_status_date', 'modificado_el', 'fse_fechas']
-    for col in columnas_fecha:
-        if col in df_export.columns:
-            # Convertir datetime a string DD/MM/YYYY
-            df_export[col] = df_export[col].apply(
-                lambda x: x.strftime('%d/%m/%Y') if pd.notna(x) and hasattr(x, 'strftime') else x
-            )
-
-    # Guardar como CSV
-    df_export.to_csv(ruta_archivo, index=False, encoding='utf-8-sig', sep=';')
-    return ruta_archivo
+from lectura_excel import leer_excel, tiempo_lectura
+from cache_lecturas import limpiar_cache, resumen_cache
+from motor_fechas import parsear_fechas
+from registro import NIVELES, configurar_nivel, nivel_actual
+from intercambio import guardar_paso, leer_paso, ruta_paso, ruta_intermedia
+from escritura_csv import fechas_como_texto, SalidaZip
+from indice_cie10 import MODOS_BUSQUEDA
+from reglas_validacion import (evaluar_reglas, filas_de_regla, archivo_de_regla, columnas_concepto_aplica,
+                               REGLAS_DIAS_POR_CONCEPTO)
 
 st.set_page_config(
     page_title="Auditoría Ausentismos Corrección",
@@ -116,17 +99,36 @@ st.markdown("""
 if 'paso_actual' not in st.session_state:
     st.session_state.paso_actual = 1
 
+# Nivel de detalle de la consola para esta sesión (el selector está en la barra lateral);
+# solo afecta al hilo que ejecuta este script, no a las demás sesiones
+configurar_nivel(st.session_state.get('nivel_log'))
+
 # ============================================================================
 # FUNCIONES AUXILIARES
 # ============================================================================
+def agregar_archivos_a_zip(salida, archivos_paths):
+    """Agrega a un SalidaZip archivos ya escritos en disco"""
+    for ruta in archivos_paths:
+        if os.path.exists(ruta):
+            salida.agregar_archivo(ruta)
+
+def guardar_subida(archivo_subido, directorio, nombre_csv):
+    """
+    Guarda la salida de un paso anterior subida por el usuario (CSV o su intermedio
+    .parquet) con el nombre que espera el paso; devuelve la ruta escrita
+    """
+    ruta = os.path.join(directorio, nombre_csv)
+    if archivo_subido.name.lower().endswith('.parquet'):
+        ruta = ruta_intermedia(ruta)
+    with open(ruta, "wb") as f:
+        f.write(archivo_subido.getbuffer())
+    return ruta
+
 def crear_zip_desde_archivos(archivos_paths):
     """Crea ZIP desde rutas de archivos existentes"""
-    zip_buffer = BytesIO()
-    with zipfile.ZipFile(zip_buffer, 'w', zipfile.ZIP_DEFLATED) as zip_file:
-        for ruta in archivos_paths:
-            if os.path.exists(ruta):
-                zip_file.write(ruta, os.path.basename(ruta))
-    return zip_buffer.getvalue()
+    with SalidaZip() as salida:
+        agregar_archivos_a_zip(salida, archivos_paths)
+    return salida.cerrar()
 
 def mostrar_header_principal():
     st.markdown("""
@@ -201,17 +203,13 @@ def paso1():
                     with open(excel_path, "wb") as f:
                         f.write(excel_file.getbuffer())
                     
+                    # La configuración va como parámetros: sin reload ni variables globales
                     import auditoria_ausentismos_part1 as part1
-                    import importlib
-                    importlib.reload(part1)
-                    
-                    part1.ruta_entrada_csv = csv_path
-                    part1.ruta_entrada_excel = excel_path
-                    part1.directorio_salida = temp_dir
-                    part1.archivo_salida = "ausentismo_procesado_completo_v2.csv"
-                    part1.ruta_completa_salida = os.path.join(temp_dir, "ausentismo_procesado_completo_v2.csv")
-                    
-                    df_resultado = part1.procesar_archivo_ausentismos()
+                    df_resultado = part1.procesar_archivo_ausentismos(
+                        ruta_entrada_csv=csv_path,
+                        ruta_entrada_excel=excel_path,
+                        ruta_completa_salida=os.path.join(temp_dir, "ausentismo_procesado_completo_v2.csv")
+                    )
                     
                     if df_resultado is not None:
                         st.success("✅ Procesamiento completado exitosamente")
@@ -243,7 +241,7 @@ def paso1():
                         st.divider()
                         st.subheader("📦 Descargar Resultados")
 
-                        archivo_salida = os.path.join(temp_dir, "ausentismo_procesado_completo_v2.csv")
+                        archivo_salida = ruta_paso(os.path.join(temp_dir, "ausentismo_procesado_completo_v2.csv"))
 
                         if os.path.exists(archivo_salida):
                             # Crear ZIP solo con el archivo principal
@@ -313,7 +311,7 @@ def paso2():
         st.subheader("📤 Archivo 1")
         csv_paso1 = st.file_uploader(
             "CSV del Paso 1",
-            type=['csv'],
+            type=['csv', 'parquet'],
             key="csv2"
         )
     
@@ -372,15 +370,15 @@ def paso2():
         st.divider()
         
         if st.button("🚀 PROCESAR ARCHIVOS", use_container_width=True, type="primary"):
+            # Se crea dentro del try; el finally libera sus hilos y el ZIP si algo falla
+            salida_zip = None
             try:
                 with st.spinner('⏳ Procesando validaciones...'):
                     temp_dir = tempfile.mkdtemp()
                     
-                    csv_path = os.path.join(temp_dir, "ausentismo_procesado_completo_v2.csv")
+                    csv_path = guardar_subida(csv_paso1, temp_dir, "ausentismo_procesado_completo_v2.csv")
                     excel_path = os.path.join(temp_dir, "MD_personal.xlsx")
                     
-                    with open(csv_path, "wb") as f:
-                        f.write(csv_paso1.getbuffer())
                     with open(excel_path, "wb") as f:
                         f.write(excel_personal.getbuffer())
 
@@ -391,7 +389,7 @@ def paso2():
 
                     # Intentar leer el CSV con manejo de errores
                     try:
-                        df_ausentismo = pd.read_csv(
+                        df_ausentismo = leer_paso(
                             csv_path,
                             encoding='utf-8',
                             sep=',',
@@ -414,9 +412,15 @@ def paso2():
                         st.error(f"❌ Error al leer el archivo CSV: {str(e)}")
                         st.stop()
 
-                    df_personal = pd.read_excel(excel_path)
+                    # Solo se cargan las columnas de número de personal y relación laboral (como texto)
+                    df_personal = leer_excel(
+                        excel_path,
+                        columnas=lambda col: 'pers' in str(col).lower()
+                        or ('relaci' in str(col).lower() and 'labor' in str(col).lower())
+                    )
                     
                     st.info(f"📊 CSV: {len(df_ausentismo):,} | Excel: {len(df_personal):,}")
+                    st.caption(f"⏱️ Lectura Excel: {tiempo_lectura(df_personal)['segundos']:.2f}s")
                     
                     col_num_pers = next((col for col in df_personal.columns if 'pers' in col.lower()), None)
                     col_relacion = next((col for col in df_personal.columns if 'relaci' in col.lower() and 'labor' in col.lower()), None)
@@ -465,7 +469,7 @@ def paso2():
                     columnas_fecha = ['start_date', 'end_date', 'last_approval_status_date', 'modificado_el', 'fse_fechas']
                     for col in columnas_fecha:
                         if col in df.columns:
-                            df[col] = pd.to_datetime(df[col], format='%d/%m/%Y', errors='coerce')
+                            df[col] = parsear_fechas(df[col], col, formatos=['%d/%m/%Y'], respaldo=None)
 
                     # Verificar que la columna 'Relación laboral' exista
                     if 'Relación laboral' not in df.columns:
@@ -487,50 +491,22 @@ def paso2():
 
                     st.success(f"✅ Merge exitoso: {registros_despues:,} registros con Relación laboral (eliminados {registros_antes - registros_despues:,} sin relación)")
                     
-                    # Validaciones SENA
-                    df_aprendizaje = df[df['Relación laboral'].str.contains('Aprendizaje', case=False, na=False)].copy()
-                    conceptos_validos = ['Incapacidad gral SENA', 'Licencia de Maternidad SENA', 'Suspensión contrato SENA']
-                    df_errores_sena = df_aprendizaje[~df_aprendizaje['external_name_label'].isin(conceptos_validos)].copy()
-                    
-                    # Validaciones Ley 50
-                    df_ley50 = df[df['Relación laboral'].str.contains('Ley 50', case=False, na=False)].copy()
-                    prohibidos = ['Incapacidad gral SENA', 'Licencia de Maternidad SENA', 'Suspensión contrato SENA',
-                                 'Inca. Enfer Gral Integral', 'Prorr Inc/Enf Gral ntegra']
-                    df_errores_ley50 = df_ley50[df_ley50['external_name_label'].isin(prohibidos)].copy()
-                    
                     # Convertir calendar_days y quantity_in_days a numérico
                     df['calendar_days'] = pd.to_numeric(df['calendar_days'], errors='coerce')
                     df['quantity_in_days'] = pd.to_numeric(df['quantity_in_days'], errors='coerce')
                     
-                    # Columnas de validación
-                    df['licencia_paternidad'] = df.apply(
-                        lambda r: "Concepto Si Aplica" if r['external_name_label'] == "Licencia Paternidad" and r['calendar_days'] == 14 
-                        else "Concepto No Aplica", axis=1)
-                    
-                    df['licencia_maternidad'] = df.apply(
-                        lambda r: "Concepto Si Aplica" if r['external_name_label'] == "Licencia Maternidad" and r['calendar_days'] == 126 
-                        else "Concepto No Aplica", axis=1)
-                    
-                    df['ley_de_luto'] = df.apply(
-                        lambda r: "Concepto Si Aplica" if r['external_name_label'] == "Ley de luto" and r['quantity_in_days'] == 5 
-                        else "Concepto No Aplica", axis=1)
-                    
-                    df['incap_fuera_de_turno'] = df.apply(
-                        lambda r: "Concepto Si Aplica" if r['external_name_label'] == "Incapa.fuera de turno" and r['calendar_days'] <= 1 
-                        else "Concepto No Aplica", axis=1)
-                    
-                    df['lic_maternidad_sena'] = df.apply(
-                        lambda r: "Concepto Si Aplica" if r['external_name_label'] == "Licencia de Maternidad SENA" and r['calendar_days'] == 126 
-                        else "Concepto No Aplica", axis=1)
-                    
-                    df['lic_jurado_votacion'] = df.apply(
-                        lambda r: "Concepto Si Aplica" if r['external_name_label'] == "Lic Jurado Votación" and r['calendar_days'] <= 1 
-                        else "Concepto No Aplica", axis=1)
+                    # Columnas de validación (todas las filas a la vez)
+                    for columna, valores in columnas_concepto_aplica(df).items():
+                        df[columna] = valores
                     
                     # Guardar archivo principal COMPLETO (SIEMPRE SIN FILTRAR)
-                    archivo_principal = os.path.join(temp_dir, "relacion_laboral_con_validaciones.csv")
-                    df.to_csv(archivo_principal, index=False, encoding='utf-8-sig')
+                    archivo_principal = guardar_paso(df, os.path.join(temp_dir, "relacion_laboral_con_validaciones.csv"),
+                                                     index=False, encoding='utf-8-sig')[0]
 
+                    # ZIP de descarga: los archivos en disco y las alertas (que se serializan
+                    # en paralelo y entran directo al ZIP, sin pasar por temp_dir)
+                    salida_zip = SalidaZip()
+                    agregar_archivos_a_zip(salida_zip, [archivo_principal])
                     archivos_generados = [archivo_principal]
 
                     # ============================================================================
@@ -558,6 +534,7 @@ def paso2():
                         # Guardar CSV filtrado
                         archivo_csv_filtrado = os.path.join(temp_dir, "relacion_laboral_FILTRADO.csv")
                         df_csv_filtrado.to_csv(archivo_csv_filtrado, index=False, encoding='utf-8-sig')
+                        agregar_archivos_a_zip(salida_zip, [archivo_csv_filtrado])
                         archivos_generados.append(archivo_csv_filtrado)
 
                         st.success(f"✅ CSV filtrado: {len(df):,} → {len(df_csv_filtrado):,} registros")
@@ -596,24 +573,21 @@ def paso2():
                         df_para_alertas['start_date'] = pd.to_datetime(df_para_alertas['start_date'], errors='coerce').dt.strftime('%d/%m/%Y')
                         df_para_alertas['end_date'] = pd.to_datetime(df_para_alertas['end_date'], errors='coerce').dt.strftime('%d/%m/%Y')
 
-                    # Recrear DataFrames de validación con el DataFrame filtrado
-                    df_aprendizaje_filt = df_para_alertas[df_para_alertas['Relación laboral'].str.contains('Aprendizaje', case=False, na=False)].copy()
-                    conceptos_validos = ['Incapacidad gral SENA', 'Licencia de Maternidad SENA', 'Suspensión contrato SENA']
-                    df_errores_sena = df_aprendizaje_filt[~df_aprendizaje_filt['external_name_label'].isin(conceptos_validos)].copy()
+                    # Todas las reglas de validación sobre el DataFrame filtrado, en una sola pasada
+                    aciertos = evaluar_reglas(df_para_alertas)
+                    # Fechas formateadas una sola vez para todos los archivos de alertas
+                    fechas = fechas_como_texto(df_para_alertas)
+
+                    # Validaciones SENA
+                    df_errores_sena = filas_de_regla(df_para_alertas, aciertos, 'errores_sena')
 
                     # Validaciones Ley 50 - CON CÓDIGOS NUMÉRICOS
                     st.info("🔍 Validando registros con Ley 50...")
 
-                    df_ley50_filt = df_para_alertas[df_para_alertas['Relación laboral'].str.contains('Ley 50', case=False, na=False)].copy()
+                    df_ley50_filt = df_para_alertas[aciertos['ley50'].to_numpy()]
 
                     st.write(f"📊 **Registros con 'Ley 50' encontrados:** {len(df_ley50_filt):,}")
 
-                    # Códigos prohibidos para Ley 50 (códigos de SENA e INTEGRAL)
-                    codigos_prohibidos_ley50 = [
-                        197, 331, 333, 334, 203, 216, 201, 281, 280,
-                        341, 398, 332, 303, 301, 196, 311, 233, 251, 231, 198
-                    ]
-
                     if len(df_ley50_filt) > 0:
                         # Mostrar códigos únicos en Ley 50 ANTES de filtrar
                         codigos_unicos_ley50 = df_ley50_filt['homologacion_clase_de_ausentismo_ssf_vs_sap'].value_counts().head(10)
@@ -621,16 +595,8 @@ def paso2():
                             for codigo, cantidad in codigos_unicos_ley50.items():
                                 st.write(f"  - Código **{codigo}**: {cantidad} registros")
 
-                        # Convertir columna a numérico
-                        df_ley50_filt['homologacion_clase_de_ausentismo_ssf_vs_sap'] = pd.to_numeric(
-                            df_ley50_filt['homologacion_clase_de_ausentismo_ssf_vs_sap'],
-                            errors='coerce'
-                        )
-
-                        # Filtrar SOLO los que tienen códigos prohibidos
-                        df_errores_ley50 = df_ley50_filt[
-                            df_ley50_filt['homologacion_clase_de_ausentismo_ssf_vs_sap'].isin(codigos_prohibidos_ley50)
-                        ].copy()
+                        # SOLO los que tienen códigos prohibidos (con el código ya numérico)
+                        df_errores_ley50 = filas_de_regla(df_para_alertas, aciertos, 'errores_ley50')
 
                         st.write(f"🚨 **Errores encontrados (Ley 50 con códigos prohibidos):** {len(df_errores_ley50):,}")
 
@@ -647,17 +613,10 @@ def paso2():
                     # Validaciones Integral - CON CÓDIGOS NUMÉRICOS
                     st.info("🔍 Validando registros con Integral...")
 
-                    df_integral_filt = df_para_alertas[df_para_alertas['Relación laboral'].str.contains('Integral', case=False, na=False)].copy()
+                    df_integral_filt = df_para_alertas[aciertos['integral'].to_numpy()]
 
                     st.write(f"📊 **Registros con 'Integral' encontrados:** {len(df_integral_filt):,}")
 
-                    # Códigos prohibidos para Integral (los 25 que NO deben estar)
-                    codigos_prohibidos_integral = [
-                        380, 330, 291, 204, 202, 215, 210, 220, 200,
-                        281, 280, 340, 345, 305, 398, 302, 300, 191,
-                        310, 190, 232, 250, 230, 381, 198
-                    ]
-
                     if len(df_integral_filt) > 0:
                         # Mostrar códigos únicos en Integral ANTES de filtrar
                         codigos_unicos_integral = df_integral_filt['homologacion_clase_de_ausentismo_ssf_vs_sap'].value_counts().head(10)
@@ -665,16 +624,8 @@ def paso2():
                             for codigo, cantidad in codigos_unicos_integral.items():
                                 st.write(f"  - Código **{codigo}**: {cantidad} registros")
 
-                        # Convertir columna a numérico
-                        df_integral_filt['homologacion_clase_de_ausentismo_ssf_vs_sap'] = pd.to_numeric(
-                            df_integral_filt['homologacion_clase_de_ausentismo_ssf_vs_sap'],
-                            errors='coerce'
-                        )
-
-                        # Filtrar SOLO los que tienen códigos prohibidos
-                        df_errores_integral = df_integral_filt[
-                            df_integral_filt['homologacion_clase_de_ausentismo_ssf_vs_sap'].isin(codigos_prohibidos_integral)
-                        ].copy()
+                        # SOLO los que tienen códigos prohibidos (con el código ya numérico)
+                        df_errores_integral = filas_de_regla(df_para_alertas, aciertos, 'errores_integral')
 
                         st.write(f"🚨 **Errores encontrados (Integral con códigos prohibidos):** {len(df_errores_integral):,}")
 
@@ -690,189 +641,71 @@ def paso2():
 
                     # Errores SENA
                     if len(df_errores_sena) > 0:
-                        path = os.path.join(temp_dir, "Sena_error_validar.csv")
-                        guardar_csv_con_fechas(df_errores_sena, path)
-                        archivos_generados.append(path)
+                        salida_zip.agregar_csv(df_errores_sena, "Sena_error_validar.csv", fechas)
+                        archivos_generados.append("Sena_error_validar.csv")
 
                     # Errores Ley 50
                     if len(df_errores_ley50) > 0:
-                        path = os.path.join(temp_dir, "Ley_50_error_validar.csv")
-                        guardar_csv_con_fechas(df_errores_ley50, path)
-                        archivos_generados.append(path)
+                        salida_zip.agregar_csv(df_errores_ley50, "Ley_50_error_validar.csv", fechas)
+                        archivos_generados.append("Ley_50_error_validar.csv")
 
                     # Errores Integral (SOLO los que tienen códigos prohibidos)
                     if len(df_errores_integral) > 0:
-                        path = os.path.join(temp_dir, "Integral_error_validar.csv")
-                        guardar_csv_con_fechas(df_errores_integral, path)
-                        archivos_generados.append(path)
-
-                    # Alertas por columna (usando df_para_alertas que puede estar filtrado)
-                    df_alert_pat = df_para_alertas[(df_para_alertas['licencia_paternidad'] == 'Concepto No Aplica') & (df_para_alertas['external_name_label'] == 'Licencia Paternidad')]
-                    if len(df_alert_pat) > 0:
-                        path = os.path.join(temp_dir, "alerta_licencia_paternidad.csv")
-                        guardar_csv_con_fechas(df_alert_pat, path)
-                        archivos_generados.append(path)
-
-                    df_alert_mat = df_para_alertas[(df_para_alertas['licencia_maternidad'] == 'Concepto No Aplica') & (df_para_alertas['external_name_label'] == 'Licencia Maternidad')]
-                    if len(df_alert_mat) > 0:
-                        path = os.path.join(temp_dir, "alerta_licencia_maternidad.csv")
-                        guardar_csv_con_fechas(df_alert_mat, path)
-                        archivos_generados.append(path)
-
-                    df_alert_luto = df_para_alertas[(df_para_alertas['ley_de_luto'] == 'Concepto No Aplica') & (df_para_alertas['external_name_label'] == 'Ley de luto')]
-                    if len(df_alert_luto) > 0:
-                        path = os.path.join(temp_dir, "alerta_ley_de_luto.csv")
-                        guardar_csv_con_fechas(df_alert_luto, path)
-                        archivos_generados.append(path)
-
-                    df_alert_incap = df_para_alertas[(df_para_alertas['incap_fuera_de_turno'] == 'Concepto No Aplica') & (df_para_alertas['external_name_label'] == 'Incapa.fuera de turno')]
-                    if len(df_alert_incap) > 0:
-                        path = os.path.join(temp_dir, "alerta_incap_fuera_de_turno.csv")
-                        guardar_csv_con_fechas(df_alert_incap, path)
-                        archivos_generados.append(path)
-
-                    df_alert_mat_sena = df_para_alertas[(df_para_alertas['lic_maternidad_sena'] == 'Concepto No Aplica') & (df_para_alertas['external_name_label'] == 'Licencia de Maternidad SENA')]
-                    if len(df_alert_mat_sena) > 0:
-                        path = os.path.join(temp_dir, "alerta_lic_maternidad_sena.csv")
-                        guardar_csv_con_fechas(df_alert_mat_sena, path)
-                        archivos_generados.append(path)
-                    
-                    df_alert_jurado = df_para_alertas[(df_para_alertas['lic_jurado_votacion'] == 'Concepto No Aplica') & (df_para_alertas['external_name_label'] == 'Lic Jurado Votación')]
-                    if len(df_alert_jurado) > 0:
-                        path = os.path.join(temp_dir, "alerta_lic_jurado_votacion.csv")
-                        guardar_csv_con_fechas(df_alert_jurado, path)
-                        archivos_generados.append(path)
-
-                    conceptos_incap = ['Incapacidad enfermedad general', 'Prorroga Inca/Enfer Gene', 'Enf Gral SOAT',
-                                      'Inc. Accidente de Trabajo', 'Prorroga Inc. Accid. Trab']
-                    df_incap30 = df_para_alertas[(df_para_alertas['external_name_label'].isin(conceptos_incap)) & (df_para_alertas['calendar_days'] > 30)]
-                    if len(df_incap30) > 0:
-                        path = os.path.join(temp_dir, "incp_mayor_30_dias.csv")
-                        guardar_csv_con_fechas(df_incap30, path)
-                        archivos_generados.append(path)
-
-                    conceptos_sin_pago = ['Aus Reg sin Soporte', 'Suspensión']
-                    df_sin_pago = df_para_alertas[(df_para_alertas['external_name_label'].isin(conceptos_sin_pago)) & (df_para_alertas['calendar_days'] > 10)]
-                    if len(df_sin_pago) > 0:
-                        path = os.path.join(temp_dir, "Validacion_ausentismos_sin_pago_mayor_10_dias.csv")
-                        guardar_csv_con_fechas(df_sin_pago, path)
-                        archivos_generados.append(path)
-
-                    df_dia_fam = df_para_alertas[(df_para_alertas['external_name_label'] == 'Día de la familia') & (df_para_alertas['calendar_days'] > 1)]
-                    if len(df_dia_fam) > 0:
-                        path = os.path.join(temp_dir, "dia_de_la_familia.csv")
-                        guardar_csv_con_fechas(df_dia_fam, path)
-                        archivos_generados.append(path)
+                        salida_zip.agregar_csv(df_errores_integral, "Integral_error_validar.csv", fechas)
+                        archivos_generados.append("Integral_error_validar.csv")
+
+                    # Alertas por concepto (usando df_para_alertas que puede estar filtrado)
+                    for regla in REGLAS_DIAS_POR_CONCEPTO:
+                        df_alerta = filas_de_regla(df_para_alertas, aciertos, regla)
+                        if len(df_alerta) > 0:
+                            nombre = archivo_de_regla(regla)
+                            salida_zip.agregar_csv(df_alerta, nombre, fechas)
+                            archivos_generados.append(nombre)
 
                     # Validación: Incapacidad sin enlace (FSE Si Aplica pero sin fecha)
-                    if 'fse_fechas' in df_para_alertas.columns:
-                        df_incap_sin_enlace = df_para_alertas[
-                            (df_para_alertas['fse'] == 'Si Aplica') &
-                            (df_para_alertas['fse_fechas'].isna() | (df_para_alertas['fse_fechas'] == ''))
-                        ]
+                    if 'incapacidad_sin_enlace' in aciertos.columns:
+                        df_incap_sin_enlace = filas_de_regla(df_para_alertas, aciertos, 'incapacidad_sin_enlace')
                         if len(df_incap_sin_enlace) > 0:
-                            path = os.path.join(temp_dir, "Incapacidad_sin_enlace.csv")
-                            guardar_csv_con_fechas(df_incap_sin_enlace, path)
-                            archivos_generados.append(path)
+                            salida_zip.agregar_csv(df_incap_sin_enlace, "Incapacidad_sin_enlace.csv", fechas)
+                            archivos_generados.append("Incapacidad_sin_enlace.csv")
                             st.info(f"🔗 Incapacidad sin enlace: {len(df_incap_sin_enlace)} registros con FSE='Si Aplica' sin fecha")
 
-                    # Validación: Validadores no encontrados
-                    if 'nombre_validador' in df_para_alertas.columns:
-                        df_validadores_no_encontrados = df_para_alertas[
-                            df_para_alertas['nombre_validador'] == 'ALERTA VALIDADOR NO ENCONTRADO'
-                        ]
-                        if len(df_validadores_no_encontrados) > 0:
-                            # Seleccionar columnas relevantes (las que existan)
-                            columnas_alerta = [
-                                'id_personal',
-                                'nombre_completo',
-                                'last_modified_by',
-                                'llave',
-                                'start_date',
-                                'end_date',
-                                'nombre_validador',
-                                'usuario_validador',
-                                'codigo_validador',
-                                'Relación laboral'
-                            ]
-                            columnas_disponibles = [col for col in columnas_alerta if col in df_validadores_no_encontrados.columns]
-                            df_alerta = df_validadores_no_encontrados[columnas_disponibles].copy()
+                    # Validación: Validadores no encontrados (solo las columnas relevantes que existan)
+                    if 'usuario_aprobador_no_encontrado' in aciertos.columns:
+                        df_alerta = filas_de_regla(df_para_alertas, aciertos, 'usuario_aprobador_no_encontrado')
+                        if len(df_alerta) > 0:
+                            salida_zip.agregar_csv(df_alerta, "usuario_aprobador_no_encontrado.csv", fechas)
+                            archivos_generados.append("usuario_aprobador_no_encontrado.csv")
 
-                            path = os.path.join(temp_dir, "usuario_aprobador_no_encontrado.csv")
-                            guardar_csv_con_fechas(df_alerta, path)
-                            archivos_generados.append(path)
-
-                            st.warning(f"⚠️ ALERTA: Se encontraron {len(df_validadores_no_encontrados)} registros con validador NO ENCONTRADO")
+                            st.warning(f"⚠️ ALERTA: Se encontraron {len(df_alerta)} registros con validador NO ENCONTRADO")
                             st.info(f"📊 Registros en alerta: {len(df_alerta)}")
 
                             # Mostrar valores únicos de lastModifiedBy no encontrados
-                            if 'last_modified_by' in df_validadores_no_encontrados.columns:
-                                valores_unicos = df_validadores_no_encontrados['last_modified_by'].unique()
+                            if 'last_modified_by' in df_alerta.columns:
+                                valores_unicos = df_alerta['last_modified_by'].unique()
                                 st.write(f"**📋 Valores de last_modified_by no encontrados ({len(valores_unicos)}):**")
                                 for i, valor in enumerate(valores_unicos[:10], 1):
-                                    frecuencia = (df_validadores_no_encontrados['last_modified_by'] == valor).sum()
+                                    frecuencia = (df_alerta['last_modified_by'] == valor).sum()
                                     st.write(f"  {i:2d}. '{valor}' ({frecuencia} registros)")
                                 if len(valores_unicos) > 10:
                                     st.write(f"  ... y {len(valores_unicos) - 10} más")
 
                     # Validación: Registros sin diagnóstico (códigos de incapacidad sin descripcion_general_external_code)
-                    codigos_requieren_diagnostico = [
-                        '203', '202', '216', '215', '210', '220', '201', '200',
-                        '188', '235', '383', '233', '251', '231', '232', '250', '230'
-                    ]
-
-                    if 'homologacion_clase_de_ausentismo_ssf_vs_sap' in df_para_alertas.columns:
-                        # Convertir a string para comparación
-                        df_para_alertas['homologacion_clase_de_ausentismo_ssf_vs_sap'] = df_para_alertas['homologacion_clase_de_ausentismo_ssf_vs_sap'].astype(str).str.strip()
-
-                        # Filtrar registros con esos códigos
-                        df_codigos_diagnostico = df_para_alertas[
-                            df_para_alertas['homologacion_clase_de_ausentismo_ssf_vs_sap'].isin(codigos_requieren_diagnostico)
-                        ].copy()
-
-                        if len(df_codigos_diagnostico) > 0:
-                            if 'descripcion_general_external_code' in df_codigos_diagnostico.columns:
-                                # Verificar si descripcion_general_external_code está vacía
-                                mask_sin_diagnostico = (
-                                    df_codigos_diagnostico['descripcion_general_external_code'].isna() |
-                                    (df_codigos_diagnostico['descripcion_general_external_code'].astype(str).str.strip() == '') |
-                                    (df_codigos_diagnostico['descripcion_general_external_code'].astype(str).str.strip() == 'nan')
-                                )
+                    if 'registros_sin_diagnostico' in aciertos.columns:
+                        df_sin_diagnostico = filas_de_regla(df_para_alertas, aciertos, 'registros_sin_diagnostico')
+                        if len(df_sin_diagnostico) > 0:
+                            salida_zip.agregar_csv(df_sin_diagnostico, "registros_sin_diagnostico.csv", fechas)
+                            archivos_generados.append("registros_sin_diagnostico.csv")
 
-                                df_sin_diagnostico = df_codigos_diagnostico[mask_sin_diagnostico].copy()
-
-                                if len(df_sin_diagnostico) > 0:
-                                    # Escribir "registros_sin_diagnostico" en la columna vacía
-                                    df_sin_diagnostico['descripcion_general_external_code'] = 'registros_sin_diagnostico'
-
-                                    path = os.path.join(temp_dir, "registros_sin_diagnostico.csv")
-                                    guardar_csv_con_fechas(df_sin_diagnostico, path)
-                                    archivos_generados.append(path)
-
-                                    st.warning(f"⚠️ ALERTA: Se encontraron {len(df_sin_diagnostico)} registros SIN DIAGNÓSTICO")
-                                    st.info(f"📊 Códigos afectados: {df_sin_diagnostico['homologacion_clase_de_ausentismo_ssf_vs_sap'].unique().tolist()}")
+                            st.warning(f"⚠️ ALERTA: Se encontraron {len(df_sin_diagnostico)} registros SIN DIAGNÓSTICO")
+                            st.info(f"📊 Códigos afectados: {df_sin_diagnostico['homologacion_clase_de_ausentismo_ssf_vs_sap'].unique().tolist()}")
 
                     # Validación: Diagnóstico incorrecto (menos de 2 caracteres)
-                    if 'descripcion_general_external_code' in df_para_alertas.columns:
-                        # Convertir a string
-                        df_para_alertas['descripcion_general_external_code_str'] = df_para_alertas['descripcion_general_external_code'].astype(str).str.strip()
-
-                        # Filtrar: no vacío, no 'nan', y longitud < 2
-                        mask_diagnostico_incorrecto = (
-                            (df_para_alertas['descripcion_general_external_code_str'] != '') &
-                            (df_para_alertas['descripcion_general_external_code_str'] != 'nan') &
-                            (df_para_alertas['descripcion_general_external_code_str'].str.len() < 2)
-                        )
-
-                        df_diagnostico_incorrecto = df_para_alertas[mask_diagnostico_incorrecto].copy()
-
-                        # Eliminar columna temporal
-                        df_para_alertas.drop('descripcion_general_external_code_str', axis=1, inplace=True)
-
+                    if 'diagnostico_incorrecto' in aciertos.columns:
+                        df_diagnostico_incorrecto = filas_de_regla(df_para_alertas, aciertos, 'diagnostico_incorrecto')
                         if len(df_diagnostico_incorrecto) > 0:
-                            path = os.path.join(temp_dir, "diagnostico_incorrecto.csv")
-                            guardar_csv_con_fechas(df_diagnostico_incorrecto, path)
-                            archivos_generados.append(path)
+                            salida_zip.agregar_csv(df_diagnostico_incorrecto, "diagnostico_incorrecto.csv", fechas)
+                            archivos_generados.append("diagnostico_incorrecto.csv")
 
                             st.warning(f"⚠️ ALERTA: Se encontraron {len(df_diagnostico_incorrecto)} registros con DIAGNÓSTICO INCORRECTO (< 2 caracteres)")
                             st.info(f"📊 Valores incorrectos: {df_diagnostico_incorrecto['descripcion_general_external_code'].unique().tolist()[:10]}")
@@ -902,7 +735,7 @@ def paso2():
                     
                     st.divider()
                     
-                    zip_data = crear_zip_desde_archivos(archivos_generados)
+                    zip_data = salida_zip.cerrar()
                     
                     col1, col2 = st.columns([3, 1])
                     with col1:
@@ -924,6 +757,9 @@ def paso2():
                 with st.expander("🔍 Ver detalles"):
                     import traceback
                     st.code(traceback.format_exc())
+            finally:
+                if salida_zip is not None:
+                    salida_zip.descartar()
 
 # ============================================================================
 # PASO 3: CIE-10
@@ -960,7 +796,7 @@ def paso3():
         st.subheader("📤 Archivo 1")
         csv_paso2 = st.file_uploader(
             "CSV del Paso 2", 
-            type=['csv'], 
+            type=['csv', 'parquet'], 
             key="csv3",
             help="Archivo relacion_laboral_con_validaciones.csv"
         )
@@ -977,29 +813,27 @@ def paso3():
     if csv_paso2 and excel_cie10:
         st.divider()
         st.success("✅ Los 2 archivos están listos")
+
+        respaldo_cie10 = st.selectbox(
+            "🔎 Búsqueda de códigos en CIE-10",
+            MODOS_BUSQUEDA,
+            index=0,
+            help="exacto: solo el código completo; categoria: si no está, su categoría de 3 caracteres "
+                 "(J00X → J00); prefijo: el prefijo más largo que esté en la tabla"
+        )
         
         if st.button("🚀 PROCESAR ARCHIVOS", use_container_width=True, type="primary"):
             try:
                 with st.spinner('⏳ Procesando merge con CIE-10...'):
                     temp_dir = tempfile.mkdtemp()
                     
-                    csv_path = os.path.join(temp_dir, "relacion_laboral_con_validaciones.csv")
+                    csv_path = guardar_subida(csv_paso2, temp_dir, "relacion_laboral_con_validaciones.csv")
                     cie10_path = os.path.join(temp_dir, "CIE10.xlsx")
                     
-                    with open(csv_path, "wb") as f:
-                        f.write(csv_paso2.getbuffer())
                     with open(cie10_path, "wb") as f:
                         f.write(excel_cie10.getbuffer())
                     
                     import auditoria_ausentismos_part3 as part3
-                    import importlib
-                    importlib.reload(part3)
-
-                    part3.ruta_relacion_laboral = csv_path
-                    part3.ruta_cie10 = cie10_path
-                    part3.directorio_salida = temp_dir
-                    part3.archivo_final = "ausentismos_completo_con_cie10.csv"
-                    part3.ruta_completa_salida = os.path.join(temp_dir, "ausentismos_completo_con_cie10.csv")
 
                     # CAPTURAR SALIDA DE PRINT() Y LOGS PARA MOSTRAR EN STREAMLIT
                     import sys
@@ -1012,7 +846,13 @@ def paso3():
                     sys.stdout = captured_output = StringIO()
 
                     try:
-                        df_resultado = part3.procesar_todo()
+                        df_resultado = part3.procesar_todo(
+                            ruta_relacion_laboral=csv_path,
+                            ruta_cie10=cie10_path,
+                            directorio_salida=temp_dir,
+                            ruta_completa_salida=os.path.join(temp_dir, "ausentismos_completo_con_cie10.csv"),
+                            respaldo_cie10=respaldo_cie10
+                        )
                     finally:
                         # Restaurar stdout
                         sys.stdout = old_stdout
@@ -1056,7 +896,7 @@ def paso3():
                         st.divider()
                         st.subheader("📦 Descargar Resultados")
 
-                        archivo_final = os.path.join(temp_dir, "ausentismos_completo_con_cie10.csv")
+                        archivo_final = ruta_paso(os.path.join(temp_dir, "ausentismos_completo_con_cie10.csv"))
                         archivo_alertas = os.path.join(temp_dir, "ALERTA_DIAGNOSTICO.xlsx")
                         archivo_log = "auditoria_part3.log"
 
@@ -1126,7 +966,7 @@ def paso3_1():
     st.markdown("### 📤 Subir CSV del Paso 3")
     csv_paso3 = st.file_uploader(
         "Archivo del Paso 3 (con CIE-10)",
-        type=['csv'],
+        type=['csv', 'parquet'],
         key="csv_paso3_preprocesamiento",
         help="Sube el archivo ausentismos_completo_con_cie10.csv del Paso 3"
     )
@@ -1226,24 +1066,11 @@ def paso3_1():
                         temp_dir = tempfile.mkdtemp()
 
                         # Guardar archivo subido
-                        csv_path_entrada = os.path.join(temp_dir, "ausentismos_completo_con_cie10.csv")
-                        with open(csv_path_entrada, "wb") as f:
-                            f.write(csv_paso3.getbuffer())
+                        csv_path_entrada = guardar_subida(csv_paso3, temp_dir, "ausentismos_completo_con_cie10.csv")
 
                         csv_path_salida = os.path.join(temp_dir, "ausentismos_PREFILTRADO.csv")
 
-                        # Importar y configurar módulo
                         import auditoria_ausentismos_part3_1 as part3_1
-                        import importlib
-                        importlib.reload(part3_1)
-
-                        # Configurar
-                        part3_1.ruta_entrada = csv_path_entrada
-                        part3_1.ruta_salida = csv_path_salida
-                        part3_1.fecha_ultima_inicio = fecha_ultima_inicio
-                        part3_1.fecha_ultima_fin = fecha_ultima_fin
-                        part3_1.start_date_inicio = start_date_inicio
-                        part3_1.start_date_fin = start_date_fin
 
                         # Ejecutar
                         st.info("🔧 Módulo: auditoria_ausentismos_part3_1.py")
@@ -1256,16 +1083,30 @@ def paso3_1():
                             old_stdout = sys.stdout
                             sys.stdout = mystdout = StringIO()
 
-                            df_resultado = part3_1.aplicar_prefiltrado()
+                            df_resultado = part3_1.aplicar_prefiltrado(
+                                ruta_entrada=csv_path_entrada,
+                                ruta_salida=csv_path_salida,
+                                fecha_ultima_inicio=fecha_ultima_inicio,
+                                fecha_ultima_fin=fecha_ultima_fin,
+                                start_date_inicio=start_date_inicio,
+                                start_date_fin=start_date_fin
+                            )
 
                             sys.stdout = old_stdout
                             output = mystdout.getvalue()
                             st.code(output)
 
                         if df_resultado is not None:
-                            # Leer archivo para descarga
-                            with open(csv_path_salida, 'r', encoding='utf-8') as f:
-                                csv_data = f.read()
+                            # Leer archivo para descarga (el intermedio .parquet si ese es el formato)
+                            ruta_descarga = ruta_paso(csv_path_salida)
+                            if ruta_descarga == csv_path_salida:
+                                with open(csv_path_salida, 'r', encoding='utf-8') as f:
+                                    csv_data = f.read()
+                                mime_descarga = "text/csv"
+                            else:
+                                with open(ruta_descarga, 'rb') as f:
+                                    csv_data = f.read()
+                                mime_descarga = "application/octet-stream"
 
                             st.success(f"✅ Pre-procesamiento completado: {len(df_resultado):,} registros")
 
@@ -1278,13 +1119,14 @@ def paso3_1():
                             else:
                                 from datetime import datetime
                                 nombre_archivo = f"ausentismos_COMPLETO_{datetime.now().strftime('%Y%m%d')}.csv"
+                            nombre_archivo = os.path.splitext(nombre_archivo)[0] + os.path.splitext(ruta_descarga)[1]
 
                             with col1:
                                 st.download_button(
                                     label="⬇️ DESCARGAR CSV PRE-FILTRADO",
                                     data=csv_data,
                                     file_name=nombre_archivo,
-                                    mime="text/csv",
+                                    mime=mime_descarga,
                                     use_container_width=True,
                                     type="primary"
                                 )
@@ -1341,7 +1183,7 @@ def paso4():
     st.subheader("📤 Archivo de Entrada")
     csv_paso3 = st.file_uploader(
         "CSV del Paso 3 (ausentismos_completo_con_cie10.csv o ausentismos_PREFILTRADO.csv)",
-        type=['csv'],
+        type=['csv', 'parquet'],
         key="csv4",
         help="Si activas filtros de fecha, se aplican con auditoria_ausentismos_part3_1.py"
     )
@@ -1358,6 +1200,14 @@ def paso4():
     with col2:
         st.info("**Ventana de Análisis:**")
         st.metric("Días hacia atrás", "30 días")
+        ventanas_adicionales = st.multiselect(
+            "Ventanas adicionales (mismo análisis, una sola pasada)",
+            options=[7, 15, 60, 90],
+            default=[],
+            format_func=lambda dias: f"{dias} días",
+            key="paso4_ventanas_adicionales",
+            help="Cada ventana genera su propio reporte_<días>_dias.csv en el ZIP"
+        )
     
     st.divider()
     st.subheader("📅 Filtro de Fechas (Opcional)")
@@ -1446,11 +1296,10 @@ def paso4():
                     temp_dir = tempfile.mkdtemp()
                     
                     # Guardar el archivo subido
-                    csv_path_original = os.path.join(temp_dir, "ausentismos_completo_con_cie10.csv")
-                    with open(csv_path_original, "wb") as f:
-                        f.write(csv_paso3.getbuffer())
+                    csv_path_original = guardar_subida(csv_paso3, temp_dir, "ausentismos_completo_con_cie10.csv")
 
                     csv_path_a_procesar = csv_path_original
+                    entrada_part4 = csv_path_original
 
                     if usar_filtro and (fecha_ultima_inicio and fecha_ultima_fin):
                         st.info("🔧 Aplicando pre-filtro de fecha_ultima con auditoria_ausentismos_part3_1.py")
@@ -1458,13 +1307,6 @@ def paso4():
                         csv_path_filtrado = os.path.join(temp_dir, "ausentismos_PREFILTRADO.csv")
 
                         import auditoria_ausentismos_part3_1 as part3_1
-                        import importlib
-                        importlib.reload(part3_1)
-
-                        part3_1.ruta_entrada = csv_path_original
-                        part3_1.ruta_salida = csv_path_filtrado
-                        part3_1.fecha_ultima_inicio = fecha_ultima_inicio
-                        part3_1.fecha_ultima_fin = fecha_ultima_fin
 
                         import sys
                         from io import StringIO
@@ -1472,7 +1314,14 @@ def paso4():
                         old_stdout = sys.stdout
                         sys.stdout = pre_output = StringIO()
                         try:
-                            df_prefiltrado = part3_1.aplicar_prefiltrado()
+                            df_prefiltrado = part3_1.aplicar_prefiltrado(
+                                ruta_entrada=csv_path_original,
+                                ruta_salida=csv_path_filtrado,
+                                fecha_ultima_inicio=fecha_ultima_inicio,
+                                fecha_ultima_fin=fecha_ultima_fin,
+                                start_date_inicio=None,
+                                start_date_fin=None
+                            )
                         finally:
                             sys.stdout = old_stdout
 
@@ -1485,25 +1334,16 @@ def paso4():
                             st.error("❌ El pre-procesamiento (part3_1) falló. Revisa el log.")
                             st.stop()
 
-                        csv_path_a_procesar = csv_path_filtrado
+                        csv_path_a_procesar = ruta_paso(csv_path_filtrado)
+                        # El resultado pasa directo a part4 (sin volver a leer el CSV)
+                        entrada_part4 = df_prefiltrado
                         st.success(f"✅ Pre-procesamiento completado: {len(df_prefiltrado):,} registros")
                     else:
                         st.info("ℹ️ Se procesa el archivo tal cual antes del filtrado final de reporte")
 
-                    # Importar y ejecutar el procesamiento
                     import auditoria_ausentismos_part4 as part4
-                    import importlib
-                    importlib.reload(part4)
                     st.caption(f"DEBUG part4 cargado desde: `{part4.__file__}`")
 
-                    # Configurar rutas (usar CSV filtrado si existe)
-                    part4.ruta_entrada = csv_path_a_procesar
-                    part4.directorio_salida = temp_dir
-                    part4.ruta_salida_unicos = os.path.join(temp_dir, "Registros_unicos.csv")
-                    part4.ruta_salida_30dias = os.path.join(temp_dir, "reporte_30_dias.csv")
-                    part4.fecha_ultima_inicio = fecha_ultima_inicio if (usar_filtro and fecha_ultima_inicio and fecha_ultima_fin) else None
-                    part4.fecha_ultima_fin = fecha_ultima_fin if (usar_filtro and fecha_ultima_inicio and fecha_ultima_fin) else None
-
                     # DEBUG: Mostrar configuración antes de procesar
                     st.info(f"📂 Archivo a procesar: {os.path.basename(csv_path_a_procesar)}")
                     st.info(f"📁 Directorio salida: {temp_dir}")
@@ -1520,7 +1360,17 @@ def paso4():
                     sys.stdout = captured_output = StringIO()
 
                     try:
-                        df_unicos, df_reporte_30dias = part4.procesar_analisis_completo()
+                        df_unicos, df_reporte_30dias = part4.procesar_analisis_completo(
+                            ruta_entrada=entrada_part4,
+                            ruta_salida_unicos=os.path.join(temp_dir, "Registros_unicos.csv"),
+                            ruta_salida_30dias=os.path.join(temp_dir, "reporte_30_dias.csv"),
+                            fecha_ultima_inicio=fecha_ultima_inicio if (usar_filtro and fecha_ultima_inicio and fecha_ultima_fin) else None,
+                            fecha_ultima_fin=fecha_ultima_fin if (usar_filtro and fecha_ultima_inicio and fecha_ultima_fin) else None,
+                            ventanas_dias=sorted([30] + ventanas_adicionales) if ventanas_adicionales else 30
+                        )
+                        # Con varias ventanas part4 devuelve un reporte por ventana; aquí se usa el de 30
+                        if isinstance(df_reporte_30dias, dict):
+                            df_reporte_30dias = df_reporte_30dias.get(30)
                     finally:
                         # Restaurar stdout
                         sys.stdout = old_stdout
@@ -1570,17 +1420,13 @@ def paso4():
                                 df_reporte_filtrado = df_reporte_30dias.copy()
 
                                 try:
-                                    df_reporte_filtrado['fecha_ultima_dt'] = pd.to_datetime(
+                                    df_reporte_filtrado['fecha_ultima_dt'] = parsear_fechas(
                                         df_reporte_filtrado['fecha_ultima'],
-                                        format='%d/%m/%Y',
-                                        dayfirst=True,
-                                        errors='coerce'
+                                        'fecha_ultima', formatos=['%d/%m/%Y'], respaldo=None
                                     )
-                                    df_reporte_filtrado['start_date_dt'] = pd.to_datetime(
+                                    df_reporte_filtrado['start_date_dt'] = parsear_fechas(
                                         df_reporte_filtrado['start_date'],
-                                        format='%d/%m/%Y',
-                                        dayfirst=True,
-                                        errors='coerce'
+                                        'start_date', formatos=['%d/%m/%Y'], respaldo=None
                                     )
 
                                     if fecha_ultima_inicio and fecha_ultima_fin:
@@ -1733,6 +1579,10 @@ def paso4():
                             archivos.append(archivo_30dias)
                         if df_reporte_filtrado is not None and os.path.exists(archivo_30dias_filtrado):
                             archivos.append(archivo_30dias_filtrado)
+                        for dias in sorted(ventanas_adicionales):
+                            archivo_ventana = os.path.join(temp_dir, f"reporte_{dias}_dias.csv")
+                            if os.path.exists(archivo_ventana):
+                                archivos.append(archivo_ventana)
                         
                         if archivos:
                             zip_data = crear_zip_desde_archivos(archivos)
@@ -1841,6 +1691,23 @@ with st.sidebar:
     **PASO 4:** CSV → Análisis 30 Días
     """)
     
+    st.divider()
+
+    resumen = resumen_cache()
+    st.caption(f"🗄️ **Caché de lecturas:** {resumen['entradas']} archivos, "
+               f"{resumen['tamano_mb']:.1f} / {resumen['limite_mb']:.0f} MB")
+    if st.button("🧹 Limpiar caché", use_container_width=True):
+        archivos, liberado = limpiar_cache()
+        st.success(f"✅ Caché limpiada: {archivos} archivos, {liberado:.1f} MB")
+
+    st.selectbox(
+        "📝 Nivel de detalle de la consola",
+        NIVELES,
+        index=NIVELES.index(nivel_actual()) if nivel_actual() in NIVELES else 1,
+        key='nivel_log',
+        help="DEBUG muestra todos los diagnósticos (más lento); INFO solo el avance de cada paso"
+    )
+    
     st.divider()
     
     st.caption("📧 **Soporte**")
@@ -1,6 +1,15 @@
 # Auditoría Ausentismos - Versión Completa con CONCAT y Validaciones Mejoradas
 import pandas as pd
+import numpy as np
 import os
+import hashlib
+from lectura_excel import leer_excel
+from cache_lecturas import leer_con_cache
+from motor_fechas import parsear_fechas, resumen_fechas
+from registro import obtener_logger, diagnostico_activo
+from intercambio import guardar_paso, DESDE_MODULO, tomar_de_modulo
+
+logger = obtener_logger(__name__)
 
 # ============================================================================
 # RUTAS DE ARCHIVOS
@@ -39,6 +48,27 @@ columnas_csv = [
     'approvalStatus'
 ]
 
+# ============================================================================
+# LECTURA DEL CSV POR BLOQUES
+# ============================================================================
+# True: el CSV se lee por bloques, solo con columnas_csv y filtrando por los IDs
+# del Reporte 45 mientras se lee (nunca se carga el archivo completo en memoria)
+# False: lectura completa del CSV y filtro posterior (comportamiento original)
+filtrar_csv_al_leer = True
+tamano_bloque_csv = 200_000
+
+# ============================================================================
+# REGLAS DE RECONCILIACIÓN CSV vs EXCEL (POR LLAVE)
+# ============================================================================
+# Para cada llave se conserva el último registro (Excel si existe) y luego:
+# - 'csv_mandante': el valor del CSV SIEMPRE prevalece (si el CSV lo trae)
+# - 'csv_relleno': el valor del CSV solo rellena celdas vacías
+# Las columnas no listadas conservan el valor del registro ganador (Excel)
+reglas_reconciliacion = [
+    {'columna': 'lastModifiedBy', 'regla': 'csv_mandante'},
+    {'columna': 'Last Approval Status Date', 'regla': 'csv_relleno'},
+]
+
 # ============================================================================
 # TABLA DE HOMOLOGACIÓN SSF vs SAP (MAPEO DIRECTO)
 # ============================================================================
@@ -204,6 +234,53 @@ def obtener_info_validador(valor):
     # Si no se encuentra ni por código ni por usuario
     return ('ALERTA VALIDADOR NO ENCONTRADO', 'ALERTA USUARIO NO ENCONTRADO', valor_limpio)
 
+# Tabla única de búsqueda: cada clave (código o usuario) → nombre, usuario, código
+# Se cargan primero los usuarios y luego los códigos para que el código tenga prioridad,
+# igual que en obtener_info_validador
+tabla_busqueda_validadores = pd.DataFrame.from_dict(
+    {
+        **{usuario: {'nombre': data['nombre'], 'usuario': usuario, 'codigo': data['codigo']}
+           for usuario, data in tabla_validadores_por_usuario.items()},
+        **{codigo: {'nombre': data['nombre'], 'usuario': data['usuario'], 'codigo': codigo}
+           for codigo, data in tabla_validadores.items()},
+    },
+    orient='index'
+)
+
+def resolver_validadores(serie):
+    """
+    Versión columnar de obtener_info_validador para una columna completa.
+    Resuelve cada valor distinto una sola vez contra tabla_busqueda_validadores
+    y reparte el resultado a todas las filas.
+
+    Args:
+        serie: Series con lastModifiedBy (códigos numéricos o usuarios)
+
+    Returns:
+        DataFrame con columnas nombre_validador, usuario_validador y codigo_validador
+    """
+    codigos, valores_unicos = pd.factorize(serie)
+    valores_limpios = pd.Index(valores_unicos).astype(str).str.strip()
+
+    # Un solo cruce sobre los valores distintos
+    resueltos = tabla_busqueda_validadores.reindex(valores_limpios)
+    resueltos['nombre'] = resueltos['nombre'].fillna('ALERTA VALIDADOR NO ENCONTRADO')
+    resueltos['usuario'] = resueltos['usuario'].fillna('ALERTA USUARIO NO ENCONTRADO')
+    # Si no se encuentra, se conserva el valor original limpio como código
+    resueltos['codigo'] = resueltos['codigo'].fillna(pd.Series(valores_limpios, index=resueltos.index))
+
+    # Fila final para nulos (código -1 de factorize)
+    tabla = np.vstack([
+        resueltos[['nombre', 'usuario', 'codigo']].to_numpy(dtype=object),
+        np.array([['ALERTA VALIDADOR NO ENCONTRADO', 'ALERTA USUARIO NO ENCONTRADO', '']], dtype=object)
+    ])
+
+    return pd.DataFrame(
+        tabla[codigos],
+        columns=['nombre_validador', 'usuario_validador', 'codigo_validador'],
+        index=serie.index
+    )
+
 # ============================================================================
 # TABLA SUB_TIPO Y FSE
 # ============================================================================
@@ -309,6 +386,169 @@ def limpiar_fecha_para_llave(fecha_valor):
     fecha_limpia = ''.join(c for c in fecha_str if c.isdigit())
     return fecha_limpia
 
+def limpiar_fechas_para_llave_columna(serie):
+    """
+    Versión columnar de limpiar_fecha_para_llave para una columna completa.
+    Cada fecha distinta se formatea una sola vez y el resultado se reparte a
+    todas las filas, así el costo depende de las fechas distintas y no del
+    número de registros. El texto resultante es idéntico al de la versión
+    fila a fila (YYYYMMDD para datetime, solo dígitos para strings, '' para NaT).
+    """
+    codigos, valores_unicos = pd.factorize(serie)
+
+    if isinstance(valores_unicos, pd.DatetimeIndex):
+        # Columna datetime: strftime en bloque sobre las fechas distintas
+        limpios = list(valores_unicos.strftime('%Y%m%d'))
+    else:
+        # Columna mixta (strings/Timestamps): misma regla que la versión fila a fila
+        limpios = [limpiar_fecha_para_llave(valor) for valor in valores_unicos]
+
+    # El código -1 de factorize (NaN/NaT) cae en la última posición → ''
+    tabla = np.array(limpios + [''], dtype=object)
+    return pd.Series(tabla[codigos], index=serie.index)
+
+def construir_llave(df):
+    """
+    Construye la columna LLAVE en bloque: 'K' + ID + inicio + fin + código SAP
+    Produce exactamente las mismas llaves que la construcción con .apply por fila
+    """
+    return 'K' + (
+        df['ID personal'].astype(str).fillna('') +
+        limpiar_fechas_para_llave_columna(df['startDate']) +
+        limpiar_fechas_para_llave_columna(df['endDate']) +
+        df['Homologacion_clase_de_ausentismo_SSF_vs_SAP'].astype(str).fillna('')
+    ).astype(str)
+
+def compactar_llave(llave, modo='hash'):
+    """
+    Convierte la llave de texto en una llave numérica compacta para deduplicar o cruzar
+
+    Args:
+        llave: Series con la llave de texto
+        modo: 'hash' para un hash de 64 bits estable entre ejecuciones (uint64),
+              'entero' para un código denso 0..n-1 válido solo dentro de la ejecución
+
+    Returns:
+        Series numérica alineada con la llave
+    """
+    if modo == 'hash':
+        return pd.util.hash_pandas_object(llave, index=False)
+    if modo == 'entero':
+        codigos, _ = pd.factorize(llave)
+        return pd.Series(codigos, index=llave.index)
+    raise ValueError(f"Modo de llave compacta no soportado: {modo}")
+
+def leer_csv_successfactors(ruta, ids_permitidos=None, tamano_bloque=None):
+    """
+    Lee el CSV de SuccessFactors por bloques, solo con las columnas de columnas_csv
+    y conservando únicamente los IDs permitidos (si se indican)
+
+    Args:
+        ruta: Ruta del CSV de SuccessFactors (encabezado en la tercera fila)
+        ids_permitidos: Conjunto de 'ID personal' a conservar; None conserva todos
+        tamano_bloque: Filas por bloque (por defecto tamano_bloque_csv)
+
+    Returns:
+        Tupla (DataFrame filtrado, total de filas leídas del CSV)
+    """
+    columnas_requeridas = set(columnas_csv)
+
+    def lector():
+        bloques = []
+        filas_leidas = 0
+
+        with pd.read_csv(ruta, skiprows=2, encoding='utf-8', dtype=str,
+                         usecols=lambda col: col in columnas_requeridas,
+                         chunksize=tamano_bloque or tamano_bloque_csv) as lector_bloques:
+            for bloque in lector_bloques:
+                filas_leidas += len(bloque)
+
+                # Mismo orden de columnas que la proyección original
+                bloque = bloque[[col for col in columnas_csv if col in bloque.columns]]
+
+                if ids_permitidos is not None:
+                    ids_bloque = bloque['ID personal'].astype(str).str.strip()
+                    bloque = bloque[ids_bloque.isin(ids_permitidos)].copy()
+                    bloque['ID personal'] = ids_bloque[bloque.index]
+
+                bloques.append(bloque)
+
+        if not bloques:
+            # CSV sin registros: solo encabezado
+            df_vacio = pd.read_csv(ruta, skiprows=2, encoding='utf-8', dtype=str, nrows=0,
+                                   usecols=lambda col: col in columnas_requeridas)
+            df = df_vacio[[col for col in columnas_csv if col in df_vacio.columns]]
+        else:
+            df = pd.concat(bloques) if len(bloques) > 1 else bloques[0]
+
+        # CRÍTICO: Asegurar que lastModifiedBy del CSV también sea STRING
+        if 'lastModifiedBy' in df.columns:
+            df['lastModifiedBy'] = df['lastModifiedBy'].astype(str)
+
+        df.attrs['filas_leidas'] = filas_leidas
+        return df
+
+    # Caché por contenido del archivo + columnas + conjunto de IDs del Reporte 45
+    opciones = {
+        'lector': 'leer_csv_successfactors',
+        'columnas': columnas_csv,
+        'ids': None if ids_permitidos is None else hashlib.sha256(
+            '\n'.join(sorted(map(str, ids_permitidos))).encode('utf-8')).hexdigest()
+    }
+    df, _ = leer_con_cache(ruta, opciones, lector)
+    return df, df.attrs.get('filas_leidas', len(df))
+
+def reconciliar_csv_excel(df, n_csv, reglas=None):
+    """
+    Resuelve cada llave una sola vez: conserva su último registro y aplica las
+    reglas por columna con el primer registro del CSV que tenga esa llave
+
+    Args:
+        df: DataFrame combinado (primero las n_csv filas del CSV, luego el Excel) con 'llave'
+        n_csv: Cantidad de filas del CSV al inicio de df
+        reglas: Lista de reglas {'columna', 'regla'} (por defecto reglas_reconciliacion)
+
+    Returns:
+        Tupla (DataFrame sin duplicados, {columna: valores tomados del CSV})
+    """
+    reglas = reglas_reconciliacion if reglas is None else reglas
+
+    codigos, _ = pd.factorize(df['llave'])
+    n = len(codigos)
+
+    # Registro ganador: última aparición de cada llave (mismo orden que drop_duplicates keep='last')
+    _, desde_final = np.unique(codigos[::-1], return_index=True)
+    ganadores = np.sort(n - 1 - desde_final)
+
+    # Primera fila del CSV para cada llave (-1 si la llave no está en el CSV)
+    llaves_csv, primera_csv = np.unique(codigos[:n_csv], return_index=True)
+    fila_csv_por_llave = np.full(len(desde_final), -1)
+    fila_csv_por_llave[llaves_csv] = primera_csv
+
+    df_resultado = df.take(ganadores)
+    fila_csv = fila_csv_por_llave[codigos[ganadores]]
+    con_csv = fila_csv >= 0
+
+    conteos = {}
+    for regla in reglas:
+        col = regla['columna']
+        if col not in df_resultado.columns:
+            continue
+
+        valores_csv = df[col].iloc[fila_csv[con_csv]]
+        valores_csv.index = df_resultado.index[con_csv]
+        aplicar = valores_csv.notna()
+
+        if regla['regla'] == 'csv_relleno':
+            aplicar &= df_resultado.loc[valores_csv.index, col].isna()
+        elif regla['regla'] != 'csv_mandante':
+            raise ValueError(f"Regla de reconciliación no soportada: {regla['regla']}")
+
+        df_resultado.loc[valores_csv.index[aplicar], col] = valores_csv[aplicar]
+        conteos[col] = int(aplicar.sum())
+
+    return df_resultado, conteos
+
 def convertir_codigo_sap_a_ssf(codigo_sap):
     """
     Convierte un código SAP (ej: '205') a código SSF (ej: 'CO_FAMILY')
@@ -322,42 +562,61 @@ def convertir_codigo_sap_a_ssf(codigo_sap):
 # ============================================================================
 # FUNCIÓN PRINCIPAL
 # ============================================================================
-def procesar_archivo_ausentismos():
+def procesar_archivo_ausentismos(ruta_entrada_csv=DESDE_MODULO, ruta_entrada_excel=DESDE_MODULO,
+                                  ruta_completa_salida=DESDE_MODULO):
     """
     Función principal que procesa ambos archivos y genera el CSV final
+
+    No modifica variables del módulo: se puede llamar varias veces (o desde varias
+    sesiones a la vez) sin recargar el módulo. Los parámetros que no se pasan se
+    toman de la configuración de arriba.
+
+    Args:
+        ruta_entrada_csv: CSV de SuccessFactors
+        ruta_entrada_excel: Reporte 45 (Excel)
+        ruta_completa_salida: CSV de salida (None = no se guarda en disco)
+
+    Returns:
+        DataFrame final (o None si hubo error)
     """
-    print("="*80)
-    print("=== PROCESAMIENTO DE AUSENTISMOS - VERSIÓN COMPLETA ===")
-    print("="*80)
+    ruta_entrada_csv, ruta_entrada_excel, ruta_completa_salida = tomar_de_modulo(
+        globals(),
+        ruta_entrada_csv=ruta_entrada_csv,
+        ruta_entrada_excel=ruta_entrada_excel,
+        ruta_completa_salida=ruta_completa_salida,
+    )
+
+    logger.info("="*80)
+    logger.info("=== PROCESAMIENTO DE AUSENTISMOS - VERSIÓN COMPLETA ===")
+    logger.info("="*80)
     
     try:
         # ====================================================================
         # PASO 1: LEER ARCHIVO CSV
         # ====================================================================
-        print("\n[PASO 1] Leyendo archivo CSV principal...")
-        df_csv = pd.read_csv(ruta_entrada_csv, skiprows=2, encoding='utf-8', dtype=str)
-        print(f"   ✓ CSV leído: {df_csv.shape[0]} filas, {df_csv.shape[1]} columnas")
-        
-        # Seleccionar columnas del CSV
-        columnas_csv_encontradas = [col for col in columnas_csv if col in df_csv.columns]
-        df_csv_filtrado = df_csv[columnas_csv_encontradas].copy()
-        
-        # CRÍTICO: Asegurar que lastModifiedBy del CSV también sea STRING
-        if 'lastModifiedBy' in df_csv_filtrado.columns:
-            df_csv_filtrado['lastModifiedBy'] = df_csv_filtrado['lastModifiedBy'].astype(str)
-        
-        print(f"   ✓ Columnas filtradas del CSV: {len(columnas_csv_encontradas)}")
+        logger.info("\n[PASO 1] Leyendo archivo CSV principal...")
+        if filtrar_csv_al_leer:
+            # La lectura se hace en PASO 2.8, filtrando por los IDs del Reporte 45
+            logger.info(f"   ℹ️ Lectura por bloques (solo columnas requeridas + filtro de IDs en PASO 2.8)")
+        else:
+            df_csv = pd.read_csv(ruta_entrada_csv, skiprows=2, encoding='utf-8', dtype=str)
+            logger.info(f"   ✓ CSV leído: {df_csv.shape[0]} filas, {df_csv.shape[1]} columnas")
+            
+            # Seleccionar columnas del CSV
+            columnas_csv_encontradas = [col for col in columnas_csv if col in df_csv.columns]
+            df_csv_filtrado = df_csv[columnas_csv_encontradas].copy()
+            del df_csv
+            
+            # CRÍTICO: Asegurar que lastModifiedBy del CSV también sea STRING
+            if 'lastModifiedBy' in df_csv_filtrado.columns:
+                df_csv_filtrado['lastModifiedBy'] = df_csv_filtrado['lastModifiedBy'].astype(str)
+            
+            logger.info(f"   ✓ Columnas filtradas del CSV: {len(columnas_csv_encontradas)}")
         
         # ====================================================================
         # PASO 2: LEER ARCHIVO EXCEL
         # ====================================================================
-        print("\n[PASO 2] Leyendo archivo Excel para CONCAT...")
-        df_excel = pd.read_excel(ruta_entrada_excel, dtype=str)
-        print(f"   ✓ Excel leído: {df_excel.shape[0]} filas, {df_excel.shape[1]} columnas")
-        print(f"   ✓ TODAS las columnas Excel (con longitud y repr):")
-        for i, col in enumerate(df_excel.columns, 1):
-            print(f"      {i:2d}. '{col}' (len={len(col)}, repr={repr(col)})")
-        
+        logger.info("\n[PASO 2] Leyendo archivo Excel para CONCAT...")
         # Renombrar columnas del Excel para que coincidan
         # CRÍTICO: Excel tiene DOS columnas "Descripc.enfermedad" (pandas las lee como .1, .2)
         # Primera: Código (ej: J00X, G439)
@@ -379,69 +638,82 @@ def procesar_archivo_ausentismos():
             'Clase absent./pres.': 'codigo_sap_original'  # Columna especial
         }
 
+        # Lectura por streaming: solo las columnas del mapeo (y la de FSE), con fechas tipadas
+        columnas_fecha_excel = {'Inicio de validez', 'Fin de validez', 'Modificado el', 'Final'}
+        es_columna_fse = lambda col: 'final' in str(col).lower() and 'salario' in str(col).lower()
+        df_excel = leer_excel(
+            ruta_entrada_excel,
+            columnas=lambda col: col in mapeo_excel or es_columna_fse(col),
+            tipos=lambda col: 'fecha' if col in columnas_fecha_excel or es_columna_fse(col) else 'str'
+        )
+        logger.info(f"   ✓ Excel leído: {df_excel.shape[0]} filas, {df_excel.shape[1]} columnas")
+        if diagnostico_activo(logger):
+            logger.debug(f"   ✓ Columnas Excel leídas (con longitud y repr):")
+            for i, col in enumerate(df_excel.columns, 1):
+                logger.debug(f"      {i:2d}. '{col}' (len={len(col)}, repr={repr(col)})")
+
         # Buscar la columna Final Salario enfer. de forma flexible
-        print(f"\n   🔍 Buscando columna 'Final Salario enfer.' en Excel...")
+        logger.info(f"\n   🔍 Buscando columna 'Final Salario enfer.' en Excel...")
         columna_fse_encontrada = None
         for col in df_excel.columns:
             if 'final' in col.lower() and 'salario' in col.lower():
                 columna_fse_encontrada = col
-                print(f"   ✓ Columna FSE encontrada: '{col}'")
-                print(f"   📋 Ejemplos de valores:")
-                for i in range(min(5, len(df_excel))):
-                    val = df_excel[col].iloc[i]
-                    print(f"      Fila {i}: '{val}'")
+                logger.info(f"   ✓ Columna FSE encontrada: '{col}'")
+                if diagnostico_activo(logger):
+                    logger.debug(f"   📋 Ejemplos de valores:")
+                    for i in range(min(5, len(df_excel))):
+                        val = df_excel[col].iloc[i]
+                        logger.debug(f"      Fila {i}: '{val}'")
                 break
 
         if columna_fse_encontrada is None:
-            print(f"   ❌ ADVERTENCIA: No se encontró columna con 'Final' y 'Salario'")
-            print(f"   Buscando columnas que contengan 'final':")
+            logger.error(f"   ❌ ADVERTENCIA: No se encontró columna con 'Final' y 'Salario'")
+            logger.debug(f"   Buscando columnas que contengan 'final':")
             for col in df_excel.columns:
                 if 'final' in col.lower():
-                    print(f"      - '{col}'")
+                    logger.debug(f"      - '{col}'")
         else:
             # Actualizar el mapeo con el nombre correcto de la columna
             mapeo_excel[columna_fse_encontrada] = 'fse_fechas'
-            print(f"   ✓ Mapeo actualizado: '{columna_fse_encontrada}' → 'fse_fechas'")
+            logger.info(f"   ✓ Mapeo actualizado: '{columna_fse_encontrada}' → 'fse_fechas'")
 
         # Aplicar mapeo
         df_excel_renamed = df_excel.rename(columns=mapeo_excel)
 
         # Verificar si fse_fechas existe después del rename
-        print(f"\n   🔍 Verificando columna fse_fechas después del rename...")
-        if 'fse_fechas' in df_excel_renamed.columns:
+        if 'fse_fechas' not in df_excel_renamed.columns:
+            logger.error(f"   ❌ 'fse_fechas' NO encontrada después del rename")
+        elif diagnostico_activo(logger):
+            logger.debug(f"\n   🔍 Verificando columna fse_fechas después del rename...")
             valores_no_nulos = df_excel_renamed['fse_fechas'].notna().sum()
-            print(f"   ✅ 'fse_fechas' encontrada en Excel renombrado")
-            print(f"   📊 Valores no nulos: {valores_no_nulos}/{len(df_excel_renamed)}")
-            print(f"   📋 Primeros 3 valores:")
+            logger.debug(f"   ✅ 'fse_fechas' encontrada en Excel renombrado")
+            logger.debug(f"   📊 Valores no nulos: {valores_no_nulos}/{len(df_excel_renamed)}")
+            logger.debug(f"   📋 Primeros 3 valores:")
             for i in range(min(3, len(df_excel_renamed))):
                 val = df_excel_renamed['fse_fechas'].iloc[i]
-                print(f"      Fila {i}: '{val}' (tipo: {type(val)})")
-        else:
-            print(f"   ❌ 'fse_fechas' NO encontrada después del rename")
-            print(f"   Columnas que contienen 'fse':")
-            for col in df_excel_renamed.columns:
-                if 'fse' in col.lower():
-                    print(f"      - '{col}'")
+                logger.debug(f"      Fila {i}: '{val}' (tipo: {type(val)})")
 
         # CRÍTICO: Asegurar que lastModifiedBy sea STRING
         if 'lastModifiedBy' in df_excel_renamed.columns:
             df_excel_renamed['lastModifiedBy'] = df_excel_renamed['lastModifiedBy'].astype(str)
-            print(f"   ✓ lastModifiedBy convertido a STRING")
-            print(f"   📋 Ejemplos de valores: {df_excel_renamed['lastModifiedBy'].head(5).tolist()}")
+            logger.info(f"   ✓ lastModifiedBy convertido a STRING")
+            if diagnostico_activo(logger):
+                logger.debug(f"   📋 Ejemplos de valores: {df_excel_renamed['lastModifiedBy'].head(5).tolist()}")
         
-        print(f"   ✓ Columnas renombradas en Excel")
+        logger.info(f"   ✓ Columnas renombradas en Excel")
         
         # ====================================================================
         # PASO 2.5: CONVERTIR CÓDIGOS SAP A SSF EN EXCEL
         # ====================================================================
-        print("\n[PASO 2.5] Convirtiendo códigos SAP a SSF en archivo Excel...")
+        logger.info("\n[PASO 2.5] Convirtiendo códigos SAP a SSF en archivo Excel...")
         if 'codigo_sap_original' in df_excel_renamed.columns:
             df_excel_renamed['externalCode'] = df_excel_renamed['codigo_sap_original'].apply(convertir_codigo_sap_a_ssf)
             
-            ejemplos_conversion = df_excel_renamed[['codigo_sap_original', 'externalCode']].head(5)
-            print("   📋 Ejemplos de conversión SAP → SSF:")
-            for idx, row in ejemplos_conversion.iterrows():
-                print(f"      {row['codigo_sap_original']} → {row['externalCode']}")
+            if diagnostico_activo(logger):
+                ejemplos_conversion = df_excel_renamed[['codigo_sap_original', 'externalCode']].head(5)
+                logger.debug("   📋 Ejemplos de conversión SAP → SSF:")
+                for idx, row in ejemplos_conversion.iterrows():
+                    logger.debug(f"      {row['codigo_sap_original']} → {row['externalCode']}")
             
             # Eliminar columna temporal
             df_excel_renamed = df_excel_renamed.drop(['codigo_sap_original'], axis=1)
@@ -449,285 +721,190 @@ def procesar_archivo_ausentismos():
         # ====================================================================
         # PASO 2.8: FILTRAR CSV - SOLO PERSONAS QUE EXISTEN EN REPORTE 45
         # ====================================================================
-        print("\n[PASO 2.8] Filtrando CSV - Solo personas que existen en Reporte 45...")
+        logger.info("\n[PASO 2.8] Filtrando CSV - Solo personas que existen en Reporte 45...")
 
         # Obtener IDs únicos del Excel (Reporte 45)
         ids_excel = set(df_excel_renamed['ID personal'].astype(str).str.strip().unique())
-        print(f"   📊 IDs únicos en Reporte 45 (Excel): {len(ids_excel):,}")
+        logger.info(f"   📊 IDs únicos en Reporte 45 (Excel): {len(ids_excel):,}")
 
         # Filtrar CSV para mantener solo IDs que están en Excel
-        registros_csv_antes = len(df_csv_filtrado)
-        df_csv_filtrado['ID personal'] = df_csv_filtrado['ID personal'].astype(str).str.strip()
-        df_csv_filtrado = df_csv_filtrado[df_csv_filtrado['ID personal'].isin(ids_excel)].copy()
+        if filtrar_csv_al_leer:
+            df_csv_filtrado, registros_csv_antes = leer_csv_successfactors(ruta_entrada_csv, ids_excel)
+            logger.info(f"   ✓ Columnas leídas del CSV: {df_csv_filtrado.shape[1]}")
+        else:
+            registros_csv_antes = len(df_csv_filtrado)
+            df_csv_filtrado['ID personal'] = df_csv_filtrado['ID personal'].astype(str).str.strip()
+            df_csv_filtrado = df_csv_filtrado[df_csv_filtrado['ID personal'].isin(ids_excel)].copy()
         registros_csv_despues = len(df_csv_filtrado)
         registros_eliminados = registros_csv_antes - registros_csv_despues
 
-        print(f"   ✓ CSV ANTES del filtro: {registros_csv_antes:,} registros")
-        print(f"   ✓ CSV DESPUÉS del filtro: {registros_csv_despues:,} registros")
-        print(f"   ✓ Registros eliminados (no están en Reporte 45): {registros_eliminados:,}")
+        logger.info(f"   ✓ CSV ANTES del filtro: {registros_csv_antes:,} registros")
+        logger.info(f"   ✓ CSV DESPUÉS del filtro: {registros_csv_despues:,} registros")
+        logger.info(f"   ✓ Registros eliminados (no están en Reporte 45): {registros_eliminados:,}")
 
         if registros_csv_despues == 0:
-            print(f"   ⚠️ ADVERTENCIA: No hay coincidencias entre CSV y Excel por ID personal")
-            print(f"   📋 Primeros 5 IDs del CSV: {list(df_csv_filtrado['ID personal'].head())}")
-            print(f"   📋 Primeros 5 IDs del Excel: {list(ids_excel)[:5]}")
+            logger.warning(f"   ⚠️ ADVERTENCIA: No hay coincidencias entre CSV y Excel por ID personal")
+            logger.debug(f"   📋 Primeros 5 IDs del CSV: {list(df_csv_filtrado['ID personal'].head())}")
+            logger.debug(f"   📋 Primeros 5 IDs del Excel: {list(ids_excel)[:5]}")
 
         # ====================================================================
         # PASO 3: CONCATENAR CSV + EXCEL
         # ====================================================================
-        print("\n[PASO 3] Concatenando CSV y Excel...")
+        logger.info("\n[PASO 3] Concatenando CSV y Excel...")
 
         # Debug: verificar si CSV tiene columna fse_fechas (no debería tenerla)
-        print(f"   🔍 Verificando columnas antes del concat:")
-        print(f"      CSV tiene 'fse_fechas': {'fse_fechas' in df_csv_filtrado.columns}")
-        print(f"      Excel tiene 'fse_fechas': {'fse_fechas' in df_excel_renamed.columns}")
+        logger.debug(f"   🔍 Verificando columnas antes del concat:")
+        logger.debug(f"      CSV tiene 'fse_fechas': {'fse_fechas' in df_csv_filtrado.columns}")
+        logger.debug(f"      Excel tiene 'fse_fechas': {'fse_fechas' in df_excel_renamed.columns}")
 
         df_combinado = pd.concat([df_csv_filtrado, df_excel_renamed], ignore_index=True, sort=False)
-        print(f"   ✓ Datos combinados: {df_combinado.shape[0]} filas totales")
-        print(f"   ✓ CSV FILTRADO: {df_csv_filtrado.shape[0]} filas")
-        print(f"   ✓ Excel: {df_excel_renamed.shape[0]} filas")
+        logger.info(f"   ✓ Datos combinados: {df_combinado.shape[0]} filas totales")
+        logger.info(f"   ✓ CSV FILTRADO: {df_csv_filtrado.shape[0]} filas")
+        logger.info(f"   ✓ Excel: {df_excel_renamed.shape[0]} filas")
 
         # Verificar si fse_fechas existe después del concat
-        if 'fse_fechas' in df_combinado.columns:
+        if 'fse_fechas' in df_combinado.columns and diagnostico_activo(logger):
             valores_no_vacios = df_combinado['fse_fechas'].notna().sum()
-            print(f"\n   🔍 Columna 'fse_fechas' encontrada en datos combinados")
-            print(f"   📊 Valores no vacíos: {valores_no_vacios}/{len(df_combinado)}")
-            print(f"   📋 Primeros 5 valores:")
+            logger.debug(f"\n   🔍 Columna 'fse_fechas' encontrada en datos combinados")
+            logger.debug(f"   📊 Valores no vacíos: {valores_no_vacios}/{len(df_combinado)}")
+            logger.debug(f"   📋 Primeros 5 valores:")
             for i in range(min(5, len(df_combinado))):
                 val = df_combinado['fse_fechas'].iloc[i]
-                print(f"      Fila {i}: '{val}'")
+                logger.debug(f"      Fila {i}: '{val}'")
 
         # ====================================================================
         # PASO 3.5: CONVERTIR FECHAS A DATETIME (MANTENER COMO DATETIME)
         # ====================================================================
-        print("\n[PASO 3.5] Normalizando fechas a datetime (DD/MM/YYYY al guardar)...")
+        logger.info("\n[PASO 3.5] Normalizando fechas a datetime (DD/MM/YYYY al guardar)...")
 
         columnas_fecha = ['startDate', 'endDate', 'Last Approval Status Date', 'fse_fechas', 'Modificado el']
 
         for col in columnas_fecha:
             if col in df_combinado.columns:
-                print(f"   🔧 Normalizando columna: {col}")
+                logger.info(f"   🔧 Normalizando columna: {col}")
 
                 # Mostrar estadísticas ANTES
-                valores_no_nulos = df_combinado[col].notna().sum()
-                valores_nulos = df_combinado[col].isna().sum()
-                print(f"      ANTES - No nulos: {valores_no_nulos}, Nulos: {valores_nulos}")
-                if valores_no_nulos > 0:
-                    primer_valor = df_combinado[df_combinado[col].notna()][col].iloc[0]
-                    print(f"      ANTES - Primer valor: {primer_valor} (tipo: {type(primer_valor)})")
-
-                # Usar pd.to_datetime para normalizar fechas correctamente
+                if diagnostico_activo(logger):
+                    valores_no_nulos = df_combinado[col].notna().sum()
+                    valores_nulos = df_combinado[col].isna().sum()
+                    logger.debug(f"      ANTES - No nulos: {valores_no_nulos}, Nulos: {valores_nulos}")
+                    if valores_no_nulos > 0:
+                        primer_valor = df_combinado[df_combinado[col].notna()][col].iloc[0]
+                        logger.debug(f"      ANTES - Primer valor: {primer_valor} (tipo: {type(primer_valor)})")
+
+                # Motor de fechas: formato dominante inferido una vez, respaldo solo para los que no encajan
                 try:
-                    # Primero reemplazar valores vacíos/nan como string
-                    df_combinado[col] = df_combinado[col].replace(['', 'nan', 'NaN', 'None'], pd.NaT)
-
                     # Convertir a datetime (MANTENER COMO DATETIME, NO CONVERTIR A STRING)
-                    # dayfirst=True para interpretar formato DD/MM/YYYY correctamente
-                    df_combinado[col] = pd.to_datetime(
-                        df_combinado[col],
-                        errors='coerce',
-                        dayfirst=True,  # CRÍTICO: día primero para formato DD/MM/YYYY
-                        format='mixed'
-                    )
+                    # Vacíos/'nan'/'None' quedan como NaT; el respaldo usa día primero (DD/MM/YYYY)
+                    fechas = parsear_fechas(df_combinado[col], col)
+                    df_combinado[col] = fechas
+                    logger.info(f"      📅 {resumen_fechas(fechas)}")
 
                     # NO usar strftime - mantener como datetime
                     # El formato se aplicará al guardar el CSV con date_format
 
                     # Mostrar estadísticas DESPUÉS
-                    valores_con_fecha = df_combinado[col].notna().sum()
-                    valores_sin_fecha = df_combinado[col].isna().sum()
-                    print(f"      DESPUÉS - Con fecha: {valores_con_fecha}, Sin fecha: {valores_sin_fecha}")
-                    if valores_con_fecha > 0:
-                        primer_valor_despues = df_combinado[df_combinado[col].notna()][col].iloc[0]
-                        print(f"      DESPUÉS - Valor: {primer_valor_despues} (tipo: {type(primer_valor_despues)})")
+                    if diagnostico_activo(logger):
+                        valores_con_fecha = df_combinado[col].notna().sum()
+                        valores_sin_fecha = df_combinado[col].isna().sum()
+                        logger.debug(f"      DESPUÉS - Con fecha: {valores_con_fecha}, Sin fecha: {valores_sin_fecha}")
+                        if valores_con_fecha > 0:
+                            primer_valor_despues = df_combinado[df_combinado[col].notna()][col].iloc[0]
+                            logger.debug(f"      DESPUÉS - Valor: {primer_valor_despues} (tipo: {type(primer_valor_despues)})")
 
                 except Exception as e:
-                    print(f"      ⚠️ Error convirtiendo {col}: {e}")
-                    import traceback
-                    traceback.print_exc()
+                    logger.exception(f"      ⚠️ Error convirtiendo {col}: {e}")
             else:
-                print(f"   ⚠️ Columna '{col}' NO encontrada en df_combinado")
+                logger.warning(f"   ⚠️ Columna '{col}' NO encontrada en df_combinado")
 
-        print(f"   ✓ Fechas normalizadas como datetime objects")
+        logger.info(f"   ✓ Fechas normalizadas como datetime objects")
         
         # ====================================================================
         # PASO 4: CREAR COLUMNA DE HOMOLOGACIÓN (SSF → SAP)
         # ====================================================================
-        print("\n[PASO 4] Creando columna de homologación SSF vs SAP...")
+        logger.info("\n[PASO 4] Creando columna de homologación SSF vs SAP...")
         if 'externalCode' in df_combinado.columns:
             df_combinado['Homologacion_clase_de_ausentismo_SSF_vs_SAP'] = df_combinado['externalCode'].map(tabla_homologacion)
             
             valores_encontrados = df_combinado['Homologacion_clase_de_ausentismo_SSF_vs_SAP'].notna().sum()
-            print(f"   ✓ Homologación aplicada: {valores_encontrados}/{len(df_combinado)} códigos")
+            logger.info(f"   ✓ Homologación aplicada: {valores_encontrados}/{len(df_combinado)} códigos")
         
         # ====================================================================
         # PASO 5: CREAR LLAVE (ANTES DE ELIMINAR DUPLICADOS)
         # ====================================================================
-        print("\n[PASO 5] Creando columna LLAVE...")
-        df_combinado['startDate_limpia'] = df_combinado['startDate'].apply(limpiar_fecha_para_llave)
-        df_combinado['endDate_limpia'] = df_combinado['endDate'].apply(limpiar_fecha_para_llave)
+        logger.info("\n[PASO 5] Creando columna LLAVE...")
+        # Construcción columnar: cada fecha distinta se formatea una sola vez
+        df_combinado['llave'] = construir_llave(df_combinado)
         
-        df_combinado['llave'] = (
-            df_combinado['ID personal'].astype(str).fillna('') +
-            df_combinado['startDate_limpia'] +
-            df_combinado['endDate_limpia'] +
-            df_combinado['Homologacion_clase_de_ausentismo_SSF_vs_SAP'].astype(str).fillna('')
-        )
-        
-        # Agregar prefijo K
-        df_combinado['llave'] = 'K' + df_combinado['llave'].astype(str)
-        
-        print(f"   ✓ Llaves creadas: {len(df_combinado)}")
-        print(f"   📋 Ejemplos de llaves:")
-        for llave in df_combinado['llave'].head(3):
-            print(f"      {llave}")
-        
-        # Limpiar columnas temporales
-        df_combinado = df_combinado.drop(['startDate_limpia', 'endDate_limpia'], axis=1)
+        logger.info(f"   ✓ Llaves creadas: {len(df_combinado)}")
+        if diagnostico_activo(logger):
+            logger.debug(f"   📋 Ejemplos de llaves:")
+            for llave in df_combinado['llave'].head(3):
+                logger.debug(f"      {llave}")
         
         # ====================================================================
         # PASO 6: ELIMINAR DUPLICADOS POR LLAVE (COMBINANDO COLUMNAS)
         # ====================================================================
-        print("\n[PASO 6] Eliminando duplicados por llave y combinando datos CSV/Excel...")
+        logger.info("\n[PASO 6] Eliminando duplicados por llave y combinando datos CSV/Excel...")
         registros_antes = len(df_combinado)
         duplicados_encontrados = df_combinado['llave'].duplicated().sum()
 
-        print(f"   ⚠ Duplicados encontrados: {duplicados_encontrados}")
-
-        # PASO 6.1: Crear backup del CSV ANTES de eliminar duplicados
-        print("\n   🔧 Creando backup de columnas mandantes del CSV...")
-
-        # lastModifiedBy: SIEMPRE prevalece del CSV (columna mandante)
-        # Last Approval Status Date: Solo rellenar vacíos del Excel
-        columnas_mandantes_csv = ['lastModifiedBy']  # SIEMPRE prevalece del CSV
-        columnas_rellenar_csv = ['Last Approval Status Date']  # Solo rellenar vacíos
+        logger.info(f"   ⚠ Duplicados encontrados: {duplicados_encontrados}")
 
-        # Verificar qué columnas existen
-        columnas_mandantes_existentes = [col for col in columnas_mandantes_csv if col in df_combinado.columns]
-        columnas_rellenar_existentes = [col for col in columnas_rellenar_csv if col in df_combinado.columns]
+        # Una sola pasada por llave: último registro (Excel) + reglas por columna desde el CSV
+        for regla in reglas_reconciliacion:
+            if regla['columna'] in df_combinado.columns:
+                descripcion = 'SIEMPRE prevalece' if regla['regla'] == 'csv_mandante' else 'solo rellena vacíos'
+                logger.info(f"      Columna '{regla['columna']}' del CSV: {descripcion}")
 
-        todas_columnas_csv = columnas_mandantes_existentes + columnas_rellenar_existentes
+        df_combinado, conteos_csv = reconciliar_csv_excel(df_combinado, len(df_csv_filtrado))
+        registros_despues = len(df_combinado)
 
-        csv_backup = None
-        if len(todas_columnas_csv) > 0:
-            print(f"      Columnas MANDANTES del CSV (siempre prevalecen): {columnas_mandantes_existentes}")
-            print(f"      Columnas a RELLENAR desde CSV (solo vacíos): {columnas_rellenar_existentes}")
-
-            # Crear un DataFrame temporal con los valores del CSV (primeros registros)
-            try:
-                # Los registros del CSV son los primeros después del concat
-                csv_backup = df_combinado.iloc[:len(df_csv_filtrado)][['llave'] + todas_columnas_csv].copy()
-
-                # CRÍTICO: Eliminar duplicados en csv_backup para evitar multiplicación en el merge
-                filas_antes = len(csv_backup)
-                csv_backup = csv_backup.drop_duplicates(subset=['llave'], keep='first')
-                filas_despues = len(csv_backup)
-
-                print(f"      ✅ Backup CSV creado: {filas_antes} registros → {filas_despues} únicos")
-                print(f"      📋 Llaves únicas en CSV: {csv_backup['llave'].nunique()}")
-            except Exception as e:
-                print(f"      ⚠️ Error creando backup CSV: {e}")
-                csv_backup = None
-        else:
-            print(f"      ⚠️ No hay columnas para preservar del CSV")
-
-        # PASO 6.2: Eliminar duplicados (mantener Excel para otras columnas)
         if duplicados_encontrados > 0:
-            print("\n   🔧 Eliminando duplicados (manteniendo registro del Excel)...")
-            df_combinado = df_combinado.drop_duplicates(subset=['llave'], keep='last')
-            registros_despues = len(df_combinado)
-            eliminados = registros_antes - registros_despues
-            print(f"   ✓ Registros eliminados: {eliminados}")
-            print(f"   ✓ Registros finales: {registros_despues}")
+            logger.info(f"   ✓ Registros eliminados: {registros_antes - registros_despues}")
+            logger.info(f"   ✓ Registros finales: {registros_despues}")
         else:
-            print(f"   ✅ No hay duplicados - todas las llaves son únicas")
-            registros_despues = registros_antes
-
-        # PASO 6.3: SIEMPRE aplicar columnas mandantes del CSV (haya o no duplicados)
-        print("\n   🔧 Aplicando columnas MANDANTES del CSV a TODOS los registros...")
-        if csv_backup is not None and len(csv_backup) > 0:
-            # 6.3.1: Columnas MANDANTES - SIEMPRE usar valor del CSV (usando .map() para evitar duplicados)
-            for col in columnas_mandantes_existentes:
-                try:
-                    # Crear diccionario llave -> valor del CSV
-                    mapeo_csv = csv_backup.set_index('llave')[col].to_dict()
-
-                    # Contar cuántos valores se van a sobrescribir
-                    valores_antes_no_vacios = df_combinado[col].notna().sum()
-
-                    # Mapear valores del CSV usando la llave
-                    # Si existe en el CSV, usar ese valor; si no, mantener el actual
-                    df_combinado[col] = df_combinado['llave'].map(mapeo_csv).fillna(df_combinado[col])
-
-                    valores_despues_no_vacios = df_combinado[col].notna().sum()
-                    valores_sobrescritos = len([llave for llave in df_combinado['llave'] if llave in mapeo_csv])
-
-                    print(f"      ✅ '{col}' (MANDANTE): {valores_sobrescritos} registros con llave en CSV")
-                    print(f"         Valores no vacíos: {valores_antes_no_vacios} → {valores_despues_no_vacios}")
-                except Exception as e:
-                    print(f"      ⚠️ Error sobrescribiendo '{col}': {e}")
-                    import traceback
-                    traceback.print_exc()
-
-            # 6.3.2: Columnas de RELLENO - Solo rellenar valores vacíos del Excel (usando .map())
-            for col in columnas_rellenar_existentes:
-                try:
-                    # Crear diccionario llave -> valor del CSV
-                    mapeo_csv = csv_backup.set_index('llave')[col].to_dict()
+            logger.info(f"   ✅ No hay duplicados - todas las llaves son únicas")
 
-                    # Solo rellenar donde está vacío en df_combinado
-                    mask_vacios = df_combinado[col].isna()
-                    valores_rellenos = 0
-
-                    if mask_vacios.sum() > 0:
-                        # Mapear solo los valores vacíos
-                        df_combinado.loc[mask_vacios, col] = df_combinado.loc[mask_vacios, 'llave'].map(mapeo_csv)
-                        valores_rellenos = mask_vacios.sum()
-
-                    print(f"      ✅ '{col}' (RELLENO): {valores_rellenos} valores vacíos RELLENADOS desde CSV")
-                except Exception as e:
-                    print(f"      ⚠️ Error rellenando '{col}': {e}")
-                    import traceback
-                    traceback.print_exc()
-
-            print(f"   ✓ Columnas del CSV aplicadas correctamente")
-            print(f"   💡 lastModifiedBy ahora prevalece del CSV en TODOS los registros donde existe la llave")
-        else:
-            print(f"   ⚠️ No se pudo aplicar columnas del CSV - backup no disponible")
+        for col, cantidad in conteos_csv.items():
+            logger.info(f"      ✅ '{col}': {cantidad} valores tomados del CSV")
+        logger.info(f"   💡 lastModifiedBy prevalece del CSV en TODOS los registros donde existe la llave")
         
         # ====================================================================
         # PASO 7: CREAR COLUMNAS DE VALIDADOR (NOMBRE Y USUARIO)
         # ====================================================================
-        print("\n[PASO 7] Creando columnas de validador (maneja códigos Y usuarios)...")
+        logger.info("\n[PASO 7] Creando columnas de validador (maneja códigos Y usuarios)...")
         if 'lastModifiedBy' in df_combinado.columns:
-            print("   🔧 Procesando lastModifiedBy (puede contener códigos o usuarios)...")
+            logger.info("   🔧 Procesando lastModifiedBy (puede contener códigos o usuarios)...")
             
-            # Aplicar la función que maneja ambos casos
-            validador_info = df_combinado['lastModifiedBy'].apply(obtener_info_validador)
+            # Resolver cada valor distinto una sola vez (códigos o usuarios) y repartir a las filas
+            validador_info = resolver_validadores(df_combinado['lastModifiedBy'])
             
             # Separar en 3 columnas
-            df_combinado['nombre_validador'] = validador_info.apply(lambda x: x[0])
-            df_combinado['usuario_validador'] = validador_info.apply(lambda x: x[1])
-            df_combinado['codigo_validador'] = validador_info.apply(lambda x: x[2])
+            df_combinado['nombre_validador'] = validador_info['nombre_validador']
+            df_combinado['usuario_validador'] = validador_info['usuario_validador']
+            df_combinado['codigo_validador'] = validador_info['codigo_validador']
 
             # CRÍTICO: Forzar codigo_validador como STRING
             df_combinado['codigo_validador'] = df_combinado['codigo_validador'].astype(str)
 
             validadores_ok = (df_combinado['nombre_validador'] != 'ALERTA VALIDADOR NO ENCONTRADO').sum()
-            print(f"   ✓ Validadores mapeados: {validadores_ok}/{len(df_combinado)}")
+            logger.info(f"   ✓ Validadores mapeados: {validadores_ok}/{len(df_combinado)}")
             
             # Mostrar ejemplos
-            print(f"\n   📋 Ejemplos de conversión (primeros 5):")
-            for i in range(min(5, len(df_combinado))):
-                original = df_combinado['lastModifiedBy'].iloc[i]
-                nombre = df_combinado['nombre_validador'].iloc[i]
-                usuario = df_combinado['usuario_validador'].iloc[i]
-                codigo = df_combinado['codigo_validador'].iloc[i]
-                print(f"      '{original}' → Nombre: {nombre}, Usuario: {usuario}, Código: {codigo}")
+            if diagnostico_activo(logger):
+                logger.debug(f"\n   📋 Ejemplos de conversión (primeros 5):")
+                for i in range(min(5, len(df_combinado))):
+                    original = df_combinado['lastModifiedBy'].iloc[i]
+                    nombre = df_combinado['nombre_validador'].iloc[i]
+                    usuario = df_combinado['usuario_validador'].iloc[i]
+                    codigo = df_combinado['codigo_validador'].iloc[i]
+                    logger.debug(f"      '{original}' → Nombre: {nombre}, Usuario: {usuario}, Código: {codigo}")
 
         # ====================================================================
         # PASO 8: CREAR COLUMNAS SUB_TIPO Y FSE
         # ====================================================================
-        print("\n[PASO 8] Creando columnas Sub_tipo y FSE...")
+        logger.info("\n[PASO 8] Creando columnas Sub_tipo y FSE...")
         if 'Homologacion_clase_de_ausentismo_SSF_vs_SAP' in df_combinado.columns:
             df_combinado['Sub_tipo'] = df_combinado['Homologacion_clase_de_ausentismo_SSF_vs_SAP'].apply(
                 lambda x: tabla_sub_tipo_fse.get(str(x), {}).get('sub_tipo', 'ALERTA SUB_TIPO NO ENCONTRADO') if pd.notna(x) else 'ALERTA SUB_TIPO NO ENCONTRADO'
@@ -741,14 +918,14 @@ def procesar_archivo_ausentismos():
             fse_si = (df_combinado['FSE'] == 'Si Aplica').sum()
             fse_no = (df_combinado['FSE'] == 'No Aplica').sum()
             
-            print(f"   ✓ Sub_tipo mapeados: {sub_tipo_ok}/{len(df_combinado)}")
-            print(f"   ✓ FSE - Si Aplica: {fse_si}")
-            print(f"   ✓ FSE - No Aplica: {fse_no}")
+            logger.info(f"   ✓ Sub_tipo mapeados: {sub_tipo_ok}/{len(df_combinado)}")
+            logger.info(f"   ✓ FSE - Si Aplica: {fse_si}")
+            logger.info(f"   ✓ FSE - No Aplica: {fse_no}")
         
         # ====================================================================
         # PASO 9: MAPEO FINAL DE NOMBRES DE COLUMNAS
         # ====================================================================
-        print("\n[PASO 9] Aplicando mapeo de nombres de columnas...")
+        logger.info("\n[PASO 9] Aplicando mapeo de nombres de columnas...")
         
         mapeo_columnas_final = {
             'ID personal': 'id_personal',
@@ -788,25 +965,27 @@ def procesar_archivo_ausentismos():
         mapeo_aplicable = {k: v for k, v in mapeo_columnas_final.items() if k in df_combinado.columns}
         df_final = df_combinado.rename(columns=mapeo_aplicable)
         
-        print(f"   ✓ Columnas renombradas: {len(mapeo_aplicable)}")
-        print(f"   ✓ Total columnas finales: {len(df_final.columns)}")
+        logger.info(f"   ✓ Columnas renombradas: {len(mapeo_aplicable)}")
+        logger.info(f"   ✓ Total columnas finales: {len(df_final.columns)}")
         
         # ====================================================================
         # PASO 10: LIMPIEZA FINAL Y GUARDADO
         # ====================================================================
-        print("\n[PASO 10] Limpieza final y guardado...")
+        logger.info("\n[PASO 10] Limpieza final y guardado...")
         
         # Crear directorio si no existe
-        if not os.path.exists(directorio_salida):
-            os.makedirs(directorio_salida)
+        directorio = os.path.dirname(ruta_completa_salida) if ruta_completa_salida else ''
+        if directorio and not os.path.exists(directorio):
+            os.makedirs(directorio)
         
         # CRÍTICO: Asegurar que last_modified_by sea STRING en salida final
         if 'last_modified_by' in df_final.columns:
-            print("   🔧 Forzando last_modified_by como STRING...")
+            logger.info("   🔧 Forzando last_modified_by como STRING...")
             df_final['last_modified_by'] = df_final['last_modified_by'].astype(str)
             # Agregar comillas para forzar que Excel lo lea como texto
             df_final['last_modified_by'] = '"' + df_final['last_modified_by'] + '"'
-            print(f"   ✓ Ejemplos de last_modified_by: {df_final['last_modified_by'].head(3).tolist()}")
+            if diagnostico_activo(logger):
+                logger.debug(f"   ✓ Ejemplos de last_modified_by: {df_final['last_modified_by'].head(3).tolist()}")
         
         # Limpiar número de documento
         if 'numero_documento_identidad' in df_final.columns:
@@ -815,63 +994,66 @@ def procesar_archivo_ausentismos():
 
         # CRÍTICO: Forzar codigo_validador como STRING con comillas
         if 'codigo_validador' in df_final.columns:
-            print("   🔧 Forzando codigo_validador como STRING...")
+            logger.info("   🔧 Forzando codigo_validador como STRING...")
             df_final['codigo_validador'] = df_final['codigo_validador'].astype(str).fillna('')
             # Agregar comillas para forzar que Excel lo lea como texto
             df_final['codigo_validador'] = '"' + df_final['codigo_validador'] + '"'
-            print(f"   ✓ Ejemplos de codigo_validador: {df_final['codigo_validador'].head(3).tolist()}")
+            if diagnostico_activo(logger):
+                logger.debug(f"   ✓ Ejemplos de codigo_validador: {df_final['codigo_validador'].head(3).tolist()}")
 
         # CRÍTICO: Complementar last_approval_status_date y modificado_el
-        print("\n   🔧 Complementando columnas de fecha (last_approval_status_date ↔ modificado_el)...")
+        logger.info("\n   🔧 Complementando columnas de fecha (last_approval_status_date ↔ modificado_el)...")
         if 'last_approval_status_date' in df_final.columns and 'modificado_el' in df_final.columns:
             # Contar vacíos ANTES
             vacios_last_approval_antes = df_final['last_approval_status_date'].isna().sum()
             vacios_modificado_antes = df_final['modificado_el'].isna().sum()
 
-            print(f"      ANTES:")
-            print(f"         last_approval_status_date vacíos: {vacios_last_approval_antes}")
-            print(f"         modificado_el vacíos: {vacios_modificado_antes}")
+            logger.info(f"      ANTES:")
+            logger.info(f"         last_approval_status_date vacíos: {vacios_last_approval_antes}")
+            logger.info(f"         modificado_el vacíos: {vacios_modificado_antes}")
 
             # 1. Rellenar last_approval_status_date vacíos con modificado_el
             mask_last_approval_vacio = df_final['last_approval_status_date'].isna()
             if mask_last_approval_vacio.sum() > 0:
                 df_final.loc[mask_last_approval_vacio, 'last_approval_status_date'] = df_final.loc[mask_last_approval_vacio, 'modificado_el']
                 rellenados = mask_last_approval_vacio.sum()
-                print(f"      ✅ last_approval_status_date: Rellenados {rellenados} valores desde modificado_el")
+                logger.info(f"      ✅ last_approval_status_date: Rellenados {rellenados} valores desde modificado_el")
 
             # 2. Rellenar modificado_el vacíos con last_approval_status_date
             mask_modificado_vacio = df_final['modificado_el'].isna()
             if mask_modificado_vacio.sum() > 0:
                 df_final.loc[mask_modificado_vacio, 'modificado_el'] = df_final.loc[mask_modificado_vacio, 'last_approval_status_date']
                 rellenados = mask_modificado_vacio.sum()
-                print(f"      ✅ modificado_el: Rellenados {rellenados} valores desde last_approval_status_date")
+                logger.info(f"      ✅ modificado_el: Rellenados {rellenados} valores desde last_approval_status_date")
 
             # Contar vacíos DESPUÉS
             vacios_last_approval_despues = df_final['last_approval_status_date'].isna().sum()
             vacios_modificado_despues = df_final['modificado_el'].isna().sum()
 
-            print(f"      DESPUÉS:")
-            print(f"         last_approval_status_date vacíos: {vacios_last_approval_despues}")
-            print(f"         modificado_el vacíos: {vacios_modificado_despues}")
+            logger.info(f"      DESPUÉS:")
+            logger.info(f"         last_approval_status_date vacíos: {vacios_last_approval_despues}")
+            logger.info(f"         modificado_el vacíos: {vacios_modificado_despues}")
         else:
-            print(f"      ⚠️ No se pudo complementar - columnas no encontradas")
-
-        # VERIFICAR columnas de fecha antes de guardar
-        print("\n   🔍 Verificando columnas de fecha antes de guardar...")
-        columnas_fecha_final = ['start_date', 'end_date', 'last_approval_status_date', 'modificado_el', 'fse_fechas']
-        for col_fecha in columnas_fecha_final:
-            if col_fecha in df_final.columns:
-                valores_con_fecha = df_final[col_fecha].notna().sum()
-                valores_sin_fecha = df_final[col_fecha].isna().sum()
-                tipo_dato = df_final[col_fecha].dtype
-                print(f"      {col_fecha}: {valores_con_fecha} fechas, {valores_sin_fecha} vacíos (tipo: {tipo_dato})")
-                if valores_con_fecha > 0:
-                    ejemplo = df_final[df_final[col_fecha].notna()][col_fecha].iloc[0]
-                    print(f"         Ejemplo: {ejemplo}")
+            logger.warning(f"      ⚠️ No se pudo complementar - columnas no encontradas")
+
+        # VERIFICAR columnas de fecha antes de guardar (solo en modo diagnóstico)
+        if diagnostico_activo(logger):
+            logger.debug("\n   🔍 Verificando columnas de fecha antes de guardar...")
+            columnas_fecha_final = ['start_date', 'end_date', 'last_approval_status_date', 'modificado_el', 'fse_fechas']
+            for col_fecha in columnas_fecha_final:
+                if col_fecha in df_final.columns:
+                    valores_con_fecha = df_final[col_fecha].notna().sum()
+                    valores_sin_fecha = df_final[col_fecha].isna().sum()
+                    tipo_dato = df_final[col_fecha].dtype
+                    logger.debug(f"      {col_fecha}: {valores_con_fecha} fechas, {valores_sin_fecha} vacíos (tipo: {tipo_dato})")
+                    if valores_con_fecha > 0:
+                        ejemplo = df_final[df_final[col_fecha].notna()][col_fecha].iloc[0]
+                        logger.debug(f"         Ejemplo: {ejemplo}")
 
         # Guardar archivo con formato de fecha DD/MM/YYYY
-        print("\n   💾 Guardando archivo CSV con formato de fecha DD/MM/YYYY...")
-        df_final.to_csv(
+        logger.info("\n   💾 Guardando archivo CSV con formato de fecha DD/MM/YYYY...")
+        guardar_paso(
+            df_final,
             ruta_completa_salida,
             index=False,
             encoding='utf-8',
@@ -879,89 +1061,92 @@ def procesar_archivo_ausentismos():
             quoting=2
         )
         
-        print(f"   ✓ Archivo guardado: {ruta_completa_salida}")
-        print(f"   ✓ Registros procesados: {len(df_final)}")
+        if ruta_completa_salida is not None:
+            logger.info(f"   ✓ Archivo guardado: {ruta_completa_salida}")
+        logger.info(f"   ✓ Registros procesados: {len(df_final)}")
 
         # Verificar columna fse_fechas en salida final
         if 'fse_fechas' in df_final.columns:
             valores_fse_no_vacios = df_final['fse_fechas'].notna().sum()
-            print(f"\n   ✅ Columna 'fse_fechas' en CSV final:")
-            print(f"      Valores con fecha: {valores_fse_no_vacios}")
-            print(f"      Valores vacíos: {len(df_final) - valores_fse_no_vacios}")
+            logger.info(f"\n   ✅ Columna 'fse_fechas' en CSV final:")
+            logger.info(f"      Valores con fecha: {valores_fse_no_vacios}")
+            logger.info(f"      Valores vacíos: {len(df_final) - valores_fse_no_vacios}")
         else:
-            print(f"\n   ❌ ADVERTENCIA: Columna 'fse_fechas' NO encontrada en salida final")
+            logger.error(f"\n   ❌ ADVERTENCIA: Columna 'fse_fechas' NO encontrada en salida final")
         
         # ====================================================================
         # RESUMEN FINAL
         # ====================================================================
-        print("\n" + "="*80)
-        print("=== RESUMEN FINAL DEL PROCESAMIENTO ===")
-        print("="*80)
+        logger.info("\n" + "="*80)
+        logger.info("=== RESUMEN FINAL DEL PROCESAMIENTO ===")
+        logger.info("="*80)
         
-        print(f"\n📊 ESTADÍSTICAS GENERALES:")
-        print(f"   Total de registros: {len(df_final)}")
-        print(f"   Total de columnas: {len(df_final.columns)}")
-        print(f"   Registros únicos por llave: {df_final['llave'].nunique()}")
+        logger.info(f"\n📊 ESTADÍSTICAS GENERALES:")
+        logger.info(f"   Total de registros: {len(df_final)}")
+        logger.info(f"   Total de columnas: {len(df_final.columns)}")
+        logger.info(f"   Registros únicos por llave: {df_final['llave'].nunique()}")
         
-        if 'homologacion_clase_de_ausentismo_ssf_vs_sap' in df_final.columns:
-            print(f"\n📋 HOMOLOGACIÓN SSF vs SAP:")
+        if 'homologacion_clase_de_ausentismo_ssf_vs_sap' in df_final.columns and diagnostico_activo(logger):
+            logger.debug(f"\n📋 HOMOLOGACIÓN SSF vs SAP:")
             homolog_stats = df_final['homologacion_clase_de_ausentismo_ssf_vs_sap'].value_counts().head(10)
-            print(f"   Códigos SAP más frecuentes:")
+            logger.debug(f"   Códigos SAP más frecuentes:")
             for codigo, freq in homolog_stats.items():
                 porcentaje = (freq / len(df_final)) * 100
-                print(f"      {codigo}: {freq} registros ({porcentaje:.1f}%)")
+                logger.debug(f"      {codigo}: {freq} registros ({porcentaje:.1f}%)")
         
         if 'sub_tipo' in df_final.columns and 'fse' in df_final.columns:
-            print(f"\n🏥 SUB_TIPO Y FSE:")
+            logger.info(f"\n🏥 SUB_TIPO Y FSE:")
             
             sub_tipo_alertas = (df_final['sub_tipo'] == 'ALERTA SUB_TIPO NO ENCONTRADO').sum()
             if sub_tipo_alertas > 0:
-                print(f"   🚨 Alertas de Sub_tipo: {sub_tipo_alertas} registros")
+                logger.info(f"   🚨 Alertas de Sub_tipo: {sub_tipo_alertas} registros")
             
-            print(f"\n   Top 5 Sub_tipos:")
-            sub_tipo_top = df_final[df_final['sub_tipo'] != 'ALERTA SUB_TIPO NO ENCONTRADO']['sub_tipo'].value_counts().head(5)
-            for sub_tipo, freq in sub_tipo_top.items():
-                porcentaje = (freq / len(df_final)) * 100
-                print(f"      {sub_tipo}: {freq} ({porcentaje:.1f}%)")
-            
-            print(f"\n   Distribución FSE:")
-            fse_stats = df_final['fse'].value_counts()
-            for fse_val, freq in fse_stats.items():
-                porcentaje = (freq / len(df_final)) * 100
-                print(f"      {fse_val}: {freq} registros ({porcentaje:.1f}%)")
+            if diagnostico_activo(logger):
+                logger.debug(f"\n   Top 5 Sub_tipos:")
+                sub_tipo_top = df_final[df_final['sub_tipo'] != 'ALERTA SUB_TIPO NO ENCONTRADO']['sub_tipo'].value_counts().head(5)
+                for sub_tipo, freq in sub_tipo_top.items():
+                    porcentaje = (freq / len(df_final)) * 100
+                    logger.debug(f"      {sub_tipo}: {freq} ({porcentaje:.1f}%)")
+
+                logger.debug(f"\n   Distribución FSE:")
+                fse_stats = df_final['fse'].value_counts()
+                for fse_val, freq in fse_stats.items():
+                    porcentaje = (freq / len(df_final)) * 100
+                    logger.debug(f"      {fse_val}: {freq} registros ({porcentaje:.1f}%)")
         
         if 'nombre_validador' in df_final.columns:
-            print(f"\n👤 VALIDADORES:")
+            logger.info(f"\n👤 VALIDADORES:")
 
             validador_alertas = (df_final['nombre_validador'] == 'ALERTA VALIDADOR NO ENCONTRADO').sum()
             if validador_alertas > 0:
-                print(f"   🚨 Alertas de validadores: {validador_alertas} registros ({(validador_alertas/len(df_final)*100):.1f}%)")
-                print(f"   ℹ️ Archivo de alerta se generará en PASO 2 (con filtro de fechas)")
-
-            print(f"\n   Top 10 Validadores:")
-            validadores_top = df_final[df_final['nombre_validador'] != 'ALERTA VALIDADOR NO ENCONTRADO']['nombre_validador'].value_counts().head(10)
-            for i, (nombre, freq) in enumerate(validadores_top.items(), 1):
-                porcentaje = (freq / len(df_final)) * 100
-                usuario = df_final[df_final['nombre_validador'] == nombre]['usuario_validador'].iloc[0]
-                print(f"      {i:2d}. {nombre} ({usuario}): {freq} ({porcentaje:.1f}%)")
-
-        print(f"\n🔑 COLUMNAS FINALES ({len(df_final.columns)}):")
-        for i, col in enumerate(df_final.columns, 1):
-            print(f"   {i:2d}. {col}")
+                logger.info(f"   🚨 Alertas de validadores: {validador_alertas} registros ({(validador_alertas/len(df_final)*100):.1f}%)")
+                logger.info(f"   ℹ️ Archivo de alerta se generará en PASO 2 (con filtro de fechas)")
+
+            if diagnostico_activo(logger):
+                logger.debug(f"\n   Top 10 Validadores:")
+                validadores_top = df_final[df_final['nombre_validador'] != 'ALERTA VALIDADOR NO ENCONTRADO']['nombre_validador'].value_counts().head(10)
+                for i, (nombre, freq) in enumerate(validadores_top.items(), 1):
+                    porcentaje = (freq / len(df_final)) * 100
+                    usuario = df_final[df_final['nombre_validador'] == nombre]['usuario_validador'].iloc[0]
+                    logger.debug(f"      {i:2d}. {nombre} ({usuario}): {freq} ({porcentaje:.1f}%)")
+
+        logger.info(f"\n🔑 COLUMNAS FINALES ({len(df_final.columns)})")
+        if diagnostico_activo(logger):
+            for i, col in enumerate(df_final.columns, 1):
+                logger.debug(f"   {i:2d}. {col}")
         
-        print(f"\n✅ PROCESO COMPLETADO EXITOSAMENTE")
-        print(f"   📁 Archivo principal: {archivo_salida}")
-        print(f"   📊 Registros: {len(df_final)}")
-        print(f"   🔑 Llaves únicas: {df_final['llave'].nunique()}")
-        print(f"   👤 Validadores identificados: {(df_final['nombre_validador'] != 'ALERTA VALIDADOR NO ENCONTRADO').sum()}")
-        print(f"   📋 Sub_tipos identificados: {(df_final['sub_tipo'] != 'ALERTA SUB_TIPO NO ENCONTRADO').sum()}")
+        logger.info(f"\n✅ PROCESO COMPLETADO EXITOSAMENTE")
+        if ruta_completa_salida is not None:
+            logger.info(f"   📁 Archivo principal: {os.path.basename(ruta_completa_salida)}")
+        logger.info(f"   📊 Registros: {len(df_final)}")
+        logger.info(f"   🔑 Llaves únicas: {df_final['llave'].nunique()}")
+        logger.info(f"   👤 Validadores identificados: {(df_final['nombre_validador'] != 'ALERTA VALIDADOR NO ENCONTRADO').sum()}")
+        logger.info(f"   📋 Sub_tipos identificados: {(df_final['sub_tipo'] != 'ALERTA SUB_TIPO NO ENCONTRADO').sum()}")
 
         return df_final
         
     except Exception as e:
-        print(f"\n❌ ERROR: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        logger.exception(f"\n❌ ERROR: {str(e)}")
         return None
 
 # ============================================================================
@@ -969,52 +1154,53 @@ def procesar_archivo_ausentismos():
 # ============================================================================
 def diagnostico_archivos():
     """Función de diagnóstico para entender la estructura de ambos archivos"""
-    print("="*80)
-    print("=== DIAGNÓSTICO DE ARCHIVOS ===")
-    print("="*80)
+    logger.info("="*80)
+    logger.info("=== DIAGNÓSTICO DE ARCHIVOS ===")
+    logger.info("="*80)
     
-    print("\n[1] DIAGNÓSTICO CSV:")
+    logger.info("\n[1] DIAGNÓSTICO CSV:")
     try:
         with open(ruta_entrada_csv, 'r', encoding='utf-8') as file:
             for i in range(5):
                 linea = file.readline().strip()
-                print(f"   Línea {i}: {linea[:100]}...")
+                logger.info(f"   Línea {i}: {linea[:100]}...")
     except Exception as e:
-        print(f"   ❌ Error leyendo CSV: {e}")
+        logger.error(f"   ❌ Error leyendo CSV: {e}")
     
-    print("\n[2] DIAGNÓSTICO EXCEL:")
+    logger.info("\n[2] DIAGNÓSTICO EXCEL:")
     try:
         df_excel_test = pd.read_excel(ruta_entrada_excel, nrows=3, dtype=str)
-        print(f"   ✓ Shape: {df_excel_test.shape}")
-        print(f"   ✓ Columnas: {list(df_excel_test.columns)}")
-        print(f"\n   Primeras 3 filas:")
-        print(df_excel_test.to_string(index=False))
+        logger.info(f"   ✓ Shape: {df_excel_test.shape}")
+        logger.info(f"   ✓ Columnas: {list(df_excel_test.columns)}")
+        logger.info(f"\n   Primeras 3 filas:")
+        logger.info(df_excel_test.to_string(index=False))
     except Exception as e:
-        print(f"   ❌ Error leyendo Excel: {e}")
+        logger.error(f"   ❌ Error leyendo Excel: {e}")
 
 # ============================================================================
 # EJECUCIÓN PRINCIPAL
 # ============================================================================
 if __name__ == "__main__":
-    # Ejecutar diagnóstico primero (opcional)
-    diagnostico_archivos()
+    # Ejecutar diagnóstico primero (solo con AUDITORIA_NIVEL_LOG=DEBUG)
+    if diagnostico_activo(logger):
+        diagnostico_archivos()
     
-    print("\n" + "="*80)
-    print("INICIANDO PROCESAMIENTO PRINCIPAL...")
-    print("="*80 + "\n")
+    logger.info("\n" + "="*80)
+    logger.info("INICIANDO PROCESAMIENTO PRINCIPAL...")
+    logger.info("="*80 + "\n")
     
     # Ejecutar proceso principal
     resultado = procesar_archivo_ausentismos()
     
     if resultado is not None:
-        print("\n" + "="*80)
-        print("🎉 ¡PROCESO COMPLETADO CON ÉXITO, PARCERO! 🎉")
-        print("="*80)
-        print(f"\n📁 Revisa tu archivo en:")
-        print(f"   {ruta_completa_salida}")
-        print(f"\n📊 Estadísticas rápidas:")
-        print(f"   • Registros totales: {len(resultado)}")
-        print(f"   • Llaves únicas: {resultado['llave'].nunique()}")
-        print(f"   • Columnas: {len(resultado.columns)}")
+        logger.info("\n" + "="*80)
+        logger.info("🎉 ¡PROCESO COMPLETADO CON ÉXITO, PARCERO! 🎉")
+        logger.info("="*80)
+        logger.info(f"\n📁 Revisa tu archivo en:")
+        logger.info(f"   {ruta_completa_salida}")
+        logger.info(f"\n📊 Estadísticas rápidas:")
+        logger.info(f"   • Registros totales: {len(resultado)}")
+        logger.info(f"   • Llaves únicas: {resultado['llave'].nunique()}")
+        logger.info(f"   • Columnas: {len(resultado.columns)}")
     else:
-        print("\n❌ El proceso falló. Revisa los errores arriba.")
+        logger.error("\n❌ El proceso falló. Revisa los errores arriba.")
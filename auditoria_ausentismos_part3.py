@@ -1,7 +1,13 @@
 import pandas as pd
+import numpy as np
 import os
 import logging
 from datetime import datetime
+from motor_fechas import parsear_fechas, resumen_fechas
+from registro import diagnostico_activo, FiltroNivel
+from intercambio import guardar_paso, leer_paso, ruta_lectura, DESDE_MODULO, tomar_de_modulo
+from indice_cie10 import normalizar_codigo, buscar_codigos, cruzar_con_tabla, EXACTO
+from compilar_cie10 import cargar_tabla_cie10
 
 # ===== CONFIGURACIÓN DE LOGGING =====
 logging.basicConfig(
@@ -13,6 +19,10 @@ logging.basicConfig(
     ]
 )
 logger = logging.getLogger(__name__)
+# El archivo de log sigue el nivel de la auditoría vigente en el hilo que ejecuta el paso
+# (AUDITORIA_NIVEL_LOG, por defecto INFO, o el elegido en la sesión de app.py)
+logger.setLevel(logging.DEBUG)
+logger.addFilter(FiltroNivel())
 
 # ===== CONFIGURACIÓN DE RUTAS =====
 # Archivos de entrada
@@ -24,21 +34,100 @@ directorio_salida = r"C:\Users\jjbustos\OneDrive - Grupo Jerónimo Martins\Docum
 archivo_final = "ausentismos_completo_con_cie10.csv"
 ruta_completa_salida = os.path.join(directorio_salida, archivo_final)
 
+# ===== BÚSQUEDA EN CIE 10 =====
+# 'exacto' (como siempre), 'categoria' (J00X → J00) o 'prefijo' (el prefijo más largo de
+# la tabla, sin bajar de la categoría). Variable de entorno AUDITORIA_CIE10_RESPALDO
+respaldo_cie10 = os.environ.get('AUDITORIA_CIE10_RESPALDO', EXACTO).lower()
+
 # ===== FILTRO DE 17 CÓDIGOS =====
 CODIGOS_FILTRO = [
     '203', '202', '216', '215', '210', '220', '201', '200', 
     '188', '235', '383', '233', '251', '231', '232', '250', '230'
 ]
 
-
-def procesar_todo():
-    """Función principal que ejecuta todo el proceso"""
+# ===== ALERTA DIAGNÓSTICO =====
+ALERTA_DIAGNOSTICO = 'ALERTA DIAGNOSTICO'
+# Textos que cuentan como código vacío (ya sin espacios y en minúsculas)
+TEXTOS_VACIOS = ['', 'nan', 'none', 'nat', 'null']
+
+# ===== VALIDACIONES VECTORIZADAS =====
+# Cada validación recibe el DataFrame y una columna y devuelve un arreglo booleano por
+# fila; el texto de cada valor distinto se calcula una sola vez (str(valor).strip(),
+# como se comparaban fila por fila)
+def _texto_por_valor(serie):
+    """
+    Returns:
+        tuple: (unicos, textos, grupo) → valores distintos, su str(valor).strip() y el
+               valor distinto de cada fila
+    """
+    grupo, unicos = pd.factorize(serie, use_na_sentinel=False)
+    unicos = np.asarray(unicos, dtype=object)
+    textos = pd.Series([str(valor) for valor in unicos], dtype=object).str.strip()
+    return unicos, textos, grupo
+
+def codigo_vacio(df, columna):
+    """
+    Filas sin código: vacío, NaN o un texto de vacío ('nan', 'None', 'NaT', 'null');
+    si la columna no existe, todas
+    """
+    if columna not in df.columns:
+        return np.ones(len(df), dtype=bool)
+    _, textos, grupo = _texto_por_valor(df[columna])
+    return textos.str.lower().isin(TEXTOS_VACIOS).to_numpy(dtype=bool)[grupo]
+
+def sin_coincidencia(df, columna):
+    """
+    Filas sin valor del cruce: NaN o texto vacío; si la columna no existe, todas
+    """
+    if columna not in df.columns:
+        return np.ones(len(df), dtype=bool)
+    unicos, textos, grupo = _texto_por_valor(df[columna])
+    return (pd.isna(unicos) | (textos == '').to_numpy(dtype=bool))[grupo]
+
+def alerta_diagnostico(df):
+    """
+    Columna alerta_diagnostico: ALERTA DIAGNOSTICO si el registro no tiene código de
+    diagnóstico o su código no se encontró en CIE-10; '' si sí
+    """
+    alerta = codigo_vacio(df, 'descripcion_general_external_code') | sin_coincidencia(df, 'cie10_codigo')
+    return pd.Series(np.where(alerta, ALERTA_DIAGNOSTICO, ''), index=df.index, name='alerta_diagnostico')
+
+
+def procesar_todo(ruta_relacion_laboral=DESDE_MODULO, ruta_cie10=DESDE_MODULO,
+                  directorio_salida=DESDE_MODULO, ruta_completa_salida=DESDE_MODULO,
+                  respaldo_cie10=DESDE_MODULO):
+    """
+    Función principal que ejecuta todo el proceso
+
+    No modifica variables del módulo; los parámetros que no se pasan se toman de
+    la configuración de arriba.
+
+    Args:
+        ruta_relacion_laboral: CSV del paso 2 o el DataFrame que devolvió ese paso
+        ruta_cie10: Excel CIE 10
+        directorio_salida: Carpeta para ALERTA_DIAGNOSTICO.xlsx (None = no se genera)
+        ruta_completa_salida: CSV de salida (None = no se guarda en disco)
+        respaldo_cie10: Búsqueda de los códigos que no están tal cual en CIE 10
+                        ('exacto', 'categoria' o 'prefijo')
+
+    Returns:
+        DataFrame final (o None si hubo error)
+    """
+    ruta_relacion_laboral, ruta_cie10, directorio_salida, ruta_completa_salida, respaldo_cie10 = tomar_de_modulo(
+        globals(),
+        ruta_relacion_laboral=ruta_relacion_laboral,
+        ruta_cie10=ruta_cie10,
+        directorio_salida=directorio_salida,
+        ruta_completa_salida=ruta_completa_salida,
+        respaldo_cie10=respaldo_cie10,
+    )
+    en_memoria = isinstance(ruta_relacion_laboral, pd.DataFrame)
 
     logger.info("=" * 80)
     logger.info("INICIO DEL PROCESO COMPLETO: AUDITORÍA AUSENTISMOS")
     logger.info("=" * 80)
     logger.debug(f"Directorio de trabajo actual: {os.getcwd()}")
-    logger.debug(f"Ruta relación laboral: {ruta_relacion_laboral}")
+    logger.debug(f"Ruta relación laboral: {'(DataFrame en memoria)' if en_memoria else ruta_relacion_laboral}")
     logger.debug(f"Ruta CIE10: {ruta_cie10}")
     logger.debug(f"Directorio salida: {directorio_salida}")
 
@@ -55,15 +144,17 @@ def procesar_todo():
         
         print("\n[1.1] Leyendo Relación Laboral...")
         logger.info("[1.1] Iniciando lectura de Relación Laboral...")
-        logger.debug(f"Verificando existencia del archivo: {os.path.exists(ruta_relacion_laboral)}")
-        logger.debug(f"Ruta absoluta: {os.path.abspath(ruta_relacion_laboral)}")
+        if not en_memoria:
+            logger.debug(f"Verificando existencia del archivo: {os.path.exists(ruta_lectura(ruta_relacion_laboral))}")
+            logger.debug(f"Ruta absoluta: {os.path.abspath(ruta_relacion_laboral)}")
 
-        df_relacion = pd.read_csv(ruta_relacion_laboral, encoding='utf-8-sig', dtype=str)
+        df_relacion = leer_paso(ruta_relacion_laboral, encoding='utf-8-sig', dtype=str)
         logger.info(f"✅ Archivo leído exitosamente")
         logger.info(f"Registros iniciales: {len(df_relacion)}")
         logger.info(f"Columnas totales: {len(df_relacion.columns)}")
-        logger.debug(f"Columnas disponibles: {list(df_relacion.columns)}")
-        logger.debug(f"Primeras 2 filas:\n{df_relacion.head(2)}")
+        if diagnostico_activo(logger):
+            logger.debug(f"Columnas disponibles: {list(df_relacion.columns)}")
+            logger.debug(f"Primeras 2 filas:\n{df_relacion.head(2)}")
 
         print(f"      Registros iniciales: {len(df_relacion)}")
         print(f"      Columnas totales: {len(df_relacion.columns)}")
@@ -73,13 +164,13 @@ def procesar_todo():
             print("\n[1.1.1] Normalizando columna 'last_approval_status_date' a formato DD/MM/YYYY...")
             logger.info("Procesando columna last_approval_status_date (equivalente a 'Modificado el')")
             try:
-                # Intentar parsear la fecha con diferentes formatos
-                df_relacion['last_approval_status_date'] = pd.to_datetime(
+                # Formato dominante inferido una vez; respaldo con día primero solo para los que no encajan
+                fechas = parsear_fechas(
                     df_relacion['last_approval_status_date'],
-                    errors='coerce',  # Valores inválidos se vuelven NaT
-                    dayfirst=True,    # CRÍTICO: día primero para formato DD/MM/YYYY
-                    format='mixed'    # Permite formatos mixtos
+                    'last_approval_status_date'
                 )
+                df_relacion['last_approval_status_date'] = fechas
+                logger.info(resumen_fechas(fechas))
                 # Convertir a formato DD/MM/YYYY
                 df_relacion['last_approval_status_date'] = df_relacion['last_approval_status_date'].dt.strftime('%d/%m/%Y')
                 # Reemplazar NaT con string vacío
@@ -110,16 +201,17 @@ def procesar_todo():
             print(f"      Columnas disponibles: {list(df_relacion.columns)}")
             return None
 
-        # DIAGNÓSTICO: Mostrar valores únicos ANTES del filtro
-        print(f"\n[1.2.1] DIAGNÓSTICO: Analizando valores en columna 'homologacion_clase_de_ausentismo_ssf_vs_sap'...")
-        valores_unicos_raw = df_relacion['homologacion_clase_de_ausentismo_ssf_vs_sap'].unique()
-        print(f"      Total de valores únicos: {len(valores_unicos_raw)}")
-        print(f"      Primeros 20 valores encontrados en el archivo:")
-        for i, val in enumerate(valores_unicos_raw[:20], 1):
-            count = (df_relacion['homologacion_clase_de_ausentismo_ssf_vs_sap'] == val).sum()
-            print(f"         {i:2d}. '{val}' ({count:,} registros)")
+        # DIAGNÓSTICO: Mostrar valores únicos ANTES del filtro (solo en nivel DEBUG)
+        if diagnostico_activo(logger):
+            print(f"\n[1.2.1] DIAGNÓSTICO: Analizando valores en columna 'homologacion_clase_de_ausentismo_ssf_vs_sap'...")
+            valores_unicos_raw = df_relacion['homologacion_clase_de_ausentismo_ssf_vs_sap'].unique()
+            print(f"      Total de valores únicos: {len(valores_unicos_raw)}")
+            print(f"      Primeros 20 valores encontrados en el archivo:")
+            for i, val in enumerate(valores_unicos_raw[:20], 1):
+                count = (df_relacion['homologacion_clase_de_ausentismo_ssf_vs_sap'] == val).sum()
+                print(f"         {i:2d}. '{val}' ({count:,} registros)")
 
-        logger.debug(f"Valores únicos antes del filtro: {valores_unicos_raw[:30]}")
+            logger.debug(f"Valores únicos antes del filtro: {valores_unicos_raw[:30]}")
 
         # Limpiar y filtrar
         antes = len(df_relacion)
@@ -176,11 +268,14 @@ def procesar_todo():
         logger.debug(f"Verificando existencia del archivo CIE10: {os.path.exists(ruta_cie10)}")
         logger.debug(f"Ruta absoluta CIE10: {os.path.abspath(ruta_cie10)}")
 
-        df_cie10 = pd.read_excel(ruta_cie10, dtype=str)
+        # Solo las columnas usadas en el merge (como texto), desde el CIE-10 compilado
+        # (se vuelve a compilar solo si cambió el Excel)
+        df_cie10, indice_cie10 = cargar_tabla_cie10(ruta_cie10, columnas=['Código', 'Descripción', 'TIPO', 'Clasificación Sistemas JMC'])
         logger.info(f"✅ CIE 10 leído exitosamente")
         logger.info(f"Registros CIE10: {len(df_cie10)}")
-        logger.debug(f"Columnas CIE10: {list(df_cie10.columns)}")
-        logger.debug(f"Primeras 2 filas CIE10:\n{df_cie10.head(2)}")
+        if diagnostico_activo(logger):
+            logger.debug(f"Columnas CIE10: {list(df_cie10.columns)}")
+            logger.debug(f"Primeras 2 filas CIE10:\n{df_cie10.head(2)}")
 
         print(f"      Registros: {len(df_cie10)}")
 
@@ -205,15 +300,17 @@ def procesar_todo():
             print("\n[2.2] Realizando merge LEFT con CIE 10...")
             logger.info("[2.2] Realizando merge LEFT con CIE 10...")
 
-            # Limpiar código: quitar asteriscos, espacios y convertir a mayúsculas
-            df_relacion['codigo_clean'] = df_relacion['descripcion_general_external_code'].str.strip().str.replace('*', '', regex=False).str.upper()
-            df_cie10_subset['Código_clean'] = df_cie10_subset['Código'].str.strip().str.replace('*', '', regex=False).str.upper()
+            # Limpiar código: quitar asteriscos, espacios y convertir a mayúsculas; la
+            # tabla ya viene indexada por código limpio y cada código distinto se busca una vez
+            codigo_clean = normalizar_codigo(df_relacion['descripcion_general_external_code'])
+            codigos_indice = indice_cie10['codigos'].dropna()
 
-            logger.debug(f"Códigos limpiados en relacion_laboral (primeros 10): {df_relacion['codigo_clean'].dropna().unique()[:10]}")
-            logger.debug(f"Códigos limpiados en CIE10 (primeros 10): {df_cie10_subset['Código_clean'].dropna().unique()[:10]}")
+            if diagnostico_activo(logger):
+                logger.debug(f"Códigos limpiados en relacion_laboral (primeros 10): {codigo_clean.dropna().unique()[:10]}")
+                logger.debug(f"Códigos limpiados en CIE10 (primeros 10): {codigos_indice.to_numpy()[:10]}")
 
-            codigos_base = set(df_relacion['codigo_clean'].dropna())
-            codigos_cie10 = set(df_cie10_subset['Código_clean'].dropna())
+            codigos_base = set(codigo_clean.dropna())
+            codigos_cie10 = set(codigos_indice)
             coincidencias_cie = codigos_base.intersection(codigos_cie10)
 
             logger.info(f"Total códigos únicos en relación laboral: {len(codigos_base)}")
@@ -222,16 +319,22 @@ def procesar_todo():
             logger.debug(f"Ejemplos de coincidencias: {list(coincidencias_cie)[:10]}")
 
             print(f"      Coincidencias: {len(coincidencias_cie)}/{len(codigos_base)} ({(len(coincidencias_cie)/len(codigos_base)*100):.1f}%)")
-            
-            logger.debug("Ejecutando pd.merge...")
-            df_final = pd.merge(
-                df_relacion,
-                df_cie10_subset,
-                left_on='codigo_clean',
-                right_on='Código_clean',
-                how='left',
-                suffixes=('', '_cie10')
-            )
+
+            logger.debug(f"Buscando códigos en el índice CIE 10 (modo: {respaldo_cie10})...")
+            posiciones, nivel = buscar_codigos(indice_cie10, codigo_clean, respaldo_cie10)
+            if respaldo_cie10 != EXACTO:
+                por_respaldo = set(codigo_clean[nivel == respaldo_cie10])
+                logger.info(f"Códigos encontrados por {respaldo_cie10}: {len(por_respaldo)}")
+                print(f"      Códigos encontrados por {respaldo_cie10}: {len(por_respaldo)}")
+
+            # Con respaldo, cada registro indica cómo se encontró su código (exacto,
+            # categoria, prefijo o vacío si no se encontró)
+            df_izquierda = df_relacion
+            if respaldo_cie10 != EXACTO:
+                df_izquierda = df_relacion.assign(cie10_coincidencia=nivel)
+
+            # Merge LEFT resuelto con el índice (mismas filas y columnas que pd.merge)
+            df_final = cruzar_con_tabla(df_izquierda, posiciones, indice_cie10, df_cie10_subset)
             logger.info(f"✅ Merge completado. Registros resultantes: {len(df_final)}")
             logger.debug(f"Columnas después del merge: {list(df_final.columns)}")
 
@@ -245,12 +348,6 @@ def procesar_todo():
             df_final = df_final.rename(columns={col: renombrado.get(col, col) for col in df_final.columns if col in renombrado})
             logger.debug("Columnas CIE 10 renombradas correctamente")
 
-            # Limpiar columnas temporales
-            df_final = df_final.drop(['codigo_clean'], axis=1)
-            if 'Código_clean' in df_final.columns:
-                df_final = df_final.drop(['Código_clean'], axis=1)
-            logger.debug("Columnas temporales eliminadas")
-
             registros_con_cie10 = df_final['cie10_codigo'].notna().sum() if 'cie10_codigo' in df_final.columns else 0
             logger.info(f"Registros con CIE 10: {registros_con_cie10} ({(registros_con_cie10/len(df_final)*100):.1f}%)")
             print(f"      ✅ Registros con CIE 10: {registros_con_cie10} ({(registros_con_cie10/len(df_final)*100):.1f}%)")
@@ -261,29 +358,15 @@ def procesar_todo():
         print("\n[2.3] Creando columna ALERTA_DIAGNOSTICO...")
         print("      Validando códigos de diagnóstico vs CIE-10...")
         
-        def validar_diagnostico_final(row):
-            codigo_diag = str(row['descripcion_general_external_code']).strip() if 'descripcion_general_external_code' in row else ''
-            tiene_cie10 = pd.notna(row.get('cie10_codigo', None)) and str(row.get('cie10_codigo', '')).strip() != ''
-            
-            # Si NO tiene código de diagnóstico → ALERTA
-            if codigo_diag == '' or codigo_diag.lower() in ['nan', 'none', 'nat', 'null']:
-                return 'ALERTA DIAGNOSTICO'
-            
-            # Si tiene código PERO NO hizo match con CIE-10 → ALERTA
-            if not tiene_cie10:
-                return 'ALERTA DIAGNOSTICO'
-            
-            # Si tiene código Y sí hizo match con CIE-10 → OK (sin alerta)
-            return ''
-        
-        df_final['alerta_diagnostico'] = df_final.apply(validar_diagnostico_final, axis=1)
-        alertas = (df_final['alerta_diagnostico'] == 'ALERTA DIAGNOSTICO').sum()
+        # Vectorizado: sin código o sin coincidencia en CIE-10 → ALERTA
+        df_final['alerta_diagnostico'] = alerta_diagnostico(df_final)
+        alertas = (df_final['alerta_diagnostico'] == ALERTA_DIAGNOSTICO).sum()
         total = len(df_final)
         print(f"      ✅ Alertas generadas: {alertas} de {total} ({(alertas/total*100):.1f}%)")
         
         if alertas > 0:
             print(f"      📋 Muestra de 3 registros con alerta:")
-            df_con_alerta = df_final[df_final['alerta_diagnostico'] == 'ALERTA DIAGNOSTICO']
+            df_con_alerta = df_final[df_final['alerta_diagnostico'] == ALERTA_DIAGNOSTICO]
             cols_mostrar = ['descripcion_general_external_code', 'cie10_codigo']
             if 'external_name_label' in df_final.columns:
                 cols_mostrar.insert(0, 'external_name_label')
@@ -295,9 +378,11 @@ def procesar_todo():
         print("\n[2.4] Generando Excel de ALERTA_DIAGNOSTICO...")
         
         if 'alerta_diagnostico' in df_final.columns:
-            df_alertas = df_final[df_final['alerta_diagnostico'] == 'ALERTA DIAGNOSTICO'].copy()
+            df_alertas = df_final[df_final['alerta_diagnostico'] == ALERTA_DIAGNOSTICO].copy()
             
-            if len(df_alertas) > 0:
+            if len(df_alertas) > 0 and directorio_salida is None:
+                print(f"      ℹ️  {len(df_alertas)} registros con alerta (sin directorio de salida, no se genera Excel)")
+            elif len(df_alertas) > 0:
                 archivo_alertas = os.path.join(directorio_salida, "ALERTA_DIAGNOSTICO.xlsx")
                 df_alertas.to_excel(archivo_alertas, index=False, engine='openpyxl')
                 print(f"      ✅ Excel generado: {len(df_alertas)} registros con alerta")
@@ -316,15 +401,15 @@ def procesar_todo():
         logger.debug(f"Directorio de salida: {directorio_salida}")
         logger.debug(f"Ruta completa de salida: {ruta_completa_salida}")
 
-        if not os.path.exists(directorio_salida):
+        if directorio_salida and not os.path.exists(directorio_salida):
             logger.warning(f"Directorio de salida no existe. Creándolo: {directorio_salida}")
             os.makedirs(directorio_salida)
             logger.info("✅ Directorio de salida creado")
 
-        logger.info("Guardando archivo CSV...")
-        df_final.to_csv(ruta_completa_salida, index=False, encoding='utf-8-sig', quoting=1, lineterminator='\n')
-        logger.info(f"✅ Archivo CSV guardado exitosamente")
-        logger.debug(f"Tamaño del archivo: {os.path.getsize(ruta_completa_salida)} bytes")
+        for ruta_guardada in guardar_paso(df_final, ruta_completa_salida, index=False, encoding='utf-8-sig',
+                                          quoting=1, lineterminator='\n'):
+            logger.info(f"✅ Archivo guardado exitosamente: {os.path.basename(ruta_guardada)}")
+            logger.debug(f"Tamaño del archivo: {os.path.getsize(ruta_guardada)} bytes")
 
         registros_con_cie10 = df_final['cie10_codigo'].notna().sum() if 'cie10_codigo' in df_final.columns else 0
 
@@ -379,7 +464,7 @@ if __name__ == "__main__":
     logger.info("Verificando archivos de entrada...")
 
     archivos = {
-        "Relación Laboral": ruta_relacion_laboral,
+        "Relación Laboral": ruta_lectura(ruta_relacion_laboral),
         "CIE 10": ruta_cie10
     }
 
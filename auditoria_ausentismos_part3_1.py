@@ -16,6 +16,11 @@ import pandas as pd
 import os
 import calendar
 from datetime import date
+from motor_fechas import parsear_fechas, resumen_fechas
+from registro import obtener_logger, diagnostico_activo
+from intercambio import guardar_paso, leer_paso, ruta_lectura, DESDE_MODULO, tomar_de_modulo
+
+logger = obtener_logger(__name__)
 
 # ============================================================================
 # CONFIGURACIÓN GLOBAL
@@ -35,7 +40,9 @@ start_date_fin = None       # date object (opcional)
 # FUNCIÓN PRINCIPAL
 # ============================================================================
 
-def aplicar_prefiltrado():
+def aplicar_prefiltrado(ruta_entrada=DESDE_MODULO, ruta_salida=DESDE_MODULO,
+                        fecha_ultima_inicio=DESDE_MODULO, fecha_ultima_fin=DESDE_MODULO,
+                        start_date_inicio=DESDE_MODULO, start_date_fin=DESDE_MODULO):
     """
     Aplica el pre-filtrado de 5 pasos para preparar datos para análisis de 30 días.
 
@@ -46,53 +53,74 @@ def aplicar_prefiltrado():
     4. Filtrar por start_date (rango seleccionado por usuario)
     5. Ordenar: id_personal (asc), start_date (desc)
 
+    Los parámetros que no se pasan se toman de la configuración del módulo
+    (no se modifica ninguna variable global).
+
+    Args:
+        ruta_entrada: CSV del paso 3 o el DataFrame que devolvió ese paso
+        ruta_salida: CSV de salida (None = no se guarda en disco)
+        fecha_ultima_inicio, fecha_ultima_fin: Rango de last_approval_status_date (None = sin filtros)
+        start_date_inicio, start_date_fin: Rango de start_date (opcionales)
+
     Returns:
         DataFrame filtrado o None si hay error
     """
-
-    print("=" * 80)
-    print("PRE-FILTRADO PARA ANÁLISIS DE 30 DÍAS")
-    print("=" * 80)
+    (ruta_entrada, ruta_salida, fecha_ultima_inicio, fecha_ultima_fin,
+     start_date_inicio, start_date_fin) = tomar_de_modulo(
+        globals(),
+        ruta_entrada=ruta_entrada,
+        ruta_salida=ruta_salida,
+        fecha_ultima_inicio=fecha_ultima_inicio,
+        fecha_ultima_fin=fecha_ultima_fin,
+        start_date_inicio=start_date_inicio,
+        start_date_fin=start_date_fin,
+    )
+    en_memoria = isinstance(ruta_entrada, pd.DataFrame)
+
+    logger.info("=" * 80)
+    logger.info("PRE-FILTRADO PARA ANÁLISIS DE 30 DÍAS")
+    logger.info("=" * 80)
 
     # Validar configuración
-    if not ruta_entrada:
-        print("❌ ERROR: ruta_entrada no está configurada")
+    if not en_memoria and not ruta_entrada:
+        logger.error("❌ ERROR: ruta_entrada no está configurada")
         return None
 
-    if not os.path.exists(ruta_entrada):
-        print(f"❌ ERROR: No se encuentra el archivo: {ruta_entrada}")
+    if not en_memoria and not os.path.exists(ruta_lectura(ruta_entrada)):
+        logger.error(f"❌ ERROR: No se encuentra el archivo: {ruta_entrada}")
         return None
 
-    if not ruta_salida:
-        print("❌ ERROR: ruta_salida no está configurada")
+    if ruta_salida is not None and not ruta_salida:
+        logger.error("❌ ERROR: ruta_salida no está configurada")
         return None
 
     # Modo con o sin filtros
     modo_sin_filtros = (fecha_ultima_inicio is None or fecha_ultima_fin is None)
 
     if modo_sin_filtros:
-        print("\n🔓 MODO SIN FILTROS: Se procesará TODO el archivo")
+        logger.info("\n🔓 MODO SIN FILTROS: Se procesará TODO el archivo")
         if start_date_inicio is not None or start_date_fin is not None:
-            print("   ⚠️ start_date fue informado pero se ignorará porque no hay rango completo de fecha_ultima")
+            logger.warning("   ⚠️ start_date fue informado pero se ignorará porque no hay rango completo de fecha_ultima")
     else:
-        print(f"\n🔒 MODO CON FILTROS:")
-        print(f"   • fecha_ultima: {fecha_ultima_inicio.strftime('%d/%m/%Y')} → {fecha_ultima_fin.strftime('%d/%m/%Y')}")
+        logger.info(f"\n🔒 MODO CON FILTROS:")
+        logger.info(f"   • fecha_ultima: {fecha_ultima_inicio.strftime('%d/%m/%Y')} → {fecha_ultima_fin.strftime('%d/%m/%Y')}")
         if start_date_inicio is not None:
-            print(f"   • start_date inicio (usuario): {start_date_inicio.strftime('%d/%m/%Y')}")
+            logger.info(f"   • start_date inicio (usuario): {start_date_inicio.strftime('%d/%m/%Y')}")
             if start_date_fin is not None:
-                print(f"   • start_date fin (usuario): {start_date_fin.strftime('%d/%m/%Y')}")
+                logger.info(f"   • start_date fin (usuario): {start_date_fin.strftime('%d/%m/%Y')}")
             else:
-                print("   • start_date fin (usuario): AUTO (fin de mes)")
+                logger.info("   • start_date fin (usuario): AUTO (fin de mes)")
         else:
-            print("   • start_date: AUTO por mes de fecha_ultima_inicio")
+            logger.info("   • start_date: AUTO por mes de fecha_ultima_inicio")
 
     try:
         # ========================================================================
         # LEER CSV COMPLETO
         # ========================================================================
-        print(f"\n📂 Leyendo archivo: {os.path.basename(ruta_entrada)}")
+        if not en_memoria:
+            logger.info(f"\n📂 Leyendo archivo: {os.path.basename(ruta_entrada)}")
 
-        df_completo = pd.read_csv(
+        df_completo = leer_paso(
             ruta_entrada,
             encoding='utf-8',
             sep=',',
@@ -102,221 +130,203 @@ def aplicar_prefiltrado():
         # Limpiar nombres de columnas
         df_completo.columns = df_completo.columns.str.strip().str.strip('"').str.strip("'")
 
-        print(f"✅ Registros totales: {len(df_completo):,}")
-        print(f"✅ Columnas: {len(df_completo.columns)}")
+        logger.info(f"✅ Registros totales: {len(df_completo):,}")
+        logger.info(f"✅ Columnas: {len(df_completo.columns)}")
 
         # Verificar columnas requeridas
         columnas_requeridas = ['id_personal', 'last_approval_status_date', 'start_date']
         columnas_faltantes = [col for col in columnas_requeridas if col not in df_completo.columns]
 
         if columnas_faltantes:
-            print(f"❌ ERROR: Faltan columnas requeridas: {columnas_faltantes}")
-            print(f"   Columnas disponibles: {list(df_completo.columns)}")
+            logger.error(f"❌ ERROR: Faltan columnas requeridas: {columnas_faltantes}")
+            logger.info(f"   Columnas disponibles: {list(df_completo.columns)}")
             return None
 
         # ========================================================================
         # CONVERTIR FECHAS
         # ========================================================================
-        print("\n📅 Convirtiendo fechas a formato datetime...")
+        logger.info("\n📅 Convirtiendo fechas a formato datetime...")
 
         # DEBUG: Mostrar valores RAW antes de convertir
-        print("\n🔍 DEBUG - Valores RAW ANTES de convertir (primeros 10):")
-        print("\n   last_approval_status_date:")
-        for i, val in enumerate(df_completo['last_approval_status_date'].head(10), 1):
-            print(f"      {i}. [{type(val).__name__}] '{val}'")
-
-        print("\n   start_date:")
-        for i, val in enumerate(df_completo['start_date'].head(10), 1):
-            print(f"      {i}. [{type(val).__name__}] '{val}'")
-
-        def convertir_fecha_flexible(serie):
-            """Convierte fechas intentando DD/MM/YYYY, luego YYYY-MM-DD y finalmente inferencia."""
-            serie_str = serie.astype(str).str.strip()
-
-            # 1) Formato DD/MM/YYYY
-            resultado = pd.to_datetime(serie_str, format='%d/%m/%Y', errors='coerce')
-
-            # 2) Fallback a YYYY-MM-DD para los que fallan
-            mask_na = resultado.isna()
-            if mask_na.any():
-                resultado_iso = pd.to_datetime(serie_str[mask_na], format='%Y-%m-%d', errors='coerce')
-                resultado.loc[mask_na] = resultado_iso
-
-            # 3) Inferencia final para casos mixtos (ej. 8/02/2025, timestamps, etc.)
-            mask_na = resultado.isna()
-            if mask_na.any():
-                resultado_auto = pd.to_datetime(serie_str[mask_na], dayfirst=True, errors='coerce')
-                resultado.loc[mask_na] = resultado_auto
-
-            return resultado
-
-        df_completo['last_approval_status_date'] = convertir_fecha_flexible(df_completo['last_approval_status_date'])
-        df_completo['start_date'] = convertir_fecha_flexible(df_completo['start_date'])
+        if diagnostico_activo(logger):
+            logger.debug("\n🔍 DEBUG - Valores RAW ANTES de convertir (primeros 10):")
+            logger.debug("\n   last_approval_status_date:")
+            for i, val in enumerate(df_completo['last_approval_status_date'].head(10), 1):
+                logger.debug(f"      {i}. [{type(val).__name__}] '{val}'")
+
+            logger.debug("\n   start_date:")
+            for i, val in enumerate(df_completo['start_date'].head(10), 1):
+                logger.debug(f"      {i}. [{type(val).__name__}] '{val}'")
+
+        # Motor de fechas: formato dominante (DD/MM/YYYY, YYYY-MM-DD, ...) inferido una vez,
+        # los demás formatos y la inferencia con día primero solo para los que no encajan
+        fechas_aprobacion = parsear_fechas(df_completo['last_approval_status_date'], 'last_approval_status_date')
+        fechas_inicio = parsear_fechas(df_completo['start_date'], 'start_date')
+        df_completo['last_approval_status_date'] = fechas_aprobacion
+        df_completo['start_date'] = fechas_inicio
+        logger.info(f"\n📅 {resumen_fechas(fechas_aprobacion)}")
+        logger.info(f"📅 {resumen_fechas(fechas_inicio)}")
 
         fechas_validas_ultima = df_completo['last_approval_status_date'].notna().sum()
         fechas_validas_start = df_completo['start_date'].notna().sum()
 
-        print(f"\n✅ Fechas válidas last_approval_status_date: {fechas_validas_ultima:,}")
-        print(f"✅ Fechas válidas start_date: {fechas_validas_start:,}")
+        logger.info(f"\n✅ Fechas válidas last_approval_status_date: {fechas_validas_ultima:,}")
+        logger.info(f"✅ Fechas válidas start_date: {fechas_validas_start:,}")
 
         # DEBUG: Si todas fallaron, mostrar por qué
         if fechas_validas_ultima == 0:
-            print(f"\n⚠️ ERROR CRÍTICO: TODAS las fechas last_approval_status_date fallaron en conversión")
-            print(f"   Valores únicos encontrados (primeros 5):")
+            logger.warning(f"\n⚠️ ERROR CRÍTICO: TODAS las fechas last_approval_status_date fallaron en conversión")
+            logger.info(f"   Valores únicos encontrados (primeros 5):")
             valores_unicos = df_completo['last_approval_status_date'].dropna().unique()[:5]
             for val in valores_unicos:
-                print(f"      '{val}'")
+                logger.info(f"      '{val}'")
 
         if fechas_validas_start == 0:
-            print(f"\n⚠️ ERROR CRÍTICO: TODAS las fechas start_date fallaron en conversión")
-            print(f"   Valores únicos encontrados (primeros 5):")
+            logger.warning(f"\n⚠️ ERROR CRÍTICO: TODAS las fechas start_date fallaron en conversión")
+            logger.info(f"   Valores únicos encontrados (primeros 5):")
             valores_unicos = df_completo['start_date'].dropna().unique()[:5]
             for val in valores_unicos:
-                print(f"      '{val}'")
+                logger.info(f"      '{val}'")
 
         # ========================================================================
         # DECIDIR SI APLICAR FILTROS O NO
         # ========================================================================
         if modo_sin_filtros:
             # SIN FILTROS: Solo ordenar
-            print("\n" + "=" * 80)
-            print("MODO SIN FILTROS: PROCESANDO TODO EL ARCHIVO")
-            print("=" * 80)
+            logger.info("\n" + "=" * 80)
+            logger.info("MODO SIN FILTROS: PROCESANDO TODO EL ARCHIVO")
+            logger.info("=" * 80)
 
             df_filtrado_final = df_completo.copy()
 
             # Solo ordenar
-            print(f"\n[ORDENAMIENTO] Ordenando registros...")
+            logger.info(f"\n[ORDENAMIENTO] Ordenando registros...")
             df_filtrado_final = df_filtrado_final.sort_values(
                 by=['id_personal', 'start_date'],
                 ascending=[True, False],
                 na_position='last'
             )
-            print(f"✅ Ordenado correctamente")
+            logger.info(f"✅ Ordenado correctamente")
 
         else:
             # CON FILTROS: Aplicar 5 pasos
-            print("\n" + "=" * 80)
-            print("MODO CON FILTROS: APLICANDO 5 PASOS")
-            print("=" * 80)
+            logger.info("\n" + "=" * 80)
+            logger.info("MODO CON FILTROS: APLICANDO 5 PASOS")
+            logger.info("=" * 80)
 
             # ========================================================================
             # PASO 1: FILTRAR POR LAST_APPROVAL_STATUS_DATE
             # ========================================================================
-            print(f"\n[PASO 1] Filtrando por last_approval_status_date...")
+            logger.info(f"\n[PASO 1] Filtrando por last_approval_status_date...")
 
             # DEBUG: Mostrar fechas disponibles en last_approval_status_date ANTES de filtrar
             fechas_validas_ultima = df_completo['last_approval_status_date'].dropna()
-            if len(fechas_validas_ultima) > 0:
+            if len(fechas_validas_ultima) == 0:
+                logger.warning(f"\n⚠️ ADVERTENCIA: No hay fechas last_approval_status_date válidas en el CSV")
+            elif diagnostico_activo(logger):
                 fecha_min_ultima = fechas_validas_ultima.min()
                 fecha_max_ultima = fechas_validas_ultima.max()
-                print(f"\n🔍 DEBUG - Fechas last_approval_status_date DISPONIBLES en el CSV:")
-                print(f"   • Mínima: {fecha_min_ultima.strftime('%d/%m/%Y')}")
-                print(f"   • Máxima: {fecha_max_ultima.strftime('%d/%m/%Y')}")
-                print(f"   • Total válidas: {len(fechas_validas_ultima):,}")
+                logger.debug(f"\n🔍 DEBUG - Fechas last_approval_status_date DISPONIBLES en el CSV:")
+                logger.debug(f"   • Mínima: {fecha_min_ultima.strftime('%d/%m/%Y')}")
+                logger.debug(f"   • Máxima: {fecha_max_ultima.strftime('%d/%m/%Y')}")
+                logger.debug(f"   • Total válidas: {len(fechas_validas_ultima):,}")
 
                 # Muestra de fechas
-                print(f"\n   📋 Muestra de fechas (primeras 10):")
+                logger.debug(f"\n   📋 Muestra de fechas (primeras 10):")
                 muestra = fechas_validas_ultima.head(10)
                 for i, fecha in enumerate(muestra, 1):
-                    print(f"      {i}. {fecha.strftime('%d/%m/%Y')}")
+                    logger.debug(f"      {i}. {fecha.strftime('%d/%m/%Y')}")
 
-                # Distribución por mes
-                df_temp = df_completo.copy()
-                df_temp['mes_ultima'] = df_temp['last_approval_status_date'].dt.to_period('M')
-                conteo_por_mes = df_temp['mes_ultima'].value_counts().head(10)
-                print(f"\n   📊 Registros por mes (top 10):")
+                # Distribución por mes (sobre la columna, sin copiar toda la base)
+                conteo_por_mes = fechas_validas_ultima.dt.to_period('M').value_counts().head(10)
+                logger.debug(f"\n   📊 Registros por mes (top 10):")
                 for mes, count in conteo_por_mes.items():
                     if pd.notna(mes):
-                        print(f"      {mes}: {count:,} registros")
-            else:
-                print(f"\n⚠️ ADVERTENCIA: No hay fechas last_approval_status_date válidas en el CSV")
+                        logger.debug(f"      {mes}: {count:,} registros")
 
-            print(f"\n   🎯 FILTRO QUE SE VA A APLICAR:")
-            print(f"   Rango: {fecha_ultima_inicio.strftime('%d/%m/%Y')} → {fecha_ultima_fin.strftime('%d/%m/%Y')}")
+            logger.info(f"\n   🎯 FILTRO QUE SE VA A APLICAR:")
+            logger.info(f"   Rango: {fecha_ultima_inicio.strftime('%d/%m/%Y')} → {fecha_ultima_fin.strftime('%d/%m/%Y')}")
 
             fu_inicio_dt = pd.to_datetime(fecha_ultima_inicio)
             fu_fin_dt = pd.to_datetime(fecha_ultima_fin)
 
-            print(f"\n   🔍 DEBUG - Valores datetime del filtro:")
-            print(f"   fu_inicio_dt: {fu_inicio_dt}")
-            print(f"   fu_fin_dt: {fu_fin_dt}")
+            logger.debug(f"\n   🔍 DEBUG - Valores datetime del filtro:")
+            logger.debug(f"   fu_inicio_dt: {fu_inicio_dt}")
+            logger.debug(f"   fu_fin_dt: {fu_fin_dt}")
 
             df_filtrado_fecha = df_completo[
                 (df_completo['last_approval_status_date'] >= fu_inicio_dt) &
                 (df_completo['last_approval_status_date'] <= fu_fin_dt)
             ].copy()
 
-            print(f"\n✅ Registros con fecha_ultima en rango: {len(df_filtrado_fecha):,}")
+            logger.info(f"\n✅ Registros con fecha_ultima en rango: {len(df_filtrado_fecha):,}")
 
             # DEBUG: Si queda en 0, mostrar por qué
             if len(df_filtrado_fecha) == 0:
-                print(f"\n⚠️ ADVERTENCIA: 0 registros después de filtrar por last_approval_status_date")
-                print(f"   Posibles causas:")
-                print(f"   1. No hay registros con last_approval_status_date en el rango {fecha_ultima_inicio.strftime('%d/%m/%Y')} → {fecha_ultima_fin.strftime('%d/%m/%Y')}")
-                print(f"   2. El rango de fechas seleccionado no coincide con los datos")
-                print(f"   3. Las fechas están en zona horaria diferente")
+                logger.warning(f"\n⚠️ ADVERTENCIA: 0 registros después de filtrar por last_approval_status_date")
+                logger.info(f"   Posibles causas:")
+                logger.info(f"   1. No hay registros con last_approval_status_date en el rango {fecha_ultima_inicio.strftime('%d/%m/%Y')} → {fecha_ultima_fin.strftime('%d/%m/%Y')}")
+                logger.info(f"   2. El rango de fechas seleccionado no coincide con los datos")
+                logger.info(f"   3. Las fechas están en zona horaria diferente")
 
                 # Verificar si hay fechas cercanas al rango
                 if len(fechas_validas_ultima) > 0:
                     # Contar cuántas fechas hay en el mes seleccionado
                     mes_inicio = pd.Period(fecha_ultima_inicio, freq='M')
-                    df_temp = df_completo.copy()
-                    df_temp['mes_ultima'] = df_temp['last_approval_status_date'].dt.to_period('M')
-                    registros_mes = (df_temp['mes_ultima'] == mes_inicio).sum()
-                    print(f"\n   📊 Registros en el mes {mes_inicio}: {registros_mes:,}")
+                    registros_mes = (fechas_validas_ultima.dt.to_period('M') == mes_inicio).sum()
+                    logger.info(f"\n   📊 Registros en el mes {mes_inicio}: {registros_mes:,}")
 
                     # Mostrar fechas más cercanas al inicio del rango
                     diferencia_dias = (df_completo['last_approval_status_date'] - fu_inicio_dt).abs()
                     indices_cercanos = diferencia_dias.nsmallest(5).index
-                    print(f"\n   📅 Fechas más cercanas a {fecha_ultima_inicio.strftime('%d/%m/%Y')}:")
+                    logger.info(f"\n   📅 Fechas más cercanas a {fecha_ultima_inicio.strftime('%d/%m/%Y')}:")
                     for idx in indices_cercanos:
                         fecha = df_completo.loc[idx, 'last_approval_status_date']
                         if pd.notna(fecha):
                             dias_diff = (fecha - fu_inicio_dt).days
-                            print(f"      {fecha.strftime('%d/%m/%Y')} (diferencia: {dias_diff} días)")
+                            logger.info(f"      {fecha.strftime('%d/%m/%Y')} (diferencia: {dias_diff} días)")
 
             # Si hay registros, mostrar muestra
-            elif len(df_filtrado_fecha) > 0:
-                print(f"\n   ✅ Muestra de registros filtrados (primeros 5):")
+            elif diagnostico_activo(logger):
+                logger.debug(f"\n   ✅ Muestra de registros filtrados (primeros 5):")
                 muestra_filtrada = df_filtrado_fecha['last_approval_status_date'].head(5)
                 for i, fecha in enumerate(muestra_filtrada, 1):
-                    print(f"      {i}. {fecha.strftime('%d/%m/%Y')}")
+                    logger.debug(f"      {i}. {fecha.strftime('%d/%m/%Y')}")
 
             # ========================================================================
             # PASO 2: EXTRAER IDs ÚNICOS
             # ========================================================================
-            print(f"\n[PASO 2] Extrayendo id_personal únicos...")
+            logger.info(f"\n[PASO 2] Extrayendo id_personal únicos...")
 
             ids_validos = df_filtrado_fecha['id_personal'].unique()
 
-            print(f"✅ IDs únicos: {len(ids_validos):,}")
+            logger.info(f"✅ IDs únicos: {len(ids_validos):,}")
 
             # ========================================================================
             # PASO 3: FILTRAR BASE COMPLETA POR ESOS IDs
             # ========================================================================
-            print(f"\n[PASO 3] Filtrando base completa por esos IDs...")
+            logger.info(f"\n[PASO 3] Filtrando base completa por esos IDs...")
 
             df_filtrado_ids = df_completo[df_completo['id_personal'].isin(ids_validos)].copy()
 
-            print(f"✅ Registros con esos IDs: {len(df_filtrado_ids):,}")
+            logger.info(f"✅ Registros con esos IDs: {len(df_filtrado_ids):,}")
 
             # DEBUG: Mostrar fechas disponibles en start_date
             fechas_validas_start = df_filtrado_ids['start_date'].dropna()
-            if len(fechas_validas_start) > 0:
+            if len(fechas_validas_start) == 0:
+                logger.warning(f"\n⚠️ ADVERTENCIA: No hay fechas start_date válidas en los datos filtrados")
+            elif diagnostico_activo(logger):
                 fecha_min_start = fechas_validas_start.min()
                 fecha_max_start = fechas_validas_start.max()
-                print(f"\n🔍 DEBUG - Fechas start_date disponibles:")
-                print(f"   • Mínima: {fecha_min_start.strftime('%d/%m/%Y')}")
-                print(f"   • Máxima: {fecha_max_start.strftime('%d/%m/%Y')}")
-                print(f"   • Total válidas: {len(fechas_validas_start):,}")
-            else:
-                print(f"\n⚠️ ADVERTENCIA: No hay fechas start_date válidas en los datos filtrados")
+                logger.debug(f"\n🔍 DEBUG - Fechas start_date disponibles:")
+                logger.debug(f"   • Mínima: {fecha_min_start.strftime('%d/%m/%Y')}")
+                logger.debug(f"   • Máxima: {fecha_max_start.strftime('%d/%m/%Y')}")
+                logger.debug(f"   • Total válidas: {len(fechas_validas_start):,}")
 
             # ========================================================================
             # PASO 4: FILTRAR POR START_DATE
             # ========================================================================
-            print(f"\n[PASO 4] Filtrando por start_date...")
+            logger.info(f"\n[PASO 4] Filtrando por start_date...")
 
             # Reglas:
             # - Si usuario define start_date_inicio: usar inicio de ese mes.
@@ -331,19 +341,19 @@ def aplicar_prefiltrado():
                     ultimo_dia = calendar.monthrange(start_date_inicio.year, start_date_inicio.month)[1]
                     ultimo_dia_mes = date(start_date_inicio.year, start_date_inicio.month, ultimo_dia)
 
-                print("   Origen de filtro start_date: selección de usuario")
+                logger.info("   Origen de filtro start_date: selección de usuario")
             else:
                 primer_dia_mes = date(fecha_ultima_inicio.year, fecha_ultima_inicio.month, 1)
                 ultimo_dia = calendar.monthrange(fecha_ultima_inicio.year, fecha_ultima_inicio.month)[1]
                 ultimo_dia_mes = date(fecha_ultima_inicio.year, fecha_ultima_inicio.month, ultimo_dia)
 
-                print("   Origen de filtro start_date: mes de fecha_ultima_inicio (fallback)")
+                logger.info("   Origen de filtro start_date: mes de fecha_ultima_inicio (fallback)")
 
             if ultimo_dia_mes < primer_dia_mes:
-                print("❌ ERROR: start_date_fin no puede ser menor que el inicio del mes seleccionado")
+                logger.error("❌ ERROR: start_date_fin no puede ser menor que el inicio del mes seleccionado")
                 return None
 
-            print(f"   Rango: {primer_dia_mes.strftime('%d/%m/%Y')} → {ultimo_dia_mes.strftime('%d/%m/%Y')}")
+            logger.info(f"   Rango: {primer_dia_mes.strftime('%d/%m/%Y')} → {ultimo_dia_mes.strftime('%d/%m/%Y')}")
 
             sd_inicio_dt = pd.to_datetime(primer_dia_mes)
             sd_fin_dt = pd.to_datetime(ultimo_dia_mes)
@@ -353,47 +363,47 @@ def aplicar_prefiltrado():
                 (df_filtrado_ids['start_date'] <= sd_fin_dt)
             ].copy()
 
-            print(f"✅ Registros con start_date en mes: {len(df_filtrado_final):,}")
+            logger.info(f"✅ Registros con start_date en mes: {len(df_filtrado_final):,}")
 
             # DEBUG: Si queda en 0, mostrar por qué
             if len(df_filtrado_final) == 0:
-                print(f"\n⚠️ ADVERTENCIA: 0 registros después de filtrar por start_date")
-                print(f"   Posibles causas:")
-                print(f"   1. No hay registros con start_date en {primer_dia_mes.strftime('%B %Y')}")
-                print(f"   2. Las fechas están en formato diferente")
-                print(f"   3. El mes seleccionado no tiene datos")
+                logger.warning(f"\n⚠️ ADVERTENCIA: 0 registros después de filtrar por start_date")
+                logger.info(f"   Posibles causas:")
+                logger.info(f"   1. No hay registros con start_date en {primer_dia_mes.strftime('%B %Y')}")
+                logger.info(f"   2. Las fechas están en formato diferente")
+                logger.info(f"   3. El mes seleccionado no tiene datos")
 
                 # Mostrar muestra de fechas que SÍ existen
                 if len(fechas_validas_start) > 0:
-                    print(f"\n   📋 Muestra de fechas start_date que SÍ existen:")
+                    logger.info(f"\n   📋 Muestra de fechas start_date que SÍ existen:")
                     muestra = fechas_validas_start.head(10)
                     for i, fecha in enumerate(muestra, 1):
-                        print(f"      {i}. {fecha.strftime('%d/%m/%Y')}")
+                        logger.info(f"      {i}. {fecha.strftime('%d/%m/%Y')}")
 
                     # Contar registros por mes
                     df_filtrado_ids['mes_start'] = df_filtrado_ids['start_date'].dt.to_period('M')
                     conteo_por_mes = df_filtrado_ids['mes_start'].value_counts().head(5)
-                    print(f"\n   📊 Registros por mes (top 5):")
+                    logger.info(f"\n   📊 Registros por mes (top 5):")
                     for mes, count in conteo_por_mes.items():
-                        print(f"      {mes}: {count:,} registros")
+                        logger.info(f"      {mes}: {count:,} registros")
                     df_filtrado_ids = df_filtrado_ids.drop('mes_start', axis=1)
 
             # ========================================================================
             # PASO 5: ORDENAR
             # ========================================================================
-            print(f"\n[PASO 5] Ordenando registros...")
+            logger.info(f"\n[PASO 5] Ordenando registros...")
 
             df_filtrado_final = df_filtrado_final.sort_values(
                 by=['id_personal', 'start_date'],
                 ascending=[True, False]  # id_personal menor→mayor, start_date reciente→antiguo
             )
 
-            print(f"✅ Ordenado correctamente")
+            logger.info(f"✅ Ordenado correctamente")
 
         # ========================================================================
         # CONVERTIR FECHAS DE VUELTA A STRING
         # ========================================================================
-        print(f"\n📅 Convirtiendo fechas de vuelta a formato DD/MM/YYYY...")
+        logger.info(f"\n📅 Convirtiendo fechas de vuelta a formato DD/MM/YYYY...")
 
         df_filtrado_final['last_approval_status_date'] = df_filtrado_final['last_approval_status_date'].dt.strftime('%d/%m/%Y')
         df_filtrado_final['start_date'] = df_filtrado_final['start_date'].dt.strftime('%d/%m/%Y')
@@ -412,9 +422,11 @@ def aplicar_prefiltrado():
         # ========================================================================
         # GUARDAR CSV FILTRADO
         # ========================================================================
-        print(f"\n💾 Guardando CSV filtrado...")
+        if ruta_salida is not None:
+            logger.info(f"\n💾 Guardando CSV filtrado...")
 
-        df_filtrado_final.to_csv(
+        guardar_paso(
+            df_filtrado_final,
             ruta_salida,
             index=False,
             encoding='utf-8',
@@ -422,45 +434,44 @@ def aplicar_prefiltrado():
             quoting=2  # QUOTE_NONNUMERIC
         )
 
-        print(f"✅ Guardado: {os.path.basename(ruta_salida)}")
+        if ruta_salida is not None:
+            logger.info(f"✅ Guardado: {os.path.basename(ruta_salida)}")
 
         # ========================================================================
         # RESUMEN FINAL
         # ========================================================================
-        print("\n" + "=" * 80)
-        print("RESUMEN DE PRE-FILTRADO")
-        print("=" * 80)
-        print(f"\n📊 Resultados:")
-        print(f"  • Registros iniciales: {len(df_completo):,}")
-        print(f"  • Registros finales: {len(df_filtrado_final):,}")
+        logger.info("\n" + "=" * 80)
+        logger.info("RESUMEN DE PRE-FILTRADO")
+        logger.info("=" * 80)
+        logger.info(f"\n📊 Resultados:")
+        logger.info(f"  • Registros iniciales: {len(df_completo):,}")
+        logger.info(f"  • Registros finales: {len(df_filtrado_final):,}")
 
         if modo_sin_filtros:
-            print(f"\n📋 Procesamiento aplicado:")
-            print(f"  ✅ Modo: SIN FILTROS (procesado completo)")
-            print(f"  ✅ Ordenamiento: id_personal (↑), start_date (↓)")
+            logger.info(f"\n📋 Procesamiento aplicado:")
+            logger.info(f"  ✅ Modo: SIN FILTROS (procesado completo)")
+            logger.info(f"  ✅ Ordenamiento: id_personal (↑), start_date (↓)")
         else:
-            print(f"  • Reducción: {len(df_completo) - len(df_filtrado_final):,} registros ({((len(df_completo) - len(df_filtrado_final)) / len(df_completo) * 100):.1f}%)")
-            print(f"\n📋 Filtros aplicados:")
-            print(f"  1. fecha_ultima: {fecha_ultima_inicio.strftime('%d/%m/%Y')} → {fecha_ultima_fin.strftime('%d/%m/%Y')}")
-            print(f"  2. IDs únicos extraídos: {len(ids_validos):,}")
-            print(f"  3. start_date: {primer_dia_mes.strftime('%d/%m/%Y')} → {ultimo_dia_mes.strftime('%d/%m/%Y')}")
-            print(f"  4. Ordenamiento: id_personal (↑), start_date (↓)")
+            logger.info(f"  • Reducción: {len(df_completo) - len(df_filtrado_final):,} registros ({((len(df_completo) - len(df_filtrado_final)) / len(df_completo) * 100):.1f}%)")
+            logger.info(f"\n📋 Filtros aplicados:")
+            logger.info(f"  1. fecha_ultima: {fecha_ultima_inicio.strftime('%d/%m/%Y')} → {fecha_ultima_fin.strftime('%d/%m/%Y')}")
+            logger.info(f"  2. IDs únicos extraídos: {len(ids_validos):,}")
+            logger.info(f"  3. start_date: {primer_dia_mes.strftime('%d/%m/%Y')} → {ultimo_dia_mes.strftime('%d/%m/%Y')}")
+            logger.info(f"  4. Ordenamiento: id_personal (↑), start_date (↓)")
 
-        print(f"\n✅ CSV listo para usar en auditoria_ausentismos_part4.py")
-        print("=" * 80)
+        logger.info(f"\n✅ CSV listo para usar en auditoria_ausentismos_part4.py")
+        logger.info("=" * 80)
 
         return df_filtrado_final
 
     except Exception as e:
-        print("\n" + "=" * 80)
-        print("❌ ERROR EN PRE-FILTRADO")
-        print("=" * 80)
-        print(f"\n🔴 Tipo de Error: {type(e).__name__}")
-        print(f"🔴 Mensaje: {str(e)}")
-        print("\n📍 TRACEBACK:")
-        import traceback
-        traceback.print_exc()
-        print("=" * 80)
+        logger.info("\n" + "=" * 80)
+        logger.error("❌ ERROR EN PRE-FILTRADO")
+        logger.info("=" * 80)
+        logger.error(f"\n🔴 Tipo de Error: {type(e).__name__}")
+        logger.error(f"🔴 Mensaje: {str(e)}")
+        logger.exception("\n📍 TRACEBACK:")
+        logger.info("=" * 80)
         return None
 
 
@@ -482,20 +493,20 @@ if __name__ == "__main__":
     start_date_inicio = date(2026, 1, 1)     # inicio mes seleccionado por usuario
     start_date_fin = None                     # None = fin de mes automático
 
-    print("Configuración:")
-    print(f"  Entrada: {ruta_entrada}")
-    print(f"  Salida: {ruta_salida}")
-    print(f"  Fecha última inicio: {fecha_ultima_inicio.strftime('%d/%m/%Y')}")
-    print(f"  Fecha última fin: {fecha_ultima_fin.strftime('%d/%m/%Y')}")
-    print(f"  Start date inicio: {start_date_inicio.strftime('%d/%m/%Y')}")
-    print()
+    logger.info("Configuración:")
+    logger.info(f"  Entrada: {ruta_entrada}")
+    logger.info(f"  Salida: {ruta_salida}")
+    logger.info(f"  Fecha última inicio: {fecha_ultima_inicio.strftime('%d/%m/%Y')}")
+    logger.info(f"  Fecha última fin: {fecha_ultima_fin.strftime('%d/%m/%Y')}")
+    logger.info(f"  Start date inicio: {start_date_inicio.strftime('%d/%m/%Y')}")
+    logger.info('')
 
     # Ejecutar pre-filtrado
     df_resultado = aplicar_prefiltrado()
 
     if df_resultado is not None:
-        print(f"\n✅ Pre-filtrado completado exitosamente")
-        print(f"   Usa el archivo: {ruta_salida}")
-        print(f"   Como entrada para: auditoria_ausentismos_part4.py")
+        logger.info(f"\n✅ Pre-filtrado completado exitosamente")
+        logger.info(f"   Usa el archivo: {ruta_salida}")
+        logger.info(f"   Como entrada para: auditoria_ausentismos_part4.py")
     else:
-        print("\n❌ Error en el pre-filtrado")
+        logger.error("\n❌ Error en el pre-filtrado")
@@ -10,6 +10,19 @@ Luego aplica análisis de 30 días con ponderación específica (25% por columna
 import pandas as pd
 import numpy as np
 import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from motor_fechas import parsear_fechas, resumen_fechas
+from registro import obtener_logger
+from intercambio import leer_paso, ruta_lectura, DESDE_MODULO, tomar_de_modulo
+from motor_ventanas import ubicar_ventanas
+from matriz_codigos import filas_de_codigos, similitud_ponderada
+from compilar_cie10 import cargar_matriz_codigos, matriz_de_columnas
+from seleccion_grupos import agrupar, seleccionar_por_grupo
+from estado_incremental import huella_configuracion, huellas_por_id, cargar_estado, guardar_estado
+
+logger = obtener_logger(__name__)
 
 # ============================================================================
 # CONFIGURACIÓN GLOBAL
@@ -23,6 +36,14 @@ ruta_salida_30dias = ""
 # Filtro opcional por fecha_ultima (last_approval_status_date)
 fecha_ultima_inicio = None
 fecha_ultima_fin = None
+# Procesos para el análisis 30 días (1 = todo en el proceso actual); también se
+# puede cambiar con la variable de entorno AUDITORIA_WORKERS
+workers = int(os.environ.get('AUDITORIA_WORKERS', '1'))
+# Carpeta con el estado de la ejecución anterior para recalcular solo los IDs cuyas filas
+# cambiaron (None = siempre se calcula todo); también con la variable de entorno AUDITORIA_ESTADO_PART4
+ruta_estado = os.environ.get('AUDITORIA_ESTADO_PART4') or None
+# True = ignora el estado guardado y recalcula todos los IDs (el estado se vuelve a guardar)
+reconstruir = os.environ.get('AUDITORIA_RECONSTRUIR', '0') == '1'
 
 # Códigos a excluir de registros únicos (con el 215)
 CODIGOS_EXCLUIR_UNICOS = [203, 202, 216, 210, 220, 201, 200, 383, 215]
@@ -41,83 +62,490 @@ COLUMNAS_PONDERADAS = {
 # Ventana de días para análisis
 VENTANA_DIAS = 30
 
+# Ventanas a calcular en una sola pasada: un entero (solo ese reporte) o una lista,
+# p. ej. [7, 15, 30, 60, 90] (un reporte por ventana, con el mismo ordenamiento)
+ventanas_dias = VENTANA_DIAS
+
 # Ruta al archivo de códigos en el repositorio
 RUTA_CODIGOS_CSV = "datos_numericos.csv"
 
+# ============================================================================
+# FUNCIONES AUXILIARES
+# ============================================================================
+
+def normalizar_texto(valor):
+    """Convierte valores mixtos a texto seguro para joins/comparaciones."""
+    if pd.isna(valor):
+        return ''
+    valor_str = str(valor).strip()
+    if valor_str.lower() in {'nan', 'none'}:
+        return ''
+    return valor_str
+
+def leer_tabla_codigos(ruta_codigos):
+    """Lee la matriz de códigos (datos_numericos.csv) con el Código normalizado."""
+    df_codigos = pd.read_csv(
+        ruta_codigos,
+        encoding='utf-8-sig',
+        dtype={'Código': 'string'}
+    )
+
+    # Eliminar columna porcentaje_relacion si existe
+    if 'porcentaje_relacion' in df_codigos.columns:
+        df_codigos = df_codigos.drop('porcentaje_relacion', axis=1)
+
+    df_codigos['Código'] = df_codigos['Código'].map(normalizar_texto)
+    return df_codigos
+
+def codigo_con_error(cod):
+    """Código vacío o con caracteres especiales (se marca error_codigo en el reporte)."""
+    # CORRECCIÓN: Verificar que cod no sea None y manejar casos especiales
+    cod_str = str(cod).strip() if cod is not None else ''
+    return not cod_str or '*' in cod_str or not cod_str.replace(' ', '').replace('.', '').isalnum()
+
+def _como_texto(valores, formato):
+    """Formatea cada valor distinto una sola vez y lo reparte (arreglo de objetos)."""
+    unicos, posiciones = np.unique(valores, return_inverse=True)
+    return np.array([formato(valor) for valor in unicos.tolist()], dtype=object)[posiciones.reshape(-1)]
+
+def _unir_por_grupo(piezas, limites, separador):
+    """Une las piezas de cada grupo (piezas[limites[i]:limites[i + 1]])."""
+    piezas = piezas.tolist()
+    limites = limites.tolist()
+    return [separador.join(piezas[a:b]) for a, b in zip(limites[:-1], limites[1:])]
+
+def _promedio_por_grupo(valores, limites):
+    """
+    np.mean de cada grupo (0.0 si está vacío) con el mismo redondeo: los grupos del
+    mismo tamaño se suman fila a fila como una matriz
+    """
+    cantidades = np.diff(limites)
+    promedios = np.zeros(len(cantidades), dtype=np.float64)
+    for cantidad in np.unique(cantidades[cantidades > 0]).tolist():
+        grupos = np.flatnonzero(cantidades == cantidad)
+        matriz = valores[limites[grupos][:, None] + np.arange(cantidad)]
+        promedios[grupos] = np.add.reduce(matriz, axis=1) / cantidad
+    return promedios
+
+def armar_textos_ventana(columnas, filas_ventana, limites, dias_ventana, en_tabla,
+                         porcentaje_ventana, ancla_en_tabla):
+    """
+    Arma los textos del reporte de todos los IDs por columnas: cada pieza se concatena
+    sobre arreglos completos y luego se une por ID (sin recorrer fila a fila)
+
+    Args:
+        columnas: dict con arreglos de objetos por fila del lote: 'codigo', 'etiqueta',
+                  'cie10', 'fecha' (start_date ya como DD/MM/YYYY) y 'error' (bool)
+        filas_ventana, limites: Ventanas de ubicar_ventanas
+        dias_ventana, en_tabla, porcentaje_ventana: Por cada fila de ventana
+        ancla_en_tabla: Por ID, si el código que choca está en la tabla
+
+    Returns:
+        dict columna del reporte → lista con un valor por ID
+    """
+    n_ids = len(limites) - 1
+    largo = np.diff(limites)
+    id_de_fila = np.repeat(np.arange(n_ids), largo)
+    cod = columnas['codigo'][filas_ventana]
+
+    # error_codigo solo se marca cuando el código que choca está en la tabla
+    con_error = columnas['error'][filas_ventana] & ancla_en_tabla[id_de_fila]
+    cierre = np.array([')(', ',error_codigo)('], dtype=object)[con_error.astype(np.int8)]
+    detalle = (cod + '(start:' + columnas['fecha'][filas_ventana] + ',dias:'
+               + _como_texto(dias_ventana, str) + cierre + columnas['etiqueta'][filas_ventana] + ')')
+
+    # PORCENTAJE PONDERADO ya calculado; error_codigo tiene prioridad sobre la tabla
+    comparacion = np.full(len(cod), ':N/A', dtype=object)
+    comparacion[en_tabla] = ':' + _como_texto(porcentaje_ventana[en_tabla], lambda p: f"{p:.1f}%")
+    comparacion[con_error] = ':error_codigo'
+    comparacion = cod + comparacion
+    con_porcentaje = en_tabla & ~con_error
+    porcentajes = _promedio_por_grupo(
+        porcentaje_ventana[con_porcentaje],
+        np.concatenate(([0], np.cumsum(con_porcentaje)))[limites]
+    )
+
+    # Descripción CIE-10 con formato |(DESCRIPCION)| solo si existe
+    cie10 = columnas['cie10'][filas_ventana]
+    con_cie10 = cie10 != ''
+    cie10 = '(' + cie10[con_cie10] + ')'
+
+    # Códigos distintos de cada ID en orden de aparición (sin vacíos)
+    posiciones_codigo, codigos_distintos = pd.factorize(cod)
+    clave = id_de_fila.astype(np.int64) * (len(codigos_distintos) + 1) + posiciones_codigo
+    primera = np.zeros(len(cod), dtype=bool)
+    primera[np.unique(clave, return_index=True)[1]] = True
+    primera &= cod != ''
+    limites_codigos = np.concatenate(([0], np.cumsum(primera)))[limites]
+
+    comparaciones = _unir_por_grupo(comparacion, limites, ' | ')
+    for i in np.flatnonzero((largo > 0) & ~ancla_en_tabla).tolist():
+        comparaciones[i] = 'Código que choca no encontrado en tabla'
+
+    return {
+        'todos_codigos': _unir_por_grupo(cod[primera], limites_codigos, ', '),
+        'detalle_codigos_con_fechas': _unir_por_grupo(detalle, limites, ' | '),
+        'cantidad_codigos': np.diff(limites_codigos).tolist(),
+        'comparaciones_detalle': comparaciones,
+        'porcentaje_relacion': np.round(porcentajes, 2).tolist(),
+        'cie10_descripcion': _unir_por_grupo(cie10, np.concatenate(([0], np.cumsum(con_cie10)))[limites], '|'),
+    }
+
+def analizar_lote(df_ausentismos, ids_lote, posiciones, indice_codigos, matriz_codigos, ventanas_dias, pesos):
+    """
+    Análisis de ventanas de días para un lote de IDs (todo el reporte o un lote de
+    un proceso en paralelo); todas las ventanas salen del mismo ordenamiento
+
+    Args:
+        df_ausentismos: Filas de los IDs del lote (fechas ya convertidas y textos normalizados)
+        ids_lote: IDs del lote, en el orden del reporte
+        posiciones: Posición de cada ID del lote en el reporte completo
+        indice_codigos, matriz_codigos: Resultado de construir_matriz_codigos
+        ventanas_dias: Lista de días de cada ventana
+        pesos: Peso de cada columna de la matriz
+
+    Returns:
+        tuple: (resultados, posiciones_resultado, omitidos, segundos)
+            resultados: dict días → filas del reporte (un dict por ID con datos)
+            posiciones_resultado: Posición en el reporte de cada fila de resultados
+            omitidos: Posiciones de los IDs sin datos
+    """
+    inicio = time.perf_counter()
+
+    # Un solo ordenamiento ubica el registro más reciente y la ventana de cada ID
+    # (antes se filtraba df_ausentismos completo una vez por empleado)
+    df_ausentismos = df_ausentismos.reset_index(drop=True)
+    anclas, ventanas = ubicar_ventanas(
+        ids_lote,
+        df_ausentismos['id_personal'],
+        df_ausentismos['start_date'],
+        df_ausentismos['last_approval_status_date'],
+        df_ausentismos['descripcion_general_external_code'],
+        ventanas_dias
+    )
+
+    # Columnas como listas: el armado por ID no vuelve a tocar el DataFrame
+    codigos = df_ausentismos['descripcion_general_external_code'].tolist()
+    etiquetas = df_ausentismos['external_name_label'].tolist()
+    start_dates = df_ausentismos['start_date'].tolist()
+    end_dates = df_ausentismos['end_date'].tolist()
+    fechas_aprobacion = df_ausentismos['last_approval_status_date'].tolist()
+
+    # Fila de la matriz de cada código (-1 si no está en la tabla) y fechas de inicio
+    fila_matriz = filas_de_codigos(indice_codigos, df_ausentismos['descripcion_general_external_code'])
+    ancla_en_tabla = (anclas >= 0) & (fila_matriz[anclas] >= 0)
+    fechas_inicio = df_ausentismos['start_date'].to_numpy()
+
+    # Columnas para armar los textos: fechas formateadas y error_codigo una vez por valor distinto
+    posicion_fecha, fechas_distintas = pd.factorize(df_ausentismos['start_date'])
+    posicion_codigo, codigos_distintos = pd.factorize(df_ausentismos['descripcion_general_external_code'])
+    columnas = {
+        'codigo': np.array(codigos, dtype=object),
+        'etiqueta': np.array(etiquetas, dtype=object),
+        'cie10': df_ausentismos['cie10_descripcion'].to_numpy(dtype=object),
+        'fecha': np.append(fechas_distintas.strftime('%d/%m/%Y').to_numpy(dtype=object), '')[posicion_fecha],
+        'error': np.array([codigo_con_error(cod) for cod in codigos_distintos] + [True])[posicion_codigo],
+    }
+
+    # IDs sin filas: no generan fila en ninguna ventana
+    posiciones = np.asarray(posiciones)
+    posiciones_resultado = posiciones[anclas >= 0]
+    omitidos = posiciones[anclas < 0]
+
+    resultados_por_ventana = {}
+    id_pers = None
+    try:
+        for dias, (filas_ventana, limites) in ventanas.items():
+            # Días transcurridos de cada fila de ventana respecto al start_date de su ancla
+            ancla_de_fila = np.repeat(anclas, np.diff(limites))
+            dias_ventana = (fechas_inicio[ancla_de_fila] - fechas_inicio[filas_ventana]) // np.timedelta64(1, 'D')
+
+            # PONDERACIÓN de todos los pares (ancla, fila de ventana) de una vez
+            fila_matriz_ancla = fila_matriz[ancla_de_fila]
+            fila_matriz_ventana = fila_matriz[filas_ventana]
+            en_tabla = (fila_matriz_ancla >= 0) & (fila_matriz_ventana >= 0)
+            porcentaje_ventana = np.zeros(len(filas_ventana), dtype=np.float64)
+            porcentaje_ventana[en_tabla] = similitud_ponderada(
+                matriz_codigos,
+                fila_matriz_ancla[en_tabla],
+                fila_matriz_ventana[en_tabla],
+                pesos
+            )
+
+            # Textos del reporte armados por columnas para todos los IDs del lote
+            textos = armar_textos_ventana(columnas, filas_ventana, limites, dias_ventana, en_tabla,
+                                          porcentaje_ventana, ancla_en_tabla)
+
+            resultados = []
+            resultados_por_ventana[dias] = resultados
+
+            for contador, (id_pers, ancla) in enumerate(zip(ids_lote, anclas.tolist())):
+                # PROTECCIÓN: Verificar que haya datos para este ID
+                if ancla < 0:
+                    continue
+
+                # Registro ancla: start_date más reciente; si hay empate, last_approval_status_date más reciente
+                fecha_aprobacion_maxima = fechas_aprobacion[ancla]
+                codigo_ultima_fecha = codigos[ancla]
+                start_date_ultimo = start_dates[ancla]
+                end_date_ultimo = end_dates[ancla]
+                external_label_ultimo = etiquetas[ancla]
+
+                # Calcular duración en días del código que choca
+                if pd.notna(end_date_ultimo) and pd.notna(start_date_ultimo):
+                    duracion_dias = (end_date_ultimo - start_date_ultimo).days + 1
+                else:
+                    duracion_dias = 0
+
+                # Crear tipo_concepto (el código que choca con todos)
+                tipo_concepto = f"{codigo_ultima_fecha}(start:{start_date_ultimo.strftime('%d/%m/%Y')},dias:{duracion_dias})({external_label_ultimo})"
+
+                # Guardar resultado (sin filas en la ventana los textos quedan vacíos y el porcentaje en 0)
+                resultados.append({
+                    'id_personal': id_pers,
+                    'fecha_ultima': fecha_aprobacion_maxima,  # Mantener como datetime
+                    'start_date': start_date_ultimo,  # Mantener como datetime
+                    'end_date': end_date_ultimo if pd.notna(end_date_ultimo) else pd.NaT,  # Mantener como datetime
+                    'codigo_ultima_fecha': codigo_ultima_fecha,
+                    'tipo_concepto': tipo_concepto,
+                    'todos_codigos': textos['todos_codigos'][contador],
+                    'detalle_codigos_con_fechas': textos['detalle_codigos_con_fechas'][contador],
+                    'cantidad_codigos': textos['cantidad_codigos'][contador],
+                    'comparaciones_detalle': textos['comparaciones_detalle'][contador],
+                    'porcentaje_relacion': textos['porcentaje_relacion'][contador],
+                    'cie10_descripcion': textos['cie10_descripcion'][contador]
+                })
+    except Exception as error:
+        # El id que falló llega al mensaje de error aunque el lote corra en otro proceso
+        error.id_personal = id_pers
+        raise
+
+    return resultados_por_ventana, posiciones_resultado.tolist(), omitidos.tolist(), time.perf_counter() - inicio
+
+def _ruta_reporte(ruta_salida_30dias, dias):
+    """
+    Ruta del reporte de una ventana: la de 30 días usa ruta_salida_30dias y las demás
+    cambian '30_dias' por '<dias>_dias' en el nombre (o lo agregan al final)
+    """
+    if ruta_salida_30dias is None or dias == VENTANA_DIAS:
+        return ruta_salida_30dias
+    carpeta, nombre = os.path.split(ruta_salida_30dias)
+    base, extension = os.path.splitext(nombre)
+    if f"{VENTANA_DIAS}_dias" in base:
+        base = base.replace(f"{VENTANA_DIAS}_dias", f"{dias}_dias")
+    else:
+        base = f"{base}_{dias}_dias"
+    return os.path.join(carpeta, base + extension)
+
+def _repartir_en_lotes(df_ausentismos, ids_filtrados, n_lotes):
+    """
+    Reparte los IDs en lotes por hash de id_personal (un ID siempre cae en el mismo
+    lote) y separa las filas de cada lote
+
+    Returns:
+        Lista de (df_lote, ids_lote, posiciones_lote) sin los lotes vacíos
+    """
+    lote_de_id = pd.util.hash_pandas_object(pd.Series(ids_filtrados), index=False).to_numpy() % n_lotes
+    posicion_de_fila = pd.Index(ids_filtrados).get_indexer(df_ausentismos['id_personal'])
+    lote_de_fila = np.where(posicion_de_fila >= 0, lote_de_id[posicion_de_fila], -1)
+    posiciones = np.arange(len(ids_filtrados))
+
+    lotes = []
+    for lote in range(n_lotes):
+        en_lote = lote_de_id == lote
+        if en_lote.any():
+            lotes.append((df_ausentismos[lote_de_fila == lote], ids_filtrados[en_lote], posiciones[en_lote]))
+    return lotes
+
+def _analizar_en_paralelo(lotes, indice_codigos, matriz_codigos, ventanas_dias, pesos, workers):
+    """
+    Ejecuta analizar_lote para cada lote en un ProcessPoolExecutor; cada proceso
+    recibe solo las filas de su lote y la matriz de códigos
+
+    Returns:
+        Lista de resultados de analizar_lote (mismo orden que lotes), o None si no se
+        pudo usar el pool (se procesa entonces en el proceso actual)
+    """
+    inicio = time.perf_counter()
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as ejecutor:
+            futuros = [
+                ejecutor.submit(analizar_lote, df_lote, ids_lote, posiciones_lote,
+                                indice_codigos, matriz_codigos, ventanas_dias, pesos)
+                for df_lote, ids_lote, posiciones_lote in lotes
+            ]
+            partes = [futuro.result() for futuro in futuros]
+    except (BrokenProcessPool, OSError) as e:
+        logger.warning(f"   ⚠️ No se pudo usar {workers} procesos ({type(e).__name__}: {e}); se procesa en un solo proceso")
+        return None
+
+    # Tiempos por lote para dimensionar el número de procesos
+    logger.info(f"   ⏱️ {len(lotes)} lotes en {workers} procesos: {time.perf_counter() - inicio:.2f}s")
+    for numero, ((df_lote, ids_lote, _), parte) in enumerate(zip(lotes, partes), 1):
+        logger.info(f"      • Lote {numero}: {len(ids_lote):,} IDs | {len(df_lote):,} filas | {parte[3]:.2f}s")
+    return partes
+
+def _arrastrar_sin_cambios(df_ausentismos, ids_filtrados, lista_ventanas, ruta_estado, reconstruir):
+    """
+    Compara la huella de cada ID (fila ancla + filas de la ventana mayor) con la del
+    estado anterior y toma del reporte anterior las filas de los IDs sin cambios
+
+    Returns:
+        tuple: (configuracion, huellas, arrastre, sin_cambio)
+            arrastre: (dict días → filas del reporte anterior, posiciones en ids_filtrados)
+                      o None si no hay estado utilizable
+            sin_cambio: Máscara sobre ids_filtrados de los IDs que no se recalculan
+    """
+    configuracion = huella_configuracion(
+        RUTA_CODIGOS_CSV,
+        ponderaciones=COLUMNAS_PONDERADAS,
+        ventanas=lista_ventanas,
+        codigos_incluidos=CODIGOS_INCLUIR_30DIAS,
+    )
+    df_huella = df_ausentismos.reset_index(drop=True)
+    ventana_mayor = max(lista_ventanas)
+    anclas, ventanas = ubicar_ventanas(
+        ids_filtrados,
+        df_huella['id_personal'],
+        df_huella['start_date'],
+        df_huella['last_approval_status_date'],
+        df_huella['descripcion_general_external_code'],
+        [ventana_mayor]
+    )
+    huellas = huellas_por_id(df_huella, anclas, *ventanas[ventana_mayor])
+
+    sin_cambio = np.zeros(len(ids_filtrados), dtype=bool)
+    estado = None if reconstruir else cargar_estado(ruta_estado, configuracion)
+    if estado is None:
+        logger.info("   ♻️ Sin estado anterior utilizable" + (" (reconstrucción completa)" if reconstruir else ""))
+        return configuracion, huellas, None, sin_cambio
+
+    # IDs con la misma huella y con fila en todos los reportes anteriores
+    huellas_anteriores = estado['huellas']
+    posicion_anterior = huellas_anteriores.index.get_indexer(ids_filtrados)
+    sin_cambio = (posicion_anterior >= 0) & (anclas >= 0)
+    sin_cambio &= np.append(huellas_anteriores.to_numpy(), np.uint64(0))[posicion_anterior] == huellas
+    filas_anteriores = {}
+    for dias in lista_ventanas:
+        df_anterior = estado['reportes'][dias]
+        filas_anteriores[dias] = pd.Index(df_anterior['id_personal']).get_indexer(ids_filtrados)
+        sin_cambio &= filas_anteriores[dias] >= 0
+
+    reportes = {dias: estado['reportes'][dias].iloc[filas_anteriores[dias][sin_cambio]] for dias in lista_ventanas}
+    return configuracion, huellas, (reportes, np.flatnonzero(sin_cambio)), sin_cambio
+
+def _unir_con_arrastre(df_calculado, df_arrastrado, posiciones_calculadas, posiciones_arrastradas):
+    """
+    Une las filas recalculadas con las tomadas del reporte anterior en el orden de ids_filtrados
+    """
+    if df_calculado is None:
+        combinado = df_arrastrado
+    elif (df_calculado.dtypes == df_arrastrado.dtypes).all():
+        combinado = pd.concat([df_calculado, df_arrastrado], ignore_index=True)
+    else:
+        # Tipos distintos (p. ej. end_date vacía en una de las partes): se arma como un
+        # cálculo completo para que las columnas queden con el mismo tipo
+        combinado = pd.DataFrame(df_calculado.to_dict('records') + df_arrastrado.to_dict('records'))
+        combinado = combinado[df_calculado.columns]
+    orden = np.argsort(np.concatenate([posiciones_calculadas, posiciones_arrastradas]), kind='stable')
+    return combinado.take(orden).reset_index(drop=True)
+
 # ============================================================================
 # FUNCIÓN PRINCIPAL
 # ============================================================================
 
-def procesar_analisis_completo():
+def procesar_analisis_completo(ruta_entrada=DESDE_MODULO, ruta_salida_unicos=DESDE_MODULO,
+                               ruta_salida_30dias=DESDE_MODULO, fecha_ultima_inicio=DESDE_MODULO,
+                               fecha_ultima_fin=DESDE_MODULO, workers=DESDE_MODULO,
+                               ventanas_dias=DESDE_MODULO, ruta_estado=DESDE_MODULO,
+                               reconstruir=DESDE_MODULO):
     """
     Ejecuta el análisis completo:
     1. Filtra registros únicos por códigos
-    2. Analiza ventana de 30 días con ponderación
+    2. Analiza ventana de 30 días con ponderación (o varias ventanas en una sola pasada)
+
+    Los parámetros que no se pasan se toman de la configuración del módulo
+    (no se modifica ninguna variable global).
+
+    Args:
+        ruta_entrada: CSV del paso 3.1 (o 3) o el DataFrame que devolvió ese paso
+        ruta_salida_unicos: CSV de registros únicos (None = no se guarda en disco)
+        ruta_salida_30dias: CSV del reporte 30 días (None = no se guarda en disco)
+        fecha_ultima_inicio, fecha_ultima_fin: Rango de last_approval_status_date (None = sin filtro)
+        workers: Procesos para el análisis 30 días (1 = en el proceso actual)
+        ventanas_dias: Días de la ventana (entero) o lista de ventanas; cada ventana distinta
+                       de 30 se guarda junto a ruta_salida_30dias (reporte_<dias>_dias.csv)
+        ruta_estado: Carpeta de estado entre ejecuciones (None = se calcula todo); los IDs
+                     cuya fila ancla y filas de ventana no cambiaron se toman del reporte anterior
+        reconstruir: True = ignora el estado y recalcula todos los IDs
 
     Returns:
-        tuple: (df_unicos, df_reporte_30dias) o (None, None) si hay error
+        tuple: (df_unicos, df_reporte_30dias) o (None, None) si hay error; con una lista
+        de ventanas, (df_unicos, {dias: df_reporte})
     """
-
-    print("=" * 80)
-    print("PROCESAMIENTO DE REGISTROS ÚNICOS Y ANÁLISIS 30 DÍAS")
-    print("=" * 80)
+    (ruta_entrada, ruta_salida_unicos, ruta_salida_30dias, fecha_ultima_inicio, fecha_ultima_fin,
+     workers, ventanas_dias, ruta_estado, reconstruir) = tomar_de_modulo(
+        globals(),
+        ruta_entrada=ruta_entrada,
+        ruta_salida_unicos=ruta_salida_unicos,
+        ruta_salida_30dias=ruta_salida_30dias,
+        fecha_ultima_inicio=fecha_ultima_inicio,
+        fecha_ultima_fin=fecha_ultima_fin,
+        workers=workers,
+        ventanas_dias=ventanas_dias,
+        ruta_estado=ruta_estado,
+        reconstruir=reconstruir,
+    )
+    en_memoria = isinstance(ruta_entrada, pd.DataFrame)
+
+    logger.info("=" * 80)
+    logger.info("PROCESAMIENTO DE REGISTROS ÚNICOS Y ANÁLISIS 30 DÍAS")
+    logger.info("=" * 80)
 
     # DEBUG: Verificar configuración inicial
-    print("\n🔍 DEBUG - Configuración inicial:")
-    print(f"  - ruta_entrada: {ruta_entrada}")
-    print(f"  - directorio_salida: {directorio_salida}")
-    print(f"  - ruta_salida_unicos: {ruta_salida_unicos}")
-    print(f"  - ruta_salida_30dias: {ruta_salida_30dias}")
-    print(f"  - fecha_ultima_inicio: {fecha_ultima_inicio}")
-    print(f"  - fecha_ultima_fin: {fecha_ultima_fin}")
-    print(f"  - RUTA_CODIGOS_CSV: {RUTA_CODIGOS_CSV}")
-
-    def normalizar_texto(valor):
-        """Convierte valores mixtos a texto seguro para joins/comparaciones."""
-        if pd.isna(valor):
-            return ''
-        valor_str = str(valor).strip()
-        if valor_str.lower() in {'nan', 'none'}:
-            return ''
-        return valor_str
-
-    def join_seguro(valores, separador):
-        """Une valores heterogéneos evitando TypeError por floats/NaN."""
-        return separador.join(
-            [normalizar_texto(v) for v in valores if normalizar_texto(v)]
-        )
+    logger.debug("\n🔍 DEBUG - Configuración inicial:")
+    logger.debug(f"  - ruta_entrada: {'(DataFrame en memoria)' if en_memoria else ruta_entrada}")
+    logger.debug(f"  - directorio_salida: {directorio_salida}")
+    logger.debug(f"  - ruta_salida_unicos: {ruta_salida_unicos}")
+    logger.debug(f"  - ruta_salida_30dias: {ruta_salida_30dias}")
+    logger.debug(f"  - fecha_ultima_inicio: {fecha_ultima_inicio}")
+    logger.debug(f"  - fecha_ultima_fin: {fecha_ultima_fin}")
+    logger.debug(f"  - workers: {workers}")
+    logger.debug(f"  - ventanas_dias: {ventanas_dias}")
+    logger.debug(f"  - ruta_estado: {ruta_estado} (reconstruir: {reconstruir})")
+    logger.debug(f"  - RUTA_CODIGOS_CSV: {RUTA_CODIGOS_CSV}")
 
     try:
         # ============================================================================
         # PASO 1: FILTRAR Y OBTENER REGISTROS ÚNICOS
         # ============================================================================
-        print("\n1. Procesando registros únicos...")
+        logger.info("\n1. Procesando registros únicos...")
 
         # DEBUG: Verificar archivo de entrada
-        if not ruta_entrada:
-            raise ValueError("❌ ruta_entrada no está configurada")
-        if not os.path.exists(ruta_entrada):
-            raise FileNotFoundError(f"❌ No se encuentra el archivo: {ruta_entrada}")
-
-        print(f"   📂 Leyendo archivo: {os.path.basename(ruta_entrada)}")
+        if not en_memoria:
+            if not ruta_entrada:
+                raise ValueError("❌ ruta_entrada no está configurada")
+            if not os.path.exists(ruta_lectura(ruta_entrada)):
+                raise FileNotFoundError(f"❌ No se encuentra el archivo: {ruta_entrada}")
+            logger.info(f"   📂 Leyendo archivo: {os.path.basename(ruta_entrada)}")
         # Leer código diagnóstico como texto para evitar coerción a float/NaN
-        df = pd.read_csv(
+        df = leer_paso(
             ruta_entrada,
             encoding='utf-8-sig',
             dtype={'descripcion_general_external_code': 'string'}
         )
-        print(f"   ✅ Registros totales: {len(df):,}")
-        print(f"   📋 Columnas encontradas: {len(df.columns)}")
+        logger.info(f"   ✅ Registros totales: {len(df):,}")
+        logger.info(f"   📋 Columnas encontradas: {len(df.columns)}")
 
         # DEBUG: Mostrar primeras columnas
-        print(f"   🔍 Primeras 5 columnas: {list(df.columns[:5])}")
-        print(f"   🔍 Todas las columnas ({len(df.columns)}): {list(df.columns)}")
+        logger.debug(f"   🔍 Primeras 5 columnas: {list(df.columns[:5])}")
+        logger.debug(f"   🔍 Todas las columnas ({len(df.columns)}): {list(df.columns)}")
 
         # COMPATIBILIDAD: Verificar si existe fse_fechas o Final Salario enfer.
         tiene_fse_fechas = 'fse_fechas' in df.columns
         tiene_final_salario = 'Final Salario enfer.' in df.columns
-        print(f"   🔍 Columna 'fse_fechas': {'SÍ' if tiene_fse_fechas else 'NO'}")
-        print(f"   🔍 Columna 'Final Salario enfer.': {'SÍ' if tiene_final_salario else 'NO'}")
+        logger.info(f"   🔍 Columna 'fse_fechas': {'SÍ' if tiene_fse_fechas else 'NO'}")
+        logger.info(f"   🔍 Columna 'Final Salario enfer.': {'SÍ' if tiene_final_salario else 'NO'}")
 
         # FILTRAR PARA REGISTROS ÚNICOS: EXCLUIR los códigos especificados
         if 'homologacion_clase_de_ausentismo_ssf_vs_sap' not in df.columns:
@@ -128,50 +556,40 @@ def procesar_analisis_completo():
                              'descripcion_general_external_code']
         columnas_faltantes = [col for col in columnas_criticas if col not in df.columns]
         if columnas_faltantes:
-            print(f"❌ ERROR CRÍTICO: Faltan columnas OBLIGATORIAS: {columnas_faltantes}")
-            print(f"   Columnas disponibles: {list(df.columns)}")
+            logger.error(f"❌ ERROR CRÍTICO: Faltan columnas OBLIGATORIAS: {columnas_faltantes}")
+            logger.info(f"   Columnas disponibles: {list(df.columns)}")
             return None, None
 
         # Verificar/agregar columnas opcionales para mantener compatibilidad
         if 'external_name_label' not in df.columns:
-            print("   ⚠️ ADVERTENCIA: Columna opcional 'external_name_label' NO existe (se crea con 'N/A')")
+            logger.warning("   ⚠️ ADVERTENCIA: Columna opcional 'external_name_label' NO existe (se crea con 'N/A')")
             df['external_name_label'] = 'N/A'
         else:
-            print("   ✅ Columna opcional 'external_name_label' encontrada")
+            logger.info("   ✅ Columna opcional 'external_name_label' encontrada")
 
         if 'cie10_descripcion' not in df.columns:
-            print("   ⚠️ ADVERTENCIA: Columna opcional 'cie10_descripcion' NO existe (se crea vacía)")
+            logger.warning("   ⚠️ ADVERTENCIA: Columna opcional 'cie10_descripcion' NO existe (se crea vacía)")
             df['cie10_descripcion'] = ''
         else:
-            print("   ✅ Columna opcional 'cie10_descripcion' encontrada")
+            logger.info("   ✅ Columna opcional 'cie10_descripcion' encontrada")
 
         if 'end_date' not in df.columns:
-            print("   ⚠️ ADVERTENCIA: Columna opcional 'end_date' NO existe (se crea vacía)")
+            logger.warning("   ⚠️ ADVERTENCIA: Columna opcional 'end_date' NO existe (se crea vacía)")
             df['end_date'] = ''
         else:
-            print("   ✅ Columna opcional 'end_date' encontrada")
+            logger.info("   ✅ Columna opcional 'end_date' encontrada")
 
         # Normalizar columnas de texto usadas en joins/formateo
         df['descripcion_general_external_code'] = df['descripcion_general_external_code'].map(normalizar_texto)
         df['external_name_label'] = df['external_name_label'].map(normalizar_texto)
         df['cie10_descripcion'] = df['cie10_descripcion'].map(normalizar_texto)
 
-        # Convertir fechas una sola vez (acepta DD/MM/YYYY o YYYY-MM-DD)
-        df['last_approval_status_date'] = pd.to_datetime(
-            df['last_approval_status_date'],
-            dayfirst=True,
-            errors='coerce'
-        )
-        df['start_date'] = pd.to_datetime(
-            df['start_date'],
-            dayfirst=True,
-            errors='coerce'
-        )
-        df['end_date'] = pd.to_datetime(
-            df['end_date'],
-            dayfirst=True,
-            errors='coerce'
-        )
+        # Convertir fechas una sola vez (acepta DD/MM/YYYY o YYYY-MM-DD): el formato
+        # dominante de cada columna y los valores en otro formato quedan NaT
+        for col in ['last_approval_status_date', 'start_date', 'end_date']:
+            fechas = parsear_fechas(df[col], col, estricto=True)
+            df[col] = fechas
+            logger.info(f"   📅 {resumen_fechas(fechas)}")
 
         # Filtro opcional por fecha_ultima
         if fecha_ultima_inicio is not None and fecha_ultima_fin is not None:
@@ -179,336 +597,160 @@ def procesar_analisis_completo():
             fu_fin_dt = pd.to_datetime(fecha_ultima_fin, errors='coerce')
 
             if pd.isna(fu_inicio_dt) or pd.isna(fu_fin_dt):
-                print("   ⚠️ Filtro fecha_ultima ignorado por fechas inválidas")
+                logger.warning("   ⚠️ Filtro fecha_ultima ignorado por fechas inválidas")
             else:
                 registros_antes_filtro_fecha = len(df)
                 df = df[
                     (df['last_approval_status_date'] >= fu_inicio_dt) &
                     (df['last_approval_status_date'] <= fu_fin_dt)
                 ].copy()
-                print(
+                logger.info(
                     f"   ✅ Filtro fecha_ultima aplicado: {fu_inicio_dt.strftime('%d/%m/%Y')} → "
                     f"{fu_fin_dt.strftime('%d/%m/%Y')} | {registros_antes_filtro_fecha:,} → {len(df):,}"
                 )
         elif (fecha_ultima_inicio is not None) != (fecha_ultima_fin is not None):
-            print("   ⚠️ Filtro fecha_ultima incompleto (falta inicio o fin), se omite")
+            logger.warning("   ⚠️ Filtro fecha_ultima incompleto (falta inicio o fin), se omite")
+
+        # Un solo agrupamiento por id_personal (en orden ascendente) sirve para las dos selecciones
+        grupo_id, valores_id = agrupar(df['id_personal'])
 
         # Filtrar para registros únicos (ya con fechas convertidas)
-        df_filtrado_unicos = df[~df['homologacion_clase_de_ausentismo_ssf_vs_sap'].isin(CODIGOS_EXCLUIR_UNICOS)].copy()
-        print(f"   Registros excluyendo códigos {CODIGOS_EXCLUIR_UNICOS}: {len(df_filtrado_unicos):,}")
-
-        # Ordenar por: id_personal, last_approval_status_date (desc), start_date (desc)
-        # Así el registro con la fecha más reciente en start_date quedará primero
-        df_filtrado_unicos = df_filtrado_unicos.sort_values(
-            by=['id_personal', 'last_approval_status_date', 'start_date'],
-            ascending=[True, False, False]
+        filas_unicos = ~df['homologacion_clase_de_ausentismo_ssf_vs_sap'].isin(CODIGOS_EXCLUIR_UNICOS).to_numpy()
+        logger.info(f"   Registros excluyendo códigos {CODIGOS_EXCLUIR_UNICOS}: {filas_unicos.sum():,}")
+
+        # Registro más reciente de cada id_personal: last_approval_status_date (desc) y
+        # luego start_date (desc), igual que ordenar y quedarse con el primero por id
+        ganadoras = seleccionar_por_grupo(
+            grupo_id, len(valores_id),
+            [df['last_approval_status_date'], df['start_date']],
+            filas=filas_unicos
         )
+        df_unicos = df.iloc[ganadoras[ganadoras >= 0]]
 
-        # Tomar el primer registro de cada id_personal (que ahora es el más reciente)
-        df_unicos = df_filtrado_unicos.drop_duplicates(subset=['id_personal'], keep='first')
+        logger.info(f"   Registros únicos (SIN códigos filtrados): {len(df_unicos):,}")
+        logger.info(f"   → Criterio: Última last_approval_status_date y start_date más reciente")
 
-        print(f"   Registros únicos (SIN códigos filtrados): {len(df_unicos):,}")
-        print(f"   → Criterio: Última last_approval_status_date y start_date más reciente")
-
-        df_unicos.to_csv(ruta_salida_unicos, index=False, encoding='utf-8-sig', date_format='%d/%m/%Y')
-        print(f"✅ Guardado: {os.path.basename(ruta_salida_unicos)}")
+        if ruta_salida_unicos is not None:
+            df_unicos.to_csv(ruta_salida_unicos, index=False, encoding='utf-8-sig', date_format='%d/%m/%Y')
+            logger.info(f"✅ Guardado: {os.path.basename(ruta_salida_unicos)}")
 
         # FILTRAR PARA REPORTE 30 DÍAS: INCLUIR SOLO los códigos especificados
-        df_filtrado_30dias = df[df['homologacion_clase_de_ausentismo_ssf_vs_sap'].isin(CODIGOS_INCLUIR_30DIAS)].copy()
-        print(f"   Registros CON códigos {CODIGOS_INCLUIR_30DIAS}: {len(df_filtrado_30dias):,}")
+        filas_30dias = df['homologacion_clase_de_ausentismo_ssf_vs_sap'].isin(CODIGOS_INCLUIR_30DIAS).to_numpy()
+        logger.info(f"   Registros CON códigos {CODIGOS_INCLUIR_30DIAS}: {filas_30dias.sum():,}")
 
-        df_filtrado_30dias = df_filtrado_30dias.sort_values(
-            by=['id_personal', 'start_date', 'last_approval_status_date'],
-            ascending=[True, False, False]
+        ganadoras = seleccionar_por_grupo(
+            grupo_id, len(valores_id),
+            [df['start_date'], df['last_approval_status_date']],
+            filas=filas_30dias
         )
-        df_filtrado_30dias_unicos = df_filtrado_30dias.drop_duplicates(subset=['id_personal'], keep='first')
-        print(f"   IDs únicos para reporte 30 días: {len(df_filtrado_30dias_unicos):,}")
+        df_filtrado_30dias_unicos = df.iloc[ganadoras[ganadoras >= 0]]
+        logger.info(f"   IDs únicos para reporte 30 días: {len(df_filtrado_30dias_unicos):,}")
         
         # ============================================================================
         # PASO 2: CARGAR MATRIZ DE CÓDIGOS
         # ============================================================================
-        print("\n2. Cargando matriz de códigos CIE-10...")
+        logger.info("\n2. Cargando matriz de códigos CIE-10...")
         
         # Verificar si existe el archivo en el repositorio
         if not os.path.exists(RUTA_CODIGOS_CSV):
-            print(f"❌ ERROR: No se encontró el archivo {RUTA_CODIGOS_CSV}")
+            logger.error(f"❌ ERROR: No se encontró el archivo {RUTA_CODIGOS_CSV}")
             return None, None
         
-        df_codigos = pd.read_csv(
-            RUTA_CODIGOS_CSV,
-            encoding='utf-8-sig',
-            dtype={'Código': 'string'}
-        )
+        # Artefacto CIE-10 compilado: se vuelve a compilar solo si cambió el CSV
+        codigos_compilados = cargar_matriz_codigos(RUTA_CODIGOS_CSV, leer_tabla_codigos)
         
-        # Eliminar columna porcentaje_relacion si existe
-        if 'porcentaje_relacion' in df_codigos.columns:
-            df_codigos = df_codigos.drop('porcentaje_relacion', axis=1)
-
-        df_codigos['Código'] = df_codigos['Código'].map(normalizar_texto)
-        
-        print(f"✅ Columnas disponibles en matriz: {list(df_codigos.columns)}")
+        logger.debug(f"✅ Columnas disponibles en matriz: {codigos_compilados['columnas']}")
         
         # Verificar que las columnas ponderadas existen
-        columnas_faltantes = [col for col in COLUMNAS_PONDERADAS.keys() if col not in df_codigos.columns]
+        columnas_faltantes = [col for col in COLUMNAS_PONDERADAS.keys() if col not in codigos_compilados['columnas']]
         if columnas_faltantes:
-            print(f"❌ ERROR: Faltan columnas en la matriz: {columnas_faltantes}")
+            logger.error(f"❌ ERROR: Faltan columnas en la matriz: {columnas_faltantes}")
             return None, None
         
         # ============================================================================
         # PASO 3: PREPARAR DATOS PARA ANÁLISIS 30 DÍAS
         # ============================================================================
-        print("\n3. Preparando datos para análisis 30 días...")
-        print("   ℹ️ Se usan los datos ya cargados y preprocesados una sola vez")
+        logger.info("\n3. Preparando datos para análisis 30 días...")
+        logger.info("   ℹ️ Se usan los datos ya cargados y preprocesados una sola vez")
 
         # Obtener solo los IDs únicos del filtro CON CÓDIGOS (para reporte 30 días)
         ids_filtrados = df_filtrado_30dias_unicos['id_personal'].unique()
 
-        print(f"✅ IDs a procesar: {len(ids_filtrados):,}")
-        print(f"✅ Ponderación configurada:")
+        logger.info(f"✅ IDs a procesar: {len(ids_filtrados):,}")
+        logger.info(f"✅ Ponderación configurada:")
         for col, peso in COLUMNAS_PONDERADAS.items():
-            print(f"   • {col}: {peso*100:.0f}%")
+            logger.info(f"   • {col}: {peso*100:.0f}%")
 
         # Filtrar por IDs
         df_ausentismos = df[df['id_personal'].isin(ids_filtrados)].copy()
 
         # Validar que haya datos
         if len(df_ausentismos) == 0:
-            print("❌ ERROR: No hay datos después de filtrar por IDs")
+            logger.error("❌ ERROR: No hay datos después de filtrar por IDs")
             return None, None
 
-        print(f"✅ Registros válidos para análisis: {len(df_ausentismos):,}")
+        logger.info(f"✅ Registros válidos para análisis: {len(df_ausentismos):,}")
         
         # ============================================================================
-        # PASO 4: CREAR DICCIONARIO DE CÓDIGOS
+        # PASO 4: CREAR MATRIZ DE CÓDIGOS
         # ============================================================================
-        print("\n4. Creando diccionario de códigos...")
-        
-        codigo_a_valores = {}
-        for idx, row in df_codigos.iterrows():
-            codigo = normalizar_texto(row['Código'])
-            if not codigo:
-                continue
-            valores = {col: row[col] for col in COLUMNAS_PONDERADAS.keys()}
-            codigo_a_valores[codigo] = valores
-        
-        print(f"✅ {len(codigo_a_valores)} códigos en diccionario")
+        logger.info("\n4. Creando matriz de códigos...")
+
+        # Clasificaciones como enteros (códigos × columnas ponderadas) y mapa código → fila
+        indice_codigos, matriz_codigos = matriz_de_columnas(codigos_compilados, list(COLUMNAS_PONDERADAS.keys()))
+
+        logger.info(f"✅ {len(indice_codigos)} códigos en matriz")
         
         # ============================================================================
         # PASO 5: PROCESAR CADA ID_PERSONAL
         # ============================================================================
-        print("\n5. Procesando análisis de 30 días...")
-        
-        resultados = []
-        id_actual = None
+        # Un entero es una sola ventana; con una lista se calculan todas en la misma pasada
+        varias_ventanas = isinstance(ventanas_dias, (list, tuple))
+        lista_ventanas = list(dict.fromkeys(int(dias) for dias in ventanas_dias)) if varias_ventanas else [int(ventanas_dias)]
+        nombre_ventanas = '/'.join(str(dias) for dias in lista_ventanas)
+        logger.info(f"\n5. Procesando análisis de {nombre_ventanas} días...")
         
-        for contador, id_pers in enumerate(ids_filtrados, 1):
-            id_actual = id_pers
-            # Obtener datos de este ID
-            datos_id = df_ausentismos[df_ausentismos['id_personal'] == id_pers].copy()
-
-            # PROTECCIÓN: Verificar que haya datos para este ID
-            if len(datos_id) == 0:
-                print(f"  ⚠️ SALTANDO ID {id_pers} (#{contador}/{len(ids_filtrados)}): Sin datos")
-                continue
-
-            # PRIORIDAD 1: Buscar el start_date más reciente
-            # PRIORIDAD 2: Si hay empate, desempatar por last_approval_status_date más reciente
-            datos_id_ordenado = datos_id.sort_values(
-                by=['start_date', 'last_approval_status_date'],
-                ascending=[False, False]  # Ambos descendentes (más reciente primero)
-            )
-
-            # PROTECCIÓN: Verificar que datos_id_ordenado no esté vacío
-            if len(datos_id_ordenado) == 0:
-                print(f"  ⚠️ SALTANDO ID {id_pers} (#{contador}/{len(ids_filtrados)}): DataFrame vacío tras ordenar")
-                continue
-
-            # Tomar el primer registro (start_date más reciente)
-            registro_ultimo = datos_id_ordenado.iloc[0]
-
-            fecha_aprobacion_maxima = registro_ultimo['last_approval_status_date']
-            codigo_ultima_fecha = normalizar_texto(registro_ultimo['descripcion_general_external_code'])
-            start_date_ultimo = registro_ultimo['start_date']
-            end_date_ultimo = registro_ultimo['end_date']
-            # CORRECCIÓN: pandas Series no tiene método .get(), usar in index
-            if 'external_name_label' in registro_ultimo.index:
-                external_label_ultimo = registro_ultimo['external_name_label']
-            else:
-                external_label_ultimo = 'N/A'
-            
-            # Calcular fecha límite (30 días antes del start_date)
-            fecha_limite = start_date_ultimo - pd.Timedelta(days=VENTANA_DIAS)
-            
-            # Filtrar registros dentro de la ventana de 30 días
-            datos_filtrados = datos_id[
-                (datos_id['start_date'] >= fecha_limite) & 
-                (datos_id['start_date'] <= start_date_ultimo)
-            ].copy()
-            
-            # Calcular días transcurridos
-            datos_filtrados['dias_transcurridos'] = (start_date_ultimo - datos_filtrados['start_date']).dt.days
-            
-            # Excluir el código que choca (el del registro más reciente)
-            datos_filtrados_sin_choque = datos_filtrados[
-                (datos_filtrados['descripcion_general_external_code'] != codigo_ultima_fecha) |
-                (datos_filtrados['start_date'] != start_date_ultimo)
-            ].copy()
-
-            # ORDENAR por start_date de menor a mayor (más antigua primero)
-            datos_filtrados_sin_choque = datos_filtrados_sin_choque.sort_values('start_date', ascending=True)
-
-            # Calcular duración en días del código que choca
-            if pd.notna(end_date_ultimo) and pd.notna(start_date_ultimo):
-                duracion_dias = (end_date_ultimo - start_date_ultimo).days + 1
-            else:
-                duracion_dias = 0
-
-            # Crear tipo_concepto (el código que choca con todos)
-            tipo_concepto = f"{codigo_ultima_fecha}(start:{start_date_ultimo.strftime('%d/%m/%Y')},dias:{duracion_dias})({external_label_ultimo})"
-
-            # Si no hay datos para comparar
-            if len(datos_filtrados_sin_choque) == 0:
-                resultados.append({
-                    'id_personal': id_pers,
-                    'fecha_ultima': fecha_aprobacion_maxima,  # Mantener como datetime
-                    'start_date': start_date_ultimo,  # Mantener como datetime
-                    'end_date': end_date_ultimo if pd.notna(end_date_ultimo) else pd.NaT,  # Mantener como datetime
-                    'codigo_ultima_fecha': codigo_ultima_fecha,
-                    'tipo_concepto': tipo_concepto,
-                    'todos_codigos': '',
-                    'detalle_codigos_con_fechas': '',
-                    'cantidad_codigos': 0,
-                    'comparaciones_detalle': '',
-                    'porcentaje_relacion': 0.0,
-                    'cie10_descripcion': ''
-                })
-                continue
-            
-            # Verificar si el código que choca existe en la tabla
-            if codigo_ultima_fecha not in codigo_a_valores:
-                detalle_codigos = []
-                cie10_descripciones = []
-                
-                for idx, row in datos_filtrados_sin_choque.iterrows():
-                    cod = normalizar_texto(row['descripcion_general_external_code'])
-                    sd = row['start_date'].strftime('%d/%m/%Y')
-                    dias = row['dias_transcurridos']
-                    # CORRECCIÓN: pandas Series no tiene método .get()
-                    external_label = row['external_name_label'] if 'external_name_label' in row.index else 'N/A'
-                    cie10_desc = row['cie10_descripcion'] if 'cie10_descripcion' in row.index else ''
-                    
-                    detalle_codigos.append(f"{cod}(start:{sd},dias:{dias})({external_label})")
-                    
-                    if pd.notna(cie10_desc) and cie10_desc != '':
-                        cie10_descripciones.append(f"({str(cie10_desc)})")
-                
-                todos_codigos = [
-                    normalizar_texto(cod)
-                    for cod in datos_filtrados_sin_choque['descripcion_general_external_code'].unique().tolist()
-                    if normalizar_texto(cod)
-                ]
-
-                resultados.append({
-                    'id_personal': id_pers,
-                    'fecha_ultima': fecha_aprobacion_maxima,  # Mantener como datetime
-                    'start_date': start_date_ultimo,  # Mantener como datetime
-                    'end_date': end_date_ultimo if pd.notna(end_date_ultimo) else pd.NaT,  # Mantener como datetime
-                    'codigo_ultima_fecha': codigo_ultima_fecha,
-                    'tipo_concepto': tipo_concepto,
-                    'todos_codigos': join_seguro(todos_codigos, ', '),
-                    'detalle_codigos_con_fechas': ' | '.join(detalle_codigos),
-                    'cantidad_codigos': len(todos_codigos),
-                    'comparaciones_detalle': 'Código que choca no encontrado en tabla',
-                    'porcentaje_relacion': 0.0,
-                    'cie10_descripcion': join_seguro(cie10_descripciones, '|')
-                })
-                continue
-            
-            # Procesar comparaciones con PONDERACIÓN
-            detalle_codigos = []
-            comparaciones_detalle = []
-            porcentajes = []
-            cie10_descripciones = []
-            valores_ultima = codigo_a_valores[codigo_ultima_fecha]
-            
-            for idx, row in datos_filtrados_sin_choque.iterrows():
-                cod = normalizar_texto(row['descripcion_general_external_code'])
-                sd = row['start_date'].strftime('%d/%m/%Y')
-                dias = row['dias_transcurridos']
-                # CORRECCIÓN: pandas Series no tiene método .get()
-                external_label = row['external_name_label'] if 'external_name_label' in row.index else 'N/A'
-                cie10_desc = row['cie10_descripcion'] if 'cie10_descripcion' in row.index else ''
-
-                # Verificar si el código tiene caracteres especiales
-                # CORRECCIÓN: Verificar que cod no sea None y manejar casos especiales
-                cod_str = str(cod).strip() if cod is not None else ''
-                if not cod_str or '*' in cod_str or not cod_str.replace(' ', '').replace('.', '').isalnum():
-                    detalle_codigos.append(f"{cod}(start:{sd},dias:{dias},error_codigo)({external_label})")
-                    comparaciones_detalle.append(f"{cod}:error_codigo")
-                else:
-                    detalle_codigos.append(f"{cod}(start:{sd},dias:{dias})({external_label})")
-                    
-                    # Verificar si el código existe en el diccionario
-                    if cod in codigo_a_valores:
-                        valores_hist = codigo_a_valores[cod]
-                        
-                        # CALCULAR PORCENTAJE PONDERADO: 25% por cada columna
-                        porcentaje_total = 0.0
-                        
-                        for columna, peso in COLUMNAS_PONDERADAS.items():
-                            # Si coincide la columna, sumar el 25%
-                            if valores_ultima[columna] == valores_hist[columna]:
-                                porcentaje_total += (peso * 100)
-                        
-                        porcentajes.append(porcentaje_total)
-                        comparaciones_detalle.append(f"{cod}:{porcentaje_total:.1f}%")
-                    else:
-                        comparaciones_detalle.append(f"{cod}:N/A")
-                
-                # Agregar descripción CIE-10 si existe con formato |(DESCRIPCION)|
-                if pd.notna(cie10_desc) and cie10_desc != '':
-                    cie10_descripciones.append(f"({str(cie10_desc)})")
-            
-            # Crear strings de detalle
-            detalle_str = ' | '.join(detalle_codigos)
-            comparaciones_str = ' | '.join(comparaciones_detalle)
-            todos_codigos = [
-                normalizar_texto(cod)
-                for cod in datos_filtrados_sin_choque['descripcion_general_external_code'].unique().tolist()
-                if normalizar_texto(cod)
-            ]
-            
-            # Calcular promedio de porcentajes
-            porcentaje_promedio = np.mean(porcentajes) if porcentajes else 0.0
-
-            # Guardar resultado
-            resultados.append({
-                'id_personal': id_pers,
-                'fecha_ultima': fecha_aprobacion_maxima,  # Mantener como datetime
-                'start_date': start_date_ultimo,  # Mantener como datetime
-                'end_date': end_date_ultimo if pd.notna(end_date_ultimo) else pd.NaT,  # Mantener como datetime
-                'codigo_ultima_fecha': codigo_ultima_fecha,
-                'tipo_concepto': tipo_concepto,
-                'todos_codigos': join_seguro(todos_codigos, ', '),
-                'detalle_codigos_con_fechas': join_seguro([detalle_str], ' | '),
-                'cantidad_codigos': len([c for c in todos_codigos if normalizar_texto(c)]),
-                'comparaciones_detalle': join_seguro([comparaciones_str], ' | '),
-                'porcentaje_relacion': round(porcentaje_promedio, 2),
-                'cie10_descripcion': join_seguro(cie10_descripciones, '|')
-            })
-            
-            # Mostrar progreso
-            if contador % 500 == 0:
-                print(f"  Procesados {contador}/{len(ids_filtrados)} IDs...")
+        # Estado incremental: los IDs sin cambios desde la ejecución anterior se toman de su reporte
+        ids_a_calcular = ids_filtrados
+        posiciones_a_calcular = np.arange(len(ids_filtrados))
+        arrastre = None
+        if ruta_estado is not None:
+            configuracion, huellas, arrastre, sin_cambio = _arrastrar_sin_cambios(
+                df_ausentismos, ids_filtrados, lista_ventanas, ruta_estado, reconstruir)
+            ids_a_calcular = ids_filtrados[~sin_cambio]
+            posiciones_a_calcular = posiciones_a_calcular[~sin_cambio]
+            logger.info(f"   ♻️ Estado {os.path.basename(ruta_estado)}: {sin_cambio.sum():,} IDs sin cambios | "
+                        f"{len(ids_a_calcular):,} IDs a recalcular")
+            if len(ids_a_calcular) < len(ids_filtrados):
+                df_ausentismos = df_ausentismos[df_ausentismos['id_personal'].isin(ids_a_calcular)]
+
+        # Los IDs se reparten en lotes por hash de id_personal cuando hay varios procesos
+        pesos = list(COLUMNAS_PONDERADAS.values())
+        n_lotes = min(max(int(workers or 1), 1), len(ids_a_calcular))
+        partes = None
+        if n_lotes > 1:
+            lotes = [(df_lote, ids_lote, posiciones_a_calcular[posiciones_lote])
+                     for df_lote, ids_lote, posiciones_lote in _repartir_en_lotes(df_ausentismos, ids_a_calcular, n_lotes)]
+            partes = _analizar_en_paralelo(lotes, indice_codigos, matriz_codigos, lista_ventanas, pesos, n_lotes)
+        if partes is None:
+            partes = [analizar_lote(df_ausentismos, ids_a_calcular, posiciones_a_calcular,
+                                    indice_codigos, matriz_codigos, lista_ventanas, pesos)] if len(ids_a_calcular) else []
+
+        # Orden de ids_filtrados para unir los lotes (el mismo en todas las ventanas)
+        posiciones_calculadas = np.concatenate(
+            [np.asarray(parte[1], dtype=np.int64) for parte in partes] + [np.empty(0, dtype=np.int64)])
+        orden = np.argsort(posiciones_calculadas, kind='stable')
+
+        # PROTECCIÓN: IDs sin datos
+        for posicion in sorted(p for parte in partes for p in parte[2]):
+            logger.warning(f"  ⚠️ SALTANDO ID {ids_filtrados[posicion]} (#{posicion + 1}/{len(ids_filtrados)}): Sin datos")
         
-        print(f"✅ Procesamiento completado")
+        logger.info(f"✅ Procesamiento completado")
         
         # ============================================================================
         # PASO 6: GUARDAR REPORTE 30 DÍAS
         # ============================================================================
-        print("\n6. Guardando reporte 30 días...")
-        
-        df_resultado = pd.DataFrame(resultados)
+        logger.info(f"\n6. Guardando reporte {nombre_ventanas} días...")
         
         # NOMBRES DE COLUMNAS CORRECTOS Y EN ESPAÑOL
         columnas_orden = [
@@ -526,68 +768,96 @@ def procesar_analisis_completo():
             'cie10_descripcion'
         ]
         
-        df_resultado = df_resultado[columnas_orden]
+        reportes = {}
+        for dias in lista_ventanas:
+            resultados = [fila for parte in partes for fila in parte[0][dias]]
+            df_resultado = None
+            if resultados or arrastre is None:
+                df_resultado = pd.DataFrame([resultados[i] for i in orden])
+                df_resultado = df_resultado[columnas_orden]
+            if arrastre is not None:
+                df_resultado = _unir_con_arrastre(df_resultado, arrastre[0][dias][columnas_orden],
+                                                  posiciones_calculadas[orden], arrastre[1])
+            reportes[dias] = df_resultado
         
-        # Guardar CSV con formato CORRECTO y fechas en DD/MM/YYYY
-        df_resultado.to_csv(
-            ruta_salida_30dias,
-            index=False,
-            sep=';',
-            encoding='utf-8-sig',
-            decimal=',',
-            date_format='%d/%m/%Y',  # Formato día/mes/año para fechas
-            quoting=1,
-            lineterminator='\n'
-        )
-        
-        print(f"✅ Guardado: {os.path.basename(ruta_salida_30dias)}")
+            # Guardar CSV con formato CORRECTO y fechas en DD/MM/YYYY
+            ruta_reporte = _ruta_reporte(ruta_salida_30dias, dias)
+            if ruta_reporte is not None:
+                df_resultado.to_csv(
+                    ruta_reporte,
+                    index=False,
+                    sep=';',
+                    encoding='utf-8-sig',
+                    decimal=',',
+                    date_format='%d/%m/%Y',  # Formato día/mes/año para fechas
+                    quoting=1,
+                    lineterminator='\n'
+                )
+
+                logger.info(f"✅ Guardado: {os.path.basename(ruta_reporte)}")
+
+        if ruta_estado is not None:
+            try:
+                guardar_estado(ruta_estado, configuracion, ids_filtrados, huellas, reportes)
+                logger.info(f"✅ Estado guardado: {os.path.basename(ruta_estado)}")
+            except Exception as e:
+                # El estado es opcional (los reportes ya están guardados): sin estado la
+                # próxima ejecución simplemente recalcula todo
+                logger.warning(f"   ⚠️ No se pudo guardar el estado ({type(e).__name__}: {e})")
         
         # ============================================================================
         # PASO 7: ESTADÍSTICAS FINALES
         # ============================================================================
-        print("\n" + "=" * 80)
-        print("RESUMEN FINAL")
-        print("=" * 80)
+        logger.info("\n" + "=" * 80)
+        logger.info("RESUMEN FINAL")
+        logger.info("=" * 80)
         
-        print(f"\n📊 Archivos generados:")
-        print(f"  1. {os.path.basename(ruta_salida_unicos)}: {len(df_unicos):,} registros")
-        print(f"     → Registros únicos EXCLUYENDO códigos {CODIGOS_EXCLUIR_UNICOS}")
-        print(f"  2. {os.path.basename(ruta_salida_30dias)}: {len(df_resultado):,} registros")
-        print(f"     → Análisis 30 días SOLO con códigos {CODIGOS_INCLUIR_30DIAS}")
+        logger.info(f"\n📊 Archivos generados:")
+        logger.info(f"  1. {os.path.basename(ruta_salida_unicos or 'Registros_unicos')}: {len(df_unicos):,} registros")
+        logger.info(f"     → Registros únicos EXCLUYENDO códigos {CODIGOS_EXCLUIR_UNICOS}")
+        for numero, (dias, df_resultado) in enumerate(reportes.items(), 2):
+            nombre_reporte = os.path.basename(_ruta_reporte(ruta_salida_30dias, dias) or f'reporte_{dias}_dias')
+            logger.info(f"  {numero}. {nombre_reporte}: {len(df_resultado):,} registros")
+            logger.info(f"     → Análisis {dias} días SOLO con códigos {CODIGOS_INCLUIR_30DIAS}")
         
-        print(f"\n📈 Estadísticas reporte 30 días:")
-        print(f"  IDs con códigos para comparar: {len(df_resultado[df_resultado['cantidad_codigos'] > 0]):,}")
-        print(f"  IDs sin códigos para comparar: {len(df_resultado[df_resultado['cantidad_codigos'] == 0]):,}")
-        print(f"  Porcentaje promedio: {df_resultado['porcentaje_relacion'].mean():.2f}%")
+        for dias, df_resultado in reportes.items():
+            logger.info(f"\n📈 Estadísticas reporte {dias} días:")
+            logger.info(f"  IDs con códigos para comparar: {len(df_resultado[df_resultado['cantidad_codigos'] > 0]):,}")
+            logger.info(f"  IDs sin códigos para comparar: {len(df_resultado[df_resultado['cantidad_codigos'] == 0]):,}")
+            logger.info(f"  Porcentaje promedio: {df_resultado['porcentaje_relacion'].mean():.2f}%")
         
-        print(f"\n💡 Ponderación aplicada:")
+        logger.info(f"\n💡 Ponderación aplicada:")
         for col, peso in COLUMNAS_PONDERADAS.items():
-            print(f"  • {col}: {peso*100:.0f}%")
-        print(f"  → Total posible: 100% (si coinciden las 4 columnas)")
+            logger.info(f"  • {col}: {peso*100:.0f}%")
+        logger.info(f"  → Total posible: 100% (si coinciden las 4 columnas)")
         
-        print("\n✅ PROCESO COMPLETADO")
-        print("=" * 80)
+        logger.info("\n✅ PROCESO COMPLETADO")
+        logger.info("=" * 80)
         
-        return df_unicos, df_resultado
+        return df_unicos, reportes if varias_ventanas else reportes[lista_ventanas[0]]
     
     except Exception as e:
-        print("\n" + "=" * 80)
-        print("❌ ERROR CRÍTICO EN PROCESAMIENTO")
-        print("=" * 80)
-        print(f"\n🔴 Tipo de Error: {type(e).__name__}")
-        print(f"🔴 Mensaje: {str(e)}")
-        if 'id_actual' in locals() and id_actual is not None:
-            print(f"🔴 Último id_personal procesado: {id_actual}")
-        print("\n📍 TRACEBACK COMPLETO:")
-        print("-" * 80)
+        logger.info("\n" + "=" * 80)
+        logger.error("❌ ERROR CRÍTICO EN PROCESAMIENTO")
+        logger.info("=" * 80)
+        logger.error(f"\n🔴 Tipo de Error: {type(e).__name__}")
+        logger.error(f"🔴 Mensaje: {str(e)}")
+        id_actual = getattr(e, 'id_personal', None)
+        if id_actual is not None:
+            logger.error(f"🔴 Último id_personal procesado: {id_actual}")
+        logger.info("\n📍 TRACEBACK COMPLETO:")
+        logger.info("-" * 80)
         import traceback
-        print(traceback.format_exc())
-        print("-" * 80)
-        print("\n💡 INFORMACIÓN DE DEBUG:")
-        print(f"  - Archivo de entrada existe: {os.path.exists(ruta_entrada) if ruta_entrada else 'NO CONFIGURADO'}")
-        print(f"  - Archivo códigos existe: {os.path.exists(RUTA_CODIGOS_CSV)}")
-        print(f"  - Directorio salida: {directorio_salida if directorio_salida else 'NO CONFIGURADO'}")
-        print("=" * 80)
+        logger.info(traceback.format_exc())
+        logger.info("-" * 80)
+        logger.info("\n💡 INFORMACIÓN DE DEBUG:")
+        if en_memoria:
+            logger.info("  - Entrada: DataFrame en memoria")
+        else:
+            logger.info(f"  - Archivo de entrada existe: {os.path.exists(ruta_lectura(ruta_entrada)) if ruta_entrada else 'NO CONFIGURADO'}")
+        logger.info(f"  - Archivo códigos existe: {os.path.exists(RUTA_CODIGOS_CSV)}")
+        logger.info(f"  - Directorio salida: {directorio_salida if directorio_salida else 'NO CONFIGURADO'}")
+        logger.info("=" * 80)
         return None, None
 
 
@@ -601,6 +871,8 @@ if __name__ == "__main__":
     directorio_salida = r"C:\Users\jjbustos\Downloads\salida"
     ruta_salida_unicos = os.path.join(directorio_salida, "Registros_unicos.csv")
     ruta_salida_30dias = os.path.join(directorio_salida, "reporte_30_dias.csv")
+    # Ejecuciones mensuales: solo se recalculan los empleados con cambios desde la anterior
+    ruta_estado = os.path.join(directorio_salida, "estado_reporte_30_dias")
     
     # Crear directorio de salida si no existe
     os.makedirs(directorio_salida, exist_ok=True)
@@ -609,6 +881,6 @@ if __name__ == "__main__":
     df_unicos, df_reporte = procesar_analisis_completo()
     
     if df_unicos is not None and df_reporte is not None:
-        print("\n✅ Archivos generados correctamente")
+        logger.info("\n✅ Archivos generados correctamente")
     else:
-        print("\n❌ Error en el procesamiento")
+        logger.error("\n❌ Error en el procesamiento")
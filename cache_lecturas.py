@@ -0,0 +1,261 @@
+# Caché en disco de lecturas de archivos de entrada (direccionada por contenido)
+import pandas as pd
+import numpy as np
+import os
+import json
+import pickle
+import hashlib
+import tempfile
+
+# ============================================================================
+# CONFIGURACIÓN
+# ============================================================================
+# Carpeta de caché del usuario (no la temporal compartida: la caché guarda números de
+# personal y diagnósticos)
+directorio_usuario = os.path.join(
+    os.environ.get('XDG_CACHE_HOME') or os.environ.get('LOCALAPPDATA')
+    or os.path.join(os.path.expanduser('~'), '.cache'),
+    'auditoria_ausentismos'
+)
+
+# Directorio de la caché (se puede cambiar con la variable de entorno AUDITORIA_CACHE_DIR);
+# se crea con permisos solo para el usuario (0700)
+directorio_cache = os.environ.get('AUDITORIA_CACHE_DIR', os.path.join(directorio_usuario, 'lecturas'))
+
+# Tamaño máximo de la caché en MB; al superarlo se eliminan las entradas menos usadas
+limite_cache_mb = float(os.environ.get('AUDITORIA_CACHE_MB', '1024'))
+
+# AUDITORIA_CACHE=0 desactiva la caché
+cache_activo = os.environ.get('AUDITORIA_CACHE', '1') != '0'
+
+# Cambiar cuando cambie la forma en que los lectores construyen el DataFrame
+VERSION_CACHE = 1
+
+try:
+    import pyarrow  # noqa: F401
+    FORMATO_CACHE = 'parquet'
+except ImportError:
+    FORMATO_CACHE = 'pickle'
+
+EXTENSIONES_CACHE = ('.parquet', '.pkl')
+
+# ============================================================================
+# FUNCIONES AUXILIARES
+# ============================================================================
+def huella_archivo(ruta, tamano_bloque=1024 * 1024):
+    """
+    Calcula el SHA-256 del contenido de un archivo (por bloques)
+    """
+    sha = hashlib.sha256()
+    with open(ruta, 'rb') as archivo:
+        for bloque in iter(lambda: archivo.read(tamano_bloque), b''):
+            sha.update(bloque)
+    return sha.hexdigest()
+
+def _describir(valor):
+    """
+    Convierte las opciones de lectura en algo serializable y estable entre ejecuciones.
+    Las funciones (p. ej. filtros de columnas) se describen por su código y sus
+    variables capturadas, no por su dirección en memoria.
+    """
+    if callable(valor) and hasattr(valor, '__code__'):
+        codigo = valor.__code__
+        return {
+            'codigo': hashlib.sha256(
+                codigo.co_code + repr((codigo.co_consts, codigo.co_names)).encode('utf-8')
+            ).hexdigest(),
+            'cierre': [_describir(celda.cell_contents) for celda in (valor.__closure__ or ())]
+        }
+    if isinstance(valor, dict):
+        return {str(k): _describir(v) for k, v in sorted(valor.items(), key=lambda kv: str(kv[0]))}
+    if isinstance(valor, (set, frozenset)):
+        return sorted(str(v) for v in valor)
+    if isinstance(valor, (list, tuple)):
+        return [_describir(v) for v in valor]
+    if valor is None or isinstance(valor, (str, int, float, bool)):
+        return valor
+    return repr(valor)
+
+def clave_cache(ruta, opciones):
+    """
+    Clave de la caché: SHA-256 del contenido del archivo + opciones del lector
+
+    Args:
+        ruta: Ruta del archivo de entrada
+        opciones: Diccionario con el lector y sus opciones
+
+    Returns:
+        String hexadecimal
+    """
+    descripcion = json.dumps(
+        {'version': VERSION_CACHE, 'archivo': huella_archivo(ruta), 'opciones': _describir(opciones)},
+        sort_keys=True, ensure_ascii=False
+    )
+    return hashlib.sha256(descripcion.encode('utf-8')).hexdigest()
+
+def directorio_privado(directorio):
+    """
+    Crea el directorio (si falta) con permisos solo para el usuario y verifica que lo
+    siga siendo antes de leer o escribir en él
+
+    Returns:
+        El mismo directorio
+
+    Raises:
+        OSError: si el directorio es de otro usuario
+    """
+    os.makedirs(directorio, mode=0o700, exist_ok=True)
+    if hasattr(os, 'getuid'):
+        info = os.stat(directorio)
+        if info.st_uid != os.getuid():
+            raise OSError(f"El directorio {directorio} es de otro usuario")
+        if info.st_mode & 0o077:
+            os.chmod(directorio, 0o700)
+    return directorio
+
+def _ruta_entrada(clave):
+    extension = '.parquet' if FORMATO_CACHE == 'parquet' else '.pkl'
+    return os.path.join(directorio_cache, clave + extension)
+
+def _guardar(df, ruta):
+    # Temporal propio de esta escritura (dos sesiones pueden guardar la misma entrada)
+    descriptor, temporal = tempfile.mkstemp(dir=os.path.dirname(ruta), suffix='.tmp')
+    try:
+        with os.fdopen(descriptor, 'wb') as archivo:
+            if ruta.endswith('.parquet'):
+                df.to_parquet(archivo, index=True)
+            else:
+                pickle.dump(df, archivo, protocol=pickle.HIGHEST_PROTOCOL)
+        # Reemplazo atómico para no dejar entradas a medio escribir
+        os.replace(temporal, ruta)
+    except BaseException:
+        try:
+            os.remove(temporal)
+        except OSError:
+            pass
+        raise
+
+def _cargar(ruta):
+    if ruta.endswith('.parquet'):
+        df = pd.read_parquet(ruta)
+        # Parquet devuelve None en columnas de texto; los lectores originales dan NaN
+        for col in df.columns:
+            if df[col].dtype == object:
+                df[col] = df[col].where(df[col].notna(), np.nan)
+        return df
+    with open(ruta, 'rb') as archivo:
+        return pickle.load(archivo)
+
+def _entradas():
+    """
+    Lista (ruta, tamaño, último uso) de las entradas de la caché
+    """
+    if not os.path.isdir(directorio_cache):
+        return []
+    entradas = []
+    for nombre in os.listdir(directorio_cache):
+        if nombre.endswith(EXTENSIONES_CACHE):
+            ruta = os.path.join(directorio_cache, nombre)
+            try:
+                info = os.stat(ruta)
+            except OSError:
+                continue
+            entradas.append((ruta, info.st_size, info.st_mtime))
+    return entradas
+
+def _aplicar_limite():
+    """
+    Elimina las entradas menos usadas recientemente hasta respetar limite_cache_mb
+    """
+    entradas = sorted(_entradas(), key=lambda e: e[2])
+    total = sum(tamano for _, tamano, _ in entradas)
+    limite = limite_cache_mb * 1024 * 1024
+    for ruta, tamano, _ in entradas:
+        if total <= limite:
+            break
+        try:
+            os.remove(ruta)
+            total -= tamano
+        except OSError:
+            pass
+
+# ============================================================================
+# API
+# ============================================================================
+def leer_con_cache(ruta, opciones, lector):
+    """
+    Devuelve el DataFrame de la caché si el archivo y las opciones ya se leyeron;
+    si no, ejecuta el lector y guarda el resultado
+
+    Args:
+        ruta: Ruta del archivo de entrada
+        opciones: Diccionario con el nombre del lector y sus opciones
+        lector: Función sin argumentos que lee y devuelve el DataFrame
+
+    Returns:
+        Tupla (DataFrame, True si vino de la caché)
+    """
+    if not cache_activo:
+        return lector(), False
+
+    try:
+        directorio_privado(directorio_cache)
+        ruta_entrada = _ruta_entrada(clave_cache(ruta, opciones))
+    except OSError:
+        return lector(), False
+
+    if os.path.exists(ruta_entrada):
+        try:
+            df = _cargar(ruta_entrada)
+            # Marcar como usada recientemente (LRU por fecha de modificación)
+            os.utime(ruta_entrada, None)
+            return df, True
+        except Exception:
+            # Entrada corrupta: se descarta y se vuelve a leer
+            try:
+                os.remove(ruta_entrada)
+            except OSError:
+                pass
+
+    df = lector()
+    try:
+        _guardar(df, ruta_entrada)
+        _aplicar_limite()
+    except Exception:
+        # La caché nunca debe romper el procesamiento
+        pass
+    return df, False
+
+def limpiar_cache():
+    """
+    Elimina todas las entradas de la caché
+
+    Returns:
+        Tupla (archivos eliminados, MB liberados)
+    """
+    archivos = 0
+    liberado = 0
+    for ruta, tamano, _ in _entradas():
+        try:
+            os.remove(ruta)
+            archivos += 1
+            liberado += tamano
+        except OSError:
+            pass
+    return archivos, liberado / (1024 * 1024)
+
+def resumen_cache():
+    """
+    Resumen del estado de la caché
+
+    Returns:
+        Diccionario con directorio, entradas, tamaño en MB, límite y formato
+    """
+    entradas = _entradas()
+    return {
+        'directorio': directorio_cache,
+        'entradas': len(entradas),
+        'tamano_mb': round(sum(tamano for _, tamano, _ in entradas) / (1024 * 1024), 2),
+        'limite_mb': limite_cache_mb,
+        'formato': FORMATO_CACHE
+    }
@@ -0,0 +1,298 @@
+# Artefacto CIE-10 compilado - tabla del paso 3 y matriz del paso 4 en un directorio versionado y mapeable en memoria
+import pandas as pd
+import numpy as np
+import os
+import sys
+import json
+import time
+import hashlib
+import tempfile
+from cache_lecturas import huella_archivo, directorio_usuario
+from lectura_excel import leer_excel
+from matriz_codigos import construir_matriz_codigos
+from indice_cie10 import construir_indice
+from registro import obtener_logger
+
+logger = obtener_logger(__name__)
+
+# ============================================================================
+# CONFIGURACIÓN
+# ============================================================================
+# Cambiar cuando cambie la forma de compilar (invalida los artefactos existentes)
+VERSION_ARTEFACTO = 2
+
+# Directorio del artefacto: por defecto en la caché del usuario, fuera de la carpeta de
+# trabajo (se puede cambiar con la variable de entorno AUDITORIA_CIE10_COMPILADO)
+directorio_artefacto = (os.environ.get('AUDITORIA_CIE10_COMPILADO')
+                        or os.path.join(directorio_usuario, 'cie10_compilado'))
+
+# Columnas de la tabla CIE 10 que usa el paso 3
+COLUMNAS_TABLA = ['Código', 'Descripción', 'TIPO', 'Clasificación Sistemas JMC']
+
+# Secciones del artefacto (cada una con su propio manifiesto <sección>.json y la huella
+# de su fuente; los arreglos llevan la huella en el nombre):
+# 'tabla'  → Excel CIE 10 (paso 3): columnas de texto y el índice por código normalizado
+# 'matriz' → datos_numericos.csv (paso 4): Código y cada clasificación como entero
+
+# ============================================================================
+# FUNCIONES AUXILIARES
+# ============================================================================
+def _huella_seccion(seccion, ruta_fuente, opciones):
+    """
+    Huella de lo que define una sección: versión, contenido de la fuente y opciones
+    """
+    descripcion = json.dumps(
+        {'version': VERSION_ARTEFACTO, 'seccion': seccion,
+         'fuente': huella_archivo(ruta_fuente), 'opciones': opciones},
+        sort_keys=True, ensure_ascii=False
+    )
+    return hashlib.sha256(descripcion.encode('utf-8')).hexdigest()
+
+def _ruta_manifiesto(directorio, seccion):
+    return os.path.join(directorio, f"{seccion}.json")
+
+def _leer_manifiesto(directorio, seccion):
+    """
+    Registro de una sección (None si no existe, no se puede leer o es de otra versión)
+    """
+    try:
+        with open(_ruta_manifiesto(directorio, seccion), encoding='utf-8') as archivo:
+            registro = json.load(archivo)
+    except (OSError, ValueError):
+        return None
+    if not isinstance(registro, dict) or registro.get('version') != VERSION_ARTEFACTO:
+        return None
+    return registro
+
+def _ruta_arreglo(directorio, seccion, huella, nombre):
+    # La huella en el nombre: fuentes distintas de una sección no comparten archivos
+    return os.path.join(directorio, f"{seccion}__{huella[:16]}__{nombre}.npy")
+
+def _reemplazar(ruta, escribir, modo='wb', **opciones):
+    """
+    Escribe en un temporal propio del mismo directorio y lo mueve a ruta (reemplazo
+    atómico; dos procesos que escriben a la vez no comparten el temporal)
+    """
+    descriptor, temporal = tempfile.mkstemp(dir=os.path.dirname(ruta), suffix='.tmp')
+    try:
+        with os.fdopen(descriptor, modo, **opciones) as archivo:
+            escribir(archivo)
+        os.replace(temporal, ruta)
+    except BaseException:
+        try:
+            os.remove(temporal)
+        except OSError:
+            pass
+        raise
+
+def _texto_a_arreglo(serie):
+    """
+    Columna de texto como arreglo de ancho fijo (mapeable) más su máscara de nulos
+    """
+    nulos = serie.isna().to_numpy()
+    valores = serie.astype(object).where(~nulos, '').to_numpy(dtype=object)
+    return np.array(valores.tolist() or [''], dtype=str)[:len(valores)], nulos
+
+def _arreglo_a_texto(valores, nulos):
+    """
+    Inverso de _texto_a_arreglo: objetos str con NaN en los nulos
+    """
+    texto = np.asarray(valores).astype(object)
+    texto[np.asarray(nulos)] = np.nan
+    return texto
+
+def _compilar_tabla(ruta_cie10, columnas):
+    """
+    Arreglos de la sección 'tabla': cada columna (texto + nulos) y el índice
+    """
+    df_cie10 = leer_excel(ruta_cie10, columnas=columnas)
+    arreglos = {}
+    for i, col in enumerate(df_cie10.columns):
+        arreglos[f"columna{i}"], arreglos[f"columna{i}_nulos"] = _texto_a_arreglo(df_cie10[col])
+
+    if 'Código' in df_cie10.columns:
+        indice = construir_indice(df_cie10['Código'])
+        arreglos['indice_codigos'], arreglos['indice_codigos_nulos'] = _texto_a_arreglo(
+            pd.Series(indice['codigos'], dtype=object))
+        arreglos['indice_filas'] = indice['filas']
+        arreglos['indice_limites'] = indice['limites']
+    return arreglos, {'columnas': list(df_cie10.columns), 'filas': len(df_cie10)}
+
+def _compilar_matriz(ruta_codigos, lector):
+    """
+    Arreglos de la sección 'matriz': Código normalizado y todas las clasificaciones
+    como enteros (SIN_VALOR en las celdas vacías)
+    """
+    df_codigos = lector(ruta_codigos)
+    columnas = [col for col in df_codigos.columns if col != 'Código']
+    _, matriz = construir_matriz_codigos(df_codigos, columnas)
+    codigos, _ = _texto_a_arreglo(df_codigos['Código'])
+    return {'codigos': codigos, 'matriz': matriz}, {'columnas': list(df_codigos.columns), 'filas': len(df_codigos)}
+
+def _guardar_seccion(directorio, seccion, huella, ruta_fuente, arreglos, datos):
+    """
+    Escribe los arreglos de una sección y luego su manifiesto (reemplazo atómico de
+    cada archivo). Cada sección tiene su manifiesto: compilar 'tabla' y 'matriz' a la
+    vez no pierde ninguna de las dos
+    """
+    os.makedirs(directorio, exist_ok=True)
+    anterior = _leer_manifiesto(directorio, seccion)
+    sumas = {}
+    for nombre, arreglo in arreglos.items():
+        ruta = _ruta_arreglo(directorio, seccion, huella, nombre)
+        _reemplazar(ruta, lambda archivo: np.save(archivo, np.ascontiguousarray(arreglo), allow_pickle=False))
+        sumas[nombre] = huella_archivo(ruta)
+
+    registro = dict(datos, version=VERSION_ARTEFACTO, huella=huella,
+                    fuente=os.path.abspath(ruta_fuente), archivos=sumas)
+    _reemplazar(_ruta_manifiesto(directorio, seccion),
+                lambda archivo: json.dump(registro, archivo, ensure_ascii=False, indent=2),
+                modo='w', encoding='utf-8')
+
+    # Arreglos de la fuente anterior de la sección (ya no están en el manifiesto)
+    if anterior is not None and anterior.get('huella') != huella:
+        for nombre in anterior.get('archivos', {}):
+            try:
+                os.remove(_ruta_arreglo(directorio, seccion, anterior['huella'], nombre))
+            except OSError:
+                pass
+
+def _cargar_seccion(directorio, seccion, huella):
+    """
+    Arreglos de una sección mapeados en memoria, o None si falta, es de otra
+    fuente/versión o algún archivo no coincide con su suma
+    """
+    registro = _leer_manifiesto(directorio, seccion)
+    if registro is None or registro.get('huella') != huella:
+        return None
+    arreglos = {}
+    for nombre, suma in registro['archivos'].items():
+        ruta = _ruta_arreglo(directorio, seccion, huella, nombre)
+        # La suma detecta archivos a medio escribir o modificados
+        if not os.path.exists(ruta) or huella_archivo(ruta) != suma:
+            return None
+        arreglos[nombre] = np.load(ruta, mmap_mode='r', allow_pickle=False)
+    return arreglos, registro
+
+def _obtener_seccion(seccion, ruta_fuente, opciones, compilar, directorio=None):
+    """
+    Sección vigente del artefacto: la carga si coincide con la fuente y, si no (o si
+    está dañada), la vuelve a compilar. Si el directorio no se puede escribir se
+    usa lo compilado en memoria
+
+    Returns:
+        tuple: (arreglos, datos de la sección)
+    """
+    directorio = directorio_artefacto if directorio is None else directorio
+    inicio = time.perf_counter()
+    huella = _huella_seccion(seccion, ruta_fuente, opciones)
+
+    cargada = _cargar_seccion(directorio, seccion, huella)
+    if cargada is not None:
+        logger.debug(f"   🧱 CIE-10 compilado ({seccion}) cargado en {(time.perf_counter() - inicio) * 1000:.0f} ms")
+        return cargada
+
+    arreglos, datos = compilar()
+    try:
+        _guardar_seccion(directorio, seccion, huella, ruta_fuente, arreglos, datos)
+        cargada = _cargar_seccion(directorio, seccion, huella)
+    except OSError as e:
+        logger.warning(f"   ⚠️ No se pudo guardar el CIE-10 compilado en {directorio}: {e}")
+    logger.info(f"   🧱 CIE-10 compilado ({seccion}) desde {os.path.basename(str(ruta_fuente))} "
+                f"en {time.perf_counter() - inicio:.2f}s")
+    return cargada if cargada is not None else (arreglos, datos)
+
+# ============================================================================
+# API
+# ============================================================================
+def cargar_tabla_cie10(ruta_cie10, columnas=None, directorio=None):
+    """
+    Tabla CIE 10 del paso 3 desde el artefacto (se compila del Excel si hace falta)
+
+    Args:
+        ruta_cie10: Excel CIE 10
+        columnas: Columnas a cargar (None = COLUMNAS_TABLA)
+        directorio: Directorio del artefacto (None = directorio_artefacto)
+
+    Returns:
+        tuple: (df_cie10, indice)
+            df_cie10: Igual que leer_excel(ruta_cie10, columnas=columnas)
+            indice: Igual que construir_indice(df_cie10['Código']) (None si no hay 'Código')
+    """
+    columnas = COLUMNAS_TABLA if columnas is None else list(columnas)
+    arreglos, datos = _obtener_seccion(
+        'tabla', ruta_cie10, {'columnas': columnas},
+        lambda: _compilar_tabla(ruta_cie10, columnas), directorio
+    )
+
+    df_cie10 = pd.DataFrame({
+        col: _arreglo_a_texto(arreglos[f"columna{i}"], arreglos[f"columna{i}_nulos"])
+        for i, col in enumerate(datos['columnas'])
+    }, columns=datos['columnas'])
+
+    indice = None
+    if 'indice_filas' in arreglos:
+        indice = {
+            'codigos': pd.Index(_arreglo_a_texto(arreglos['indice_codigos'], arreglos['indice_codigos_nulos']),
+                                dtype=object),
+            'filas': np.asarray(arreglos['indice_filas']),
+            'limites': np.asarray(arreglos['indice_limites']),
+        }
+    return df_cie10, indice
+
+def cargar_matriz_codigos(ruta_codigos, lector, directorio=None):
+    """
+    Matriz de códigos del paso 4 desde el artefacto (se compila del CSV si hace falta)
+
+    Args:
+        ruta_codigos: CSV de la matriz de códigos (datos_numericos.csv)
+        lector: Función ruta → DataFrame con la columna 'Código' ya normalizada
+        directorio: Directorio del artefacto (None = directorio_artefacto)
+
+    Returns:
+        dict con 'columnas' (las del CSV), 'codigos' y 'matriz' (todas las columnas
+        menos 'Código', en el orden del CSV)
+    """
+    arreglos, datos = _obtener_seccion(
+        'matriz', ruta_codigos, {},
+        lambda: _compilar_matriz(ruta_codigos, lector), directorio
+    )
+    return {'columnas': datos['columnas'], 'codigos': arreglos['codigos'], 'matriz': arreglos['matriz']}
+
+def matriz_de_columnas(compilado, columnas):
+    """
+    Lo mismo que construir_matriz_codigos para las columnas pedidas, desde el artefacto
+
+    Returns:
+        tuple: (indice_codigos, matriz) como construir_matriz_codigos
+    """
+    columnas_matriz = [col for col in compilado['columnas'] if col != 'Código']
+    indice_codigos = {codigo: fila for fila, codigo in enumerate(compilado['codigos'].tolist()) if codigo}
+    matriz = np.ascontiguousarray(compilado['matriz'][:, [columnas_matriz.index(col) for col in columnas]])
+    return indice_codigos, matriz
+
+def compilar(ruta_cie10=None, ruta_codigos=None, lector_codigos=None, directorio=None):
+    """
+    Compila (o verifica) las dos secciones de una vez, p. ej. antes de desplegar
+
+    Returns:
+        dict sección → datos del manifiesto
+    """
+    resultado = {}
+    if ruta_cie10 is not None:
+        df_cie10, _ = cargar_tabla_cie10(ruta_cie10, directorio=directorio)
+        resultado['tabla'] = {'columnas': list(df_cie10.columns), 'filas': len(df_cie10)}
+    if ruta_codigos is not None:
+        compilado = cargar_matriz_codigos(ruta_codigos, lector_codigos, directorio=directorio)
+        resultado['matriz'] = {'columnas': compilado['columnas'], 'filas': len(compilado['codigos'])}
+    return resultado
+
+
+if __name__ == "__main__":
+    # python compilar_cie10.py "CIE 10 - AJUSTADO - NÓMINA.xlsx" [datos_numericos.csv]
+    from auditoria_ausentismos_part4 import leer_tabla_codigos, RUTA_CODIGOS_CSV
+
+    ruta_excel = sys.argv[1] if len(sys.argv) > 1 else None
+    ruta_csv = sys.argv[2] if len(sys.argv) > 2 else RUTA_CODIGOS_CSV
+    for seccion, datos in compilar(ruta_excel, ruta_csv, leer_tabla_codigos).items():
+        print(f"✅ {seccion}: {datos['filas']} filas | columnas: {datos['columnas']} → {directorio_artefacto}")
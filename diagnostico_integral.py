@@ -3,6 +3,7 @@ Script de diagnóstico para validación de Integral
 """
 import pandas as pd
 import os
+from reglas_validacion import clasificar_relacion, CODIGOS_PROHIBIDOS_INTEGRAL
 
 print("="*80)
 print("DIAGNÓSTICO DE VALIDACIÓN INTEGRAL")
@@ -31,15 +32,17 @@ try:
         print("   ✗ Columna 'homologacion_clase_de_ausentismo_ssf_vs_sap' NO existe")
         print(f"   Columnas disponibles: {list(df.columns)}")
 
-    # Verificar valores de Relación laboral
+    # Verificar valores de Relación laboral y la clase que se le asigna a cada uno
     print("\n3. Valores únicos en 'Relación laboral':")
+    clase_relacion = clasificar_relacion(df['Relación laboral'])
+    clase_por_valor = clase_relacion.astype(str).groupby(df['Relación laboral']).first()
     valores_rel_laboral = df['Relación laboral'].value_counts()
     for valor, cantidad in valores_rel_laboral.items():
-        print(f"   - '{valor}': {cantidad} registros")
+        print(f"   - '{valor}': {cantidad} registros → {clase_por_valor[valor]}")
 
-    # Filtrar Integral
+    # Filtrar Integral (comparación con la clase, no con el texto)
     print("\n4. Filtrando registros con 'Integral'...")
-    df_integral = df[df['Relación laboral'].str.contains('Integral', case=False, na=False)].copy()
+    df_integral = df[(clase_relacion == 'INTEGRAL').to_numpy()].copy()
     print(f"   ✓ Registros con Integral: {len(df_integral):,}")
 
     if len(df_integral) > 0:
@@ -53,10 +56,8 @@ try:
         for codigo, cantidad in codigos_unicos.items():
             print(f"      {codigo}: {cantidad} registros")
 
-        # Códigos prohibidos
-        codigos_prohibidos = [380, 330, 291, 204, 202, 215, 210, 220, 200,
-                              281, 280, 340, 345, 305, 398, 302, 300, 191,
-                              310, 190, 232, 250, 230, 381, 198]
+        # Códigos prohibidos (registro de reglas)
+        codigos_prohibidos = CODIGOS_PROHIBIDOS_INTEGRAL
 
         print(f"\n6. Buscando códigos prohibidos...")
         print(f"   Códigos prohibidos: {codigos_prohibidos}")
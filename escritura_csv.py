@@ -0,0 +1,313 @@
+# Escritura de CSV entregables - fechas DD/MM/AAAA formateadas en bloque, sin copiar el DataFrame
+import pandas as pd
+import numpy as np
+import os
+import zipfile
+from io import BytesIO
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# ============================================================================
+# CONFIGURACIÓN
+# ============================================================================
+# Columnas que se escriben como texto DD/MM/AAAA
+COLUMNAS_FECHA = ['start_date', 'end_date', 'last_approval_status_date', 'modificado_el', 'fse_fechas']
+FORMATO_FECHA = '%d/%m/%Y'
+
+# Hilos que serializan los CSV que van al ZIP (AUDITORIA_HILOS_ESCRITURA)
+hilos_escritura = int(os.environ.get('AUDITORIA_HILOS_ESCRITURA', '4'))
+
+# CSV ya serializados que pueden esperar su turno de entrar al ZIP, en MB
+# (AUDITORIA_BUFFER_ZIP_MB); al superarlo no se envían más hasta que entren los primeros
+limite_buffer_mb = float(os.environ.get('AUDITORIA_BUFFER_ZIP_MB', '256'))
+
+# ============================================================================
+# FUNCIONES AUXILIARES
+# ============================================================================
+def _fecha_como_texto(serie):
+    """
+    Columna de fechas como texto DD/MM/AAAA; cada fecha distinta se formatea una sola
+    vez y los vacíos quedan vacíos (se escriben igual que NaT)
+
+    Returns:
+        Series object, o None si la columna no tiene fechas que formatear (texto, números)
+    """
+    if pd.api.types.is_datetime64_any_dtype(serie.dtype):
+        posiciones, unicas = pd.factorize(serie)
+        textos = np.append(pd.DatetimeIndex(unicas).strftime(FORMATO_FECHA).to_numpy(dtype=object), np.nan)
+        return pd.Series(textos[posiciones], index=serie.index, name=serie.name)
+    if serie.dtype == object:
+        # Columna mixta (fechas sueltas entre textos): se formatea valor por valor
+        return serie.apply(
+            lambda x: x.strftime(FORMATO_FECHA) if pd.notna(x) and hasattr(x, 'strftime') else x
+        )
+    return None
+
+def _vista_con_fechas(df, fechas):
+    """
+    df con las columnas de fecha como texto, sin copiarlo (assign reemplaza solo esas
+    columnas en la vista que se escribe)
+    """
+    # La base solo sirve si las filas de df se pueden ubicar en ella por índice
+    if fechas is not None and not df.index.is_unique:
+        fechas = None
+
+    textos = {}
+    for col in COLUMNAS_FECHA:
+        if col not in df.columns:
+            continue
+        if fechas is not None and col in fechas:
+            textos[col] = fechas[col].reindex(df.index)
+        elif fechas is None:
+            texto = _fecha_como_texto(df[col])
+            if texto is not None:
+                textos[col] = texto
+    return df.assign(**textos) if textos else df
+
+def _serializar_csv(df):
+    """
+    Contenido del CSV entregable (mismos bytes que guardar_csv_con_fechas en disco)
+    """
+    buffer = BytesIO()
+    df.to_csv(buffer, index=False, encoding='utf-8-sig', sep=';')
+    return buffer.getvalue()
+
+# ============================================================================
+# API
+# ============================================================================
+def fechas_como_texto(df):
+    """
+    Base formateada común: las columnas de fecha de df ya como texto, para escribir
+    varios subconjuntos de df (las alertas) sin volver a formatear cada uno
+
+    Returns:
+        dict columna → Series de texto (con el índice de df)
+    """
+    textos = {}
+    for col in COLUMNAS_FECHA:
+        if col in df.columns:
+            texto = _fecha_como_texto(df[col])
+            if texto is not None:
+                textos[col] = texto
+    return textos
+
+def guardar_csv_con_fechas(df, ruta_archivo, fechas=None):
+    """
+    Guarda un DataFrame a CSV con fechas en formato DD/MM/YYYY como texto. Las
+    columnas formateadas se reemplazan solo en la vista que se escribe: df no se
+    copia ni se modifica
+
+    Args:
+        df: DataFrame a guardar
+        ruta_archivo: Ruta del archivo CSV de salida (None = no se guarda)
+        fechas: Base de fechas_como_texto de un DataFrame del que df es un subconjunto
+                de filas (None = se formatea df)
+
+    Returns:
+        Ruta del CSV escrito (para .xlsx, la del .csv hermano) o None
+    """
+    if ruta_archivo is None:
+        return None
+
+    df_export = _vista_con_fechas(df, fechas)
+
+    # Guardar como CSV
+    df_export.to_csv(ruta_archivo, index=False, encoding='utf-8-sig', sep=';')
+
+    # Para Excel, cambiar extensión de .xlsx a .csv
+    if ruta_archivo.endswith('.xlsx'):
+        ruta_csv = ruta_archivo.replace('.xlsx', '.csv')
+        df_export.to_csv(ruta_csv, index=False, encoding='utf-8-sig', sep=';')
+        return ruta_csv
+
+    return ruta_archivo
+
+class SalidaZip:
+    """
+    ZIP en memoria que recibe DataFrames y archivos ya escritos en disco. Los
+    DataFrames se serializan a CSV en un pool de hilos y cada hilo pasa su resultado
+    directo al ZIP (sin archivo intermedio) en cuanto le llega el turno: las entradas
+    quedan en el mismo orden en que se agregaron.
+
+    Memoria: cada entrada toma un cupo antes de ir al pool y lo devuelve al entrar al
+    ZIP, y hay un cupo por hilo. Además un CSV solo se envía si los que esperan turno
+    más los que se están serializando (estimados por el tamaño medio de los ya
+    escritos) caben en limite_mb; si no hay ninguno en curso se envía igual, así que
+    un CSV más grande que el límite pasa solo. agregar_* se bloquea hasta que se
+    cumplan las dos cosas: nada se acumula entre llamadas ni después de la última.
+
+    Se usa como context manager (o con cerrar()/descartar() en un finally): si algo
+    falla antes de cerrar, los hilos y el ZIP se liberan igual. Un error al
+    serializar un CSV o al leer un archivo salta en cerrar(), en el orden de las
+    entradas.
+    """
+
+    def __init__(self, hilos=None, limite_mb=None):
+        """
+        Args:
+            hilos: Hilos de serialización y cupos de memoria (None = hilos_escritura)
+            limite_mb: Límite de los CSV en memoria, en MB (None = limite_buffer_mb)
+        """
+        self._hilos = max(int(hilos_escritura if hilos is None else hilos), 1)
+        self._limite = (limite_buffer_mb if limite_mb is None else limite_mb) * 1024 * 1024
+        self._buffer = BytesIO()
+        self._zip = zipfile.ZipFile(self._buffer, 'w', zipfile.ZIP_DEFLATED)
+        self._ejecutor = None
+        self._cupos = threading.Semaphore(self._hilos)
+        # Turno de escritura en el ZIP: número de la próxima entrada, entradas agregadas,
+        # bytes serializados que esperan su turno, CSV que se están serializando y lo ya
+        # escrito (para estimar el tamaño de los que están en curso)
+        self._turno = threading.Condition()
+        self._siguiente = 0
+        self._agregadas = 0
+        self._retenido = 0
+        self._serializando = 0
+        self._bytes_escritos = 0
+        self._csv_escritos = 0
+        self._futuros = []
+        self._cerrado = False
+        self._descartado = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, tipo, valor, traza):
+        if tipo is None:
+            self.cerrar()
+        else:
+            self.descartar()
+        return False
+
+    def _escribir(self, numero, nombre, ruta, vista):
+        """
+        Tarea del pool: serializa la vista (si es un DataFrame), espera el turno de la
+        entrada y la escribe en el ZIP; al terminar devuelve el cupo
+        """
+        datos, error = b'', None
+        try:
+            if vista is not None:
+                datos = _serializar_csv(vista)
+        except Exception as e:
+            error = e
+
+        with self._turno:
+            if vista is not None:
+                self._serializando -= 1
+            self._retenido += len(datos)
+            while self._siguiente != numero and not self._descartado:
+                self._turno.wait()
+            escribir = error is None and not self._descartado
+
+        # Con el turno tomado nadie más escribe en el ZIP: el deflate va fuera del lock
+        try:
+            if escribir:
+                if ruta is not None:
+                    self._zip.write(ruta, nombre)
+                else:
+                    self._zip.writestr(nombre, datos)
+        except Exception as e:
+            error = e
+        finally:
+            with self._turno:
+                self._retenido -= len(datos)
+                if escribir and ruta is None:
+                    self._bytes_escritos += len(datos)
+                    self._csv_escritos += 1
+                self._siguiente += 1
+                self._turno.notify_all()
+            self._cupos.release()
+        if error is not None:
+            raise error
+
+    def _estimado(self):
+        """
+        Tamaño estimado de un CSV en curso: la media de los escritos (el límite entero
+        mientras no hay ninguno, así el primero va solo)
+        """
+        if self._csv_escritos == 0:
+            return self._limite
+        return self._bytes_escritos / self._csv_escritos
+
+    def _enviar(self, nombre, ruta=None, vista=None):
+        """
+        Espera un cupo y que el CSV quepa en limite_mb junto a los que están en memoria,
+        y envía la entrada al pool
+        """
+        if self._cerrado:
+            raise ValueError("SalidaZip ya cerrada")
+        self._cupos.acquire()
+        with self._turno:
+            if vista is not None:
+                while (self._agregadas > self._siguiente and
+                       self._retenido + (self._serializando + 1) * self._estimado() > self._limite):
+                    self._turno.wait()
+                self._serializando += 1
+            numero = self._agregadas
+            self._agregadas += 1
+        if self._ejecutor is None:
+            self._ejecutor = ThreadPoolExecutor(max_workers=self._hilos)
+        self._futuros.append(self._ejecutor.submit(self._escribir, numero, nombre, ruta, vista))
+
+    def agregar_csv(self, df, nombre, fechas=None):
+        """
+        Agrega df como CSV entregable (mismo contenido que guardar_csv_con_fechas);
+        espera si ya hay un CSV en memoria por hilo
+
+        Args:
+            df: DataFrame a agregar (no se modifica; no cambiarlo hasta cerrar)
+            nombre: Nombre del archivo dentro del ZIP
+            fechas: Base de fechas_como_texto (ver guardar_csv_con_fechas)
+        """
+        self._enviar(nombre, vista=_vista_con_fechas(df, fechas))
+
+    def agregar_archivo(self, ruta, nombre=None):
+        """
+        Agrega un archivo ya escrito en disco (nombre = su nombre base)
+        """
+        self._enviar(nombre or os.path.basename(ruta), ruta=ruta)
+
+    def _liberar(self):
+        """
+        Detiene los hilos (cancelando lo que no empezó) y cierra el ZIP
+        """
+        self._cerrado = True
+        try:
+            if self._ejecutor is not None:
+                self._ejecutor.shutdown(cancel_futures=True)
+        finally:
+            self._zip.close()
+
+    def cerrar(self):
+        """
+        Espera las entradas pendientes y cierra el ZIP (llamarla de nuevo no hace nada)
+
+        Returns:
+            bytes del ZIP
+        """
+        if not self._cerrado:
+            try:
+                # La primera entrada que falló, en el orden en que se agregaron
+                for futuro in self._futuros:
+                    futuro.result()
+            finally:
+                if not all(futuro.done() for futuro in self._futuros):
+                    self._descartar_turnos()
+                self._liberar()
+        return self._buffer.getvalue()
+
+    def _descartar_turnos(self):
+        """
+        Las tareas que esperan turno terminan sin escribir (las canceladas nunca lo darían)
+        """
+        with self._turno:
+            self._descartado = True
+            self._turno.notify_all()
+
+    def descartar(self):
+        """
+        Libera los hilos y el ZIP sin escribir las entradas pendientes (no hace nada si
+        ya se cerró)
+        """
+        if not self._cerrado:
+            self._descartar_turnos()
+            self._liberar()
@@ -0,0 +1,191 @@
+# Estado del análisis de ventanas entre ejecuciones - solo se recalculan los IDs que cambiaron
+import pandas as pd
+import numpy as np
+import os
+import json
+import hashlib
+import tempfile
+from cache_lecturas import huella_archivo
+
+# ============================================================================
+# CONFIGURACIÓN
+# ============================================================================
+# Cambiar cuando cambie la forma de armar el reporte (invalida los estados guardados)
+VERSION_ESTADO = 2
+
+# Índice del estado dentro de su carpeta: configuración, IDs y nombres de los archivos
+# de huellas (.npy) y de reportes (.parquet) de la última ejecución
+MANIFIESTO = 'estado.json'
+
+# Columnas de las que depende la fila de un ID en el reporte
+COLUMNAS_HUELLA = [
+    'id_personal',
+    'descripcion_general_external_code',
+    'external_name_label',
+    'cie10_descripcion',
+    'start_date',
+    'end_date',
+    'last_approval_status_date',
+]
+
+# ============================================================================
+# FUNCIONES AUXILIARES
+# ============================================================================
+def _combinar(*columnas):
+    """
+    Hash uint64 de cada fila formada por las columnas dadas
+    """
+    return pd.util.hash_pandas_object(
+        pd.DataFrame({str(i): columna for i, columna in enumerate(columnas)}), index=False
+    ).to_numpy()
+
+def _archivo_temporal(directorio, sufijo):
+    """
+    Archivo nuevo con nombre único en la carpeta del estado (dos ejecuciones no lo comparten)
+    """
+    descriptor, ruta = tempfile.mkstemp(dir=directorio, suffix=sufijo)
+    os.close(descriptor)
+    return ruta
+
+def _eliminar(rutas):
+    for ruta in rutas:
+        try:
+            os.remove(ruta)
+        except OSError:
+            pass
+
+def _leer_manifiesto(directorio):
+    with open(os.path.join(directorio, MANIFIESTO), encoding='utf-8') as archivo:
+        return json.load(archivo)
+
+# ============================================================================
+# API
+# ============================================================================
+def huella_configuracion(ruta_codigos, **valores):
+    """
+    Huella de todo lo que no depende de las filas: archivo de códigos (contenido),
+    ponderaciones, ventanas, códigos incluidos, etc. Si cambia, se recalcula todo
+
+    Args:
+        ruta_codigos: CSV de la matriz de códigos
+        **valores: Configuración del análisis (valores serializables en JSON)
+
+    Returns:
+        String hexadecimal
+    """
+    descripcion = json.dumps(
+        {'version': VERSION_ESTADO, 'codigos': huella_archivo(ruta_codigos), 'valores': valores},
+        sort_keys=True, ensure_ascii=False, default=str
+    )
+    return hashlib.sha256(descripcion.encode('utf-8')).hexdigest()
+
+def huellas_por_id(df_ausentismos, anclas, filas_ventana, limites):
+    """
+    Huella de cada ID a partir de su fila ancla y las filas de su ventana (en orden).
+    Con la ventana mayor alcanza para todas: las menores son su cola
+
+    Args:
+        df_ausentismos: Filas candidatas (las mismas posiciones que usó ubicar_ventanas)
+        anclas, filas_ventana, limites: Resultado de ubicar_ventanas para la ventana mayor
+
+    Returns:
+        np.ndarray uint64 con una huella por ID (los IDs sin filas quedan en 0)
+    """
+    hash_filas = pd.util.hash_pandas_object(df_ausentismos[COLUMNAS_HUELLA], index=False).to_numpy()
+    largo = np.diff(limites)
+
+    # Cada fila de ventana pesa junto con su lugar en la ventana; la suma (con desborde)
+    # por ID sale de la suma acumulada
+    posicion = np.arange(len(filas_ventana)) - np.repeat(limites[:-1], largo)
+    hash_ventana = _combinar(hash_filas[filas_ventana], posicion)
+    acumulado = np.concatenate(([np.uint64(0)], np.cumsum(hash_ventana, dtype=np.uint64)))
+    suma_ventana = acumulado[limites[1:]] - acumulado[limites[:-1]]
+
+    hash_ancla = np.where(anclas >= 0, hash_filas[np.maximum(anclas, 0)], np.uint64(0))
+    return np.where(anclas >= 0, _combinar(hash_ancla, suma_ventana, largo), np.uint64(0))
+
+def cargar_estado(ruta, configuracion):
+    """
+    Lee el estado de la ejecución anterior (solo JSON, .npy sin objetos y parquet:
+    nada del estado ejecuta código al cargarse)
+
+    Args:
+        ruta: Carpeta del estado
+        configuracion: huella_configuracion de la ejecución actual
+
+    Returns:
+        dict con 'huellas' (Series id → huella) y 'reportes' (días → DataFrame), o None
+        si no hay estado, no se puede leer o la configuración cambió
+    """
+    if not ruta or not os.path.isdir(ruta):
+        return None
+    try:
+        manifiesto = _leer_manifiesto(ruta)
+        if manifiesto.get('version') != VERSION_ESTADO or manifiesto.get('configuracion') != configuracion:
+            return None
+        huellas = np.load(os.path.join(ruta, manifiesto['huellas']), allow_pickle=False)
+        reportes = {int(dias): pd.read_parquet(os.path.join(ruta, archivo))
+                    for dias, archivo in manifiesto['reportes'].items()}
+    except Exception:
+        return None
+    return {
+        'configuracion': configuracion,
+        'huellas': pd.Series(huellas, index=pd.Index(manifiesto['ids'])),
+        'reportes': reportes,
+    }
+
+def guardar_estado(ruta, configuracion, ids, huellas, reportes):
+    """
+    Guarda el estado para la próxima ejecución
+
+    Huellas y reportes se escriben en archivos de nombre único y el manifiesto se
+    reemplaza al final de forma atómica: una lectura ve el estado anterior o el nuevo
+    completo, y dos ejecuciones simultáneas no se pisan los archivos
+
+    Args:
+        ruta: Carpeta del estado (se crea si no existe)
+        configuracion: huella_configuracion de esta ejecución
+        ids, huellas: IDs del reporte y su huella
+        reportes: dict días → DataFrame del reporte
+    """
+    if os.path.isfile(ruta):
+        # Estado de la versión 1 (un solo pickle en esta ruta): se reemplaza por la carpeta
+        os.remove(ruta)
+    os.makedirs(ruta, exist_ok=True)
+    try:
+        anterior = _leer_manifiesto(ruta)
+        anteriores = [anterior['huellas'], *anterior['reportes'].values()]
+    except Exception:
+        anteriores = []
+
+    nuevos = []
+    try:
+        ruta_huellas = _archivo_temporal(ruta, '.npy')
+        nuevos.append(ruta_huellas)
+        np.save(ruta_huellas, np.asarray(huellas, dtype=np.uint64), allow_pickle=False)
+        archivos_reportes = {}
+        for dias, df_reporte in reportes.items():
+            ruta_reporte = _archivo_temporal(ruta, '.parquet')
+            nuevos.append(ruta_reporte)
+            df_reporte.to_parquet(ruta_reporte, index=False)
+            archivos_reportes[str(dias)] = os.path.basename(ruta_reporte)
+
+        manifiesto = {
+            'version': VERSION_ESTADO,
+            'configuracion': configuracion,
+            'ids': pd.Index(ids).tolist(),
+            'huellas': os.path.basename(ruta_huellas),
+            'reportes': archivos_reportes,
+        }
+        ruta_manifiesto = _archivo_temporal(ruta, '.json')
+        nuevos.append(ruta_manifiesto)
+        with open(ruta_manifiesto, 'w', encoding='utf-8') as archivo:
+            json.dump(manifiesto, archivo, ensure_ascii=False)
+        os.replace(ruta_manifiesto, os.path.join(ruta, MANIFIESTO))
+    except BaseException:
+        _eliminar(nuevos)
+        raise
+
+    # Los archivos del estado anterior ya no están en el manifiesto
+    _eliminar(os.path.join(ruta, archivo) for archivo in anteriores
+              if archivo not in manifiesto['reportes'].values() and archivo != manifiesto['huellas'])
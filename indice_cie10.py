@@ -0,0 +1,147 @@
+# Índice CIE-10 - búsqueda de códigos de diagnóstico por código distinto, con respaldo por categoría o prefijo
+import pandas as pd
+import numpy as np
+
+# ============================================================================
+# CONFIGURACIÓN
+# ============================================================================
+# Modos de búsqueda:
+# 'exacto'    → solo el código normalizado completo (como el merge de siempre)
+# 'categoria' → si no está, la categoría de 3 caracteres (J00X → J00)
+# 'prefijo'   → si no está, el prefijo más largo que esté en la tabla (sin bajar de
+#               la categoría: J0 o J no se aceptan)
+EXACTO = 'exacto'
+CATEGORIA = 'categoria'
+PREFIJO = 'prefijo'
+MODOS_BUSQUEDA = (EXACTO, CATEGORIA, PREFIJO)
+
+# Largo de la categoría CIE-10 (letra + dos dígitos)
+LARGO_CATEGORIA = 3
+
+# Posición de los códigos que no están en la tabla
+SIN_COINCIDENCIA = -1
+
+# ============================================================================
+# FUNCIONES AUXILIARES
+# ============================================================================
+def _buscar_prefijos(codigos_indice, codigos, posiciones, nivel, modo):
+    """
+    Completa posiciones y nivel de los códigos sin coincidencia exacta, del prefijo
+    más largo al más corto permitido (un get_indexer por largo, solo con los pendientes)
+    """
+    largos = pd.Series(codigos, dtype=object).str.len().fillna(0).to_numpy(dtype=np.int64)
+    maximo = LARGO_CATEGORIA if modo == CATEGORIA else int(largos.max(initial=0)) - 1
+
+    for largo in range(maximo, LARGO_CATEGORIA - 1, -1):
+        pendientes = np.flatnonzero((posiciones == SIN_COINCIDENCIA) & (largos > largo))
+        if len(pendientes) == 0:
+            continue
+        prefijos = pd.Series(codigos[pendientes], dtype=object).str[:largo]
+        halladas = codigos_indice.get_indexer(prefijos)
+        con_prefijo = halladas != SIN_COINCIDENCIA
+        posiciones[pendientes[con_prefijo]] = halladas[con_prefijo]
+        nivel[pendientes[con_prefijo]] = modo
+
+# ============================================================================
+# API
+# ============================================================================
+def normalizar_codigo(codigos):
+    """
+    Código como se compara: sin espacios alrededor, sin '*' y en mayúsculas (se limpia
+    cada código distinto una vez; los vacíos quedan NaN)
+    """
+    grupo, unicos = pd.factorize(codigos)
+    limpios = pd.Series(unicos, dtype=object).str.strip().str.replace('*', '', regex=False).str.upper()
+    return pd.Series(np.append(limpios.to_numpy(dtype=object), np.nan)[grupo],
+                     index=codigos.index, name=codigos.name, dtype=object)
+
+def construir_indice(codigos_tabla):
+    """
+    Índice de la tabla CIE-10 por código normalizado
+
+    Args:
+        codigos_tabla: Columna 'Código' de la tabla CIE-10 (sin normalizar)
+
+    Returns:
+        dict con:
+            'codigos': pd.Index de los códigos normalizados distintos (búsqueda por hash;
+                       el vacío también es un código, como en el merge)
+            'filas': filas de la tabla agrupadas por código, en su orden original
+            'limites': las filas del código i son filas[limites[i]:limites[i + 1]]
+    """
+    grupo, codigos = pd.factorize(normalizar_codigo(codigos_tabla), use_na_sentinel=False)
+    return {
+        'codigos': pd.Index(codigos, dtype=object),
+        'filas': np.argsort(grupo, kind='stable'),
+        'limites': np.concatenate(([0], np.cumsum(np.bincount(grupo, minlength=len(codigos))))),
+    }
+
+def buscar_codigos(indice, codigos, modo=EXACTO):
+    """
+    Código del índice de cada código buscado; cada código distinto se busca una sola
+    vez y el resultado se reparte a las filas
+
+    Args:
+        indice: Resultado de construir_indice
+        codigos: Códigos ya normalizados (Series)
+        modo: 'exacto', 'categoria' o 'prefijo' (ver MODOS_BUSQUEDA)
+
+    Returns:
+        tuple: (posiciones, nivel)
+            posiciones: np.ndarray con la posición en indice['codigos'] (SIN_COINCIDENCIA
+                        si no está)
+            nivel: np.ndarray object con el modo que encontró cada código ('' si no está)
+    """
+    if modo not in MODOS_BUSQUEDA:
+        raise ValueError(f"Modo de búsqueda CIE-10 no soportado: {modo}")
+
+    grupo, unicos = pd.factorize(pd.Series(codigos, dtype=object), use_na_sentinel=False)
+    unicos = np.asarray(unicos, dtype=object)
+    posiciones = indice['codigos'].get_indexer(unicos)
+    nivel = np.where(posiciones != SIN_COINCIDENCIA, EXACTO, '').astype(object)
+
+    if modo != EXACTO:
+        _buscar_prefijos(indice['codigos'], unicos, posiciones, nivel, modo)
+
+    return posiciones[grupo], nivel[grupo]
+
+def cruzar_con_tabla(df, posiciones, indice, df_tabla, sufijo='_cie10'):
+    """
+    Unión LEFT de df con la tabla según las posiciones de buscar_codigos: mismas filas,
+    orden, columnas y tipos que pd.merge(how='left') con la llave ya resuelta (un
+    código repetido en la tabla repite la fila de df)
+
+    Args:
+        df: DataFrame de la izquierda (una posición por fila)
+        posiciones: Resultado de buscar_codigos para las filas de df
+        indice: Índice de la tabla
+        df_tabla: Columnas de la tabla a agregar (mismas filas que al construir el índice)
+        sufijo: Sufijo de las columnas de la tabla que ya existen en df
+
+    Returns:
+        DataFrame nuevo con índice 0..n-1
+    """
+    limites = indice['limites']
+    encontradas = posiciones != SIN_COINCIDENCIA
+    cantidad = np.ones(len(posiciones), dtype=np.int64)
+    cantidad[encontradas] = np.diff(limites)[posiciones[encontradas]]
+
+    # Cada fila de df se repite una vez por fila de su código en la tabla
+    fila_izquierda = np.repeat(np.arange(len(df)), cantidad)
+    desplazamiento = np.arange(len(fila_izquierda)) - np.repeat(np.cumsum(cantidad) - cantidad, cantidad)
+    posicion_fila = posiciones[fila_izquierda]
+    con_tabla = posicion_fila != SIN_COINCIDENCIA
+    fila_tabla = np.full(len(fila_izquierda), -1, dtype=np.int64)
+    fila_tabla[con_tabla] = indice['filas'][limites[posicion_fila[con_tabla]] + desplazamiento[con_tabla]]
+
+    if len(fila_izquierda) == len(df):
+        izquierda = df.reset_index(drop=True)
+    else:
+        izquierda = df.take(fila_izquierda).reset_index(drop=True)
+
+    derecha = {
+        (col + sufijo if col in df.columns else col):
+            pd.api.extensions.take(df_tabla[col].array, fila_tabla, allow_fill=True)
+        for col in df_tabla.columns
+    }
+    return izquierda.assign(**derecha)
@@ -0,0 +1,180 @@
+# Intercambio entre pasos - CSV, intermedio parquet tipado o el DataFrame del paso anterior en memoria
+import pandas as pd
+import os
+import time
+from registro import obtener_logger
+
+logger = obtener_logger(__name__)
+
+# ============================================================================
+# CONFIGURACIÓN
+# ============================================================================
+# Valor por defecto de los parámetros de cada paso: "usar la variable del módulo"
+# (None ya tiene significado propio, p. ej. "sin filtro" o "no guardar")
+DESDE_MODULO = object()
+
+# Formato de las salidas que consume el paso siguiente (variable de entorno
+# AUDITORIA_FORMATO_INTERMEDIO):
+# 'csv'     → como siempre: <archivo>.csv
+# 'parquet' → <archivo>.parquet con los tipos de pandas (fechas como datetime, números
+#             como números); el paso siguiente lo lee sin interpretar texto. Los CSV
+#             quedan para los entregables finales (alertas y reportes del paso 4)
+formato_intermedio = os.environ.get('AUDITORIA_FORMATO_INTERMEDIO', 'csv').lower()
+
+FORMATOS_INTERMEDIO = ['csv', 'parquet']
+
+# Columnas que read_csv deja como número y de las que dependen los pasos (orden por
+# id_personal, filtros por código de homologación, días): al recibir el DataFrame en
+# memoria se convierten igual si todos sus valores son números
+COLUMNAS_NUMERICAS = ['id_personal', 'quantity_in_days', 'calendar_days',
+                      'homologacion_clase_de_ausentismo_ssf_vs_sap']
+
+# ============================================================================
+# FUNCIONES AUXILIARES
+# ============================================================================
+def tomar_de_modulo(config_modulo, **valores):
+    """
+    Resuelve los parámetros de un paso: los que llegan como DESDE_MODULO se toman de
+    las variables del módulo (como cuando app.py las asignaba antes de llamar al paso)
+
+    Args:
+        config_modulo: globals() del módulo del paso
+        **valores: Parámetros recibidos por la función
+
+    Returns:
+        Tupla con los valores en el mismo orden
+    """
+    return tuple(config_modulo[nombre] if valor is DESDE_MODULO else valor
+                 for nombre, valor in valores.items())
+
+def _como_numero(serie):
+    """
+    Columna como número si todos sus valores lo son (enteros con vacíos → float, como
+    read_csv); si no, la misma columna
+    """
+    if pd.api.types.is_numeric_dtype(serie) or pd.api.types.is_datetime64_any_dtype(serie):
+        return serie
+    numeros = pd.to_numeric(serie, errors='coerce')
+    return numeros if numeros.notna().sum() == serie.notna().sum() else serie
+
+def _tipar(df, dtype):
+    """
+    Tipos de un DataFrame ya tipado (en memoria o parquet) frente a lo que pide el paso:
+    las COLUMNAS_NUMERICAS que lleguen como texto pasan a número y se aplica 'dtype'.
+    Con dtype=str las fechas se conservan como datetime (el paso las recibe ya
+    interpretadas en vez de volver a parsear su texto)
+    """
+    # Índice 0..n-1 como al leer el CSV (sin copiar los datos)
+    df = df.reset_index(drop=True)
+    if isinstance(dtype, dict):
+        dtype = {col: tipo for col, tipo in dtype.items() if col in df.columns}
+    elif dtype is not None:
+        dtype = {col: dtype for col in df.columns if not pd.api.types.is_datetime64_any_dtype(df[col])}
+    df = columnas_como_numero(df, [col for col in COLUMNAS_NUMERICAS if col not in (dtype or {})])
+    return df.astype(dtype) if dtype else df
+
+def _validar_formato():
+    if formato_intermedio not in FORMATOS_INTERMEDIO:
+        raise ValueError(f"Formato intermedio no soportado: {formato_intermedio}")
+
+# ============================================================================
+# API
+# ============================================================================
+def columnas_como_numero(df, columnas=COLUMNAS_NUMERICAS):
+    """
+    Convierte a número las columnas que lleguen como texto con solo números (como las
+    dejaría read_csv); las que falten en df se ignoran
+
+    Args:
+        df: DataFrame (no se modifica)
+        columnas: Columnas a revisar (por defecto COLUMNAS_NUMERICAS)
+
+    Returns:
+        DataFrame con las columnas convertidas
+    """
+    columnas = [col for col in columnas if col in df.columns]
+    if not columnas:
+        return df
+    return df.assign(**{col: _como_numero(df[col]) for col in columnas})
+
+def ruta_intermedia(ruta_csv):
+    """
+    Ruta del intermedio parquet de un CSV (mismo nombre, extensión .parquet)
+    """
+    return os.path.splitext(str(ruta_csv))[0] + '.parquet'
+
+def ruta_paso(ruta_csv):
+    """
+    Ruta que escribe guardar_paso para ruta_csv con el formato intermedio vigente
+    """
+    _validar_formato()
+    return ruta_intermedia(ruta_csv) if formato_intermedio == 'parquet' else ruta_csv
+
+def ruta_lectura(ruta):
+    """
+    Archivo que leerá leer_paso para ruta: con formato intermedio parquet, el .parquet
+    de un CSV si existe y no es más antiguo que el CSV; si no, la misma ruta
+    """
+    ruta = str(ruta)
+    if ruta.lower().endswith('.parquet') or ruta_paso(ruta) == ruta:
+        return ruta
+    intermedio = ruta_intermedia(ruta)
+    if os.path.exists(intermedio) and (not os.path.exists(ruta)
+                                       or os.path.getmtime(intermedio) >= os.path.getmtime(ruta)):
+        return intermedio
+    return ruta
+
+def guardar_paso(df, ruta_csv, **opciones_csv):
+    """
+    Guarda la salida de un paso para el paso siguiente (df no se modifica): el CSV o,
+    con formato_intermedio = 'parquet', solo el parquet tipado junto a él
+
+    Args:
+        df: DataFrame a guardar
+        ruta_csv: Ruta del CSV de salida (None = no se escribe nada en disco)
+        **opciones_csv: Opciones de DataFrame.to_csv (index, encoding, date_format, quoting, ...);
+                        el parquet guarda los valores tipados y no las usa
+
+    Returns:
+        Lista de rutas escritas
+    """
+    if ruta_csv is None:
+        return []
+    ruta = ruta_paso(ruta_csv)
+    if ruta == ruta_csv:
+        df.to_csv(ruta_csv, **opciones_csv)
+    else:
+        inicio = time.perf_counter()
+        df.to_parquet(ruta, index=False)
+        logger.info(f"   🗂️ Intermedio guardado: {os.path.basename(ruta)} ({time.perf_counter() - inicio:.2f}s)")
+    return [ruta]
+
+def leer_paso(ruta, **opciones_csv):
+    """
+    Lee la salida de un paso anterior: el DataFrame que devolvió el paso, su intermedio
+    parquet o el CSV con read_csv
+
+    Una ruta .csv se lee de su .parquet si el formato intermedio es parquet (ver
+    ruta_lectura). Del parquet y en memoria las columnas conservan su tipo: ver _tipar
+
+    Args:
+        ruta: Ruta del CSV o del .parquet, o DataFrame del paso anterior
+        **opciones_csv: Opciones de pd.read_csv; con parquet o DataFrame solo se usa 'dtype'
+
+    Returns:
+        DataFrame (en memoria, una vista nueva: el del paso anterior no se modifica)
+    """
+    inicio = time.perf_counter()
+    if isinstance(ruta, pd.DataFrame):
+        df = _tipar(ruta, opciones_csv.get('dtype'))
+        logger.info(f"   🗂️ Recibido en memoria: {len(df):,} filas ({time.perf_counter() - inicio:.2f}s)")
+        return df
+
+    ruta = ruta_lectura(ruta)
+    if not ruta.lower().endswith('.parquet'):
+        return pd.read_csv(ruta, **opciones_csv)
+
+    df = _tipar(pd.read_parquet(ruta), opciones_csv.get('dtype'))
+    logger.info(f"   🗂️ Intermedio leído: {os.path.basename(ruta)}, {len(df):,} filas "
+                f"({time.perf_counter() - inicio:.2f}s)")
+    return df
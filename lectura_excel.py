@@ -0,0 +1,252 @@
+# Lectura de Excel por streaming - capa compartida para Reporte 45, MD personal y CIE-10
+import pandas as pd
+import numpy as np
+import os
+import time
+from cache_lecturas import leer_con_cache
+from registro import obtener_logger
+
+logger = obtener_logger(__name__)
+
+# ============================================================================
+# CONFIGURACIÓN
+# ============================================================================
+# Textos que pandas.read_excel convierte a NaN (sus na_values por defecto, los mismos
+# que read_csv)
+VALORES_NULOS = {'', '#N/A', '#N/A N/A', '#NA', '-1.#IND', '-1.#QNAN', '-NaN', '-nan',
+                 '1.#IND', '1.#QNAN', '<NA>', 'N/A', 'NA', 'NULL', 'NaN', 'None', 'n/a', 'nan', 'null'}
+
+# Errores de fórmula de Excel: pandas los lee como NaN
+ERRORES_EXCEL = {'#NULL!', '#DIV/0!', '#VALUE!', '#REF!', '#NAME?', '#NUM!', '#N/A', '#GETTING_DATA'}
+
+# Extensiones que openpyxl puede leer en modo streaming
+EXTENSIONES_STREAMING = ('.xlsx', '.xlsm', '.xltx', '.xltm')
+
+# Llave de df.attrs donde cada lectura deja su propio tiempo (sin registro global:
+# en la app varias sesiones leen a la vez)
+ATRIBUTO_TIEMPO = 'tiempo_lectura'
+
+# ============================================================================
+# FUNCIONES AUXILIARES
+# ============================================================================
+def _nombres_columnas(encabezados):
+    """
+    Nombra las columnas igual que pandas.read_excel: encabezados vacíos como
+    'Unnamed: i' y duplicados con sufijo .1, .2, ...
+    """
+    nombres = []
+    vistos = {}
+    for i, valor in enumerate(encabezados):
+        nombre = f"Unnamed: {i}" if valor is None or valor == '' else valor
+        if nombre in vistos:
+            contador = vistos[nombre]
+            nuevo = f"{nombre}.{contador}"
+            while nuevo in vistos:
+                contador += 1
+                nuevo = f"{nombre}.{contador}"
+            vistos[nombre] = contador + 1
+            vistos[nuevo] = 1
+            nombre = nuevo
+        else:
+            vistos[nombre] = 1
+        nombres.append(nombre)
+    return nombres
+
+def _valor_celda(valor):
+    """
+    Normaliza el valor de una celda igual que el lector openpyxl de pandas:
+    vacíos y errores → None, números enteros como int
+    """
+    if valor is None:
+        return None
+    if isinstance(valor, str):
+        return None if valor in ERRORES_EXCEL else valor
+    if isinstance(valor, float) and valor.is_integer():
+        return int(valor)
+    return valor
+
+def _es_nulo(valor):
+    return valor is None or (isinstance(valor, float) and valor != valor)
+
+def _columna_tipada(valores, tipo):
+    """
+    Convierte la lista de valores crudos de una columna al tipo pedido
+
+    Args:
+        valores: Lista de valores de celda (None = vacío)
+        tipo: 'str' (igual que dtype=str), 'fecha' (datetime64) o 'numero' (float/int)
+
+    Returns:
+        Lista o Series con los valores tipados
+    """
+    if tipo == 'str':
+        # Mismo resultado que read_excel(dtype=str): texto, con los nulos por defecto de pandas
+        return [
+            np.nan if _es_nulo(v) or (isinstance(v, str) and v in VALORES_NULOS) else str(v)
+            for v in valores
+        ]
+
+    if tipo == 'fecha':
+        if any(isinstance(v, str) for v in valores):
+            # Fechas guardadas como texto: se dejan como texto para el parseo posterior
+            return _columna_tipada(valores, 'str')
+        return pd.to_datetime(pd.Series(valores, dtype=object), errors='coerce')
+
+    if tipo == 'numero':
+        return pd.to_numeric(pd.Series(valores, dtype=object), errors='coerce')
+
+    raise ValueError(f"Tipo de columna no soportado: {tipo}")
+
+def _seleccionar(nombre, columnas):
+    if columnas is None:
+        return True
+    if callable(columnas):
+        return columnas(nombre)
+    return nombre in columnas
+
+def _tipo_de(nombre, tipos, tipo_por_defecto):
+    if tipos is None:
+        return tipo_por_defecto
+    if callable(tipos):
+        return tipos(nombre) or tipo_por_defecto
+    return tipos.get(nombre, tipo_por_defecto)
+
+# ============================================================================
+# LECTURA
+# ============================================================================
+def _leer_streaming(ruta, hoja, columnas):
+    """
+    Recorre la hoja en modo solo lectura y devuelve (nombres, {nombre: valores})
+    únicamente para las columnas seleccionadas
+    """
+    from openpyxl import load_workbook
+
+    libro = load_workbook(ruta, read_only=True, data_only=True, keep_links=False)
+    try:
+        hoja_excel = libro.worksheets[hoja] if isinstance(hoja, int) else libro[hoja]
+        # En modo solo lectura las dimensiones guardadas pueden estar mal
+        hoja_excel.reset_dimensions()
+
+        filas = hoja_excel.iter_rows(values_only=True)
+        encabezados = next(filas, None)
+        if encabezados is None:
+            return [], {}
+
+        nombres = _nombres_columnas(list(encabezados))
+        posiciones = [(i, n) for i, n in enumerate(nombres) if _seleccionar(n, columnas)]
+        datos = {n: [] for _, n in posiciones}
+
+        total_filas = 0
+        filas_con_datos = 0
+        for fila in filas:
+            largo = len(fila)
+            for i, n in posiciones:
+                datos[n].append(_valor_celda(fila[i]) if i < largo else None)
+            total_filas += 1
+            if any(v is not None and v != '' for v in fila):
+                filas_con_datos = total_filas
+
+        # Las filas vacías al final de la hoja se descartan (igual que read_excel)
+        if filas_con_datos < total_filas:
+            for n in datos:
+                del datos[n][filas_con_datos:]
+
+        return [n for _, n in posiciones], datos
+    finally:
+        libro.close()
+
+def _leer_con_pandas(ruta, hoja, columnas):
+    """
+    Respaldo cuando no hay openpyxl o el formato no es .xlsx (p. ej. .xls)
+    """
+    df = pd.read_excel(ruta, sheet_name=hoja, dtype=object,
+                       usecols=lambda n: _seleccionar(n, columnas))
+    nombres = list(df.columns)
+    datos = {n: [None if _es_nulo(v) else v for v in df[n].tolist()] for n in nombres}
+    return nombres, datos
+
+def leer_excel(ruta, columnas=None, tipos=None, tipo_por_defecto='str', hoja=0):
+    """
+    Lee un Excel en modo streaming (solo lectura) cargando solo las columnas necesarias
+    y devolviendo las columnas ya tipadas
+
+    Args:
+        ruta: Ruta del archivo Excel
+        columnas: Lista de nombres o función nombre → bool; None lee todas
+        tipos: Diccionario o función nombre → 'str' | 'fecha' | 'numero'
+        tipo_por_defecto: Tipo de las columnas sin tipo explícito ('str' = dtype=str)
+        hoja: Índice o nombre de la hoja
+
+    Returns:
+        DataFrame con las columnas seleccionadas en el orden del archivo; el tiempo de
+        esta lectura queda en df.attrs (ver tiempo_lectura)
+    """
+    inicio = time.perf_counter()
+
+    extension = os.path.splitext(str(ruta))[1].lower()
+    motor = 'openpyxl-streaming' if extension in EXTENSIONES_STREAMING else 'pandas'
+
+    def lector():
+        nonlocal motor
+        if motor == 'openpyxl-streaming':
+            try:
+                nombres, datos = _leer_streaming(ruta, hoja, columnas)
+            except ImportError:
+                motor = 'pandas'
+                nombres, datos = _leer_con_pandas(ruta, hoja, columnas)
+        else:
+            nombres, datos = _leer_con_pandas(ruta, hoja, columnas)
+
+        return pd.DataFrame({
+            n: _columna_tipada(datos[n], _tipo_de(n, tipos, tipo_por_defecto))
+            for n in nombres
+        }, columns=nombres)
+
+    opciones = {'lector': 'leer_excel', 'columnas': columnas, 'tipos': tipos,
+                'tipo_por_defecto': tipo_por_defecto, 'hoja': hoja}
+    df, desde_cache = leer_con_cache(ruta, opciones, lector)
+
+    segundos = time.perf_counter() - inicio
+    df.attrs[ATRIBUTO_TIEMPO] = medir_tiempo(ruta, len(df), df.shape[1], segundos,
+                                             'cache' if desde_cache else motor)
+
+    return df
+
+# ============================================================================
+# REPORTE DE TIEMPOS
+# ============================================================================
+def medir_tiempo(ruta, filas, columnas, segundos, motor):
+    """
+    Arma el registro del tiempo de lectura de un archivo y lo muestra en consola
+
+    Returns:
+        dict con archivo, tamaño, filas, columnas, segundos y motor
+    """
+    tamano_mb = os.path.getsize(ruta) / (1024 * 1024) if os.path.exists(ruta) else 0.0
+    logger.info(f"   ⏱️ {os.path.basename(str(ruta))}: {segundos:.2f}s "
+                f"({filas:,} filas, {columnas} columnas, {tamano_mb:.1f} MB, {motor})")
+    return {
+        'archivo': os.path.basename(str(ruta)),
+        'tamano_mb': round(tamano_mb, 2),
+        'filas': filas,
+        'columnas': columnas,
+        'segundos': round(segundos, 3),
+        'motor': motor
+    }
+
+def tiempo_lectura(df):
+    """
+    Tiempo de la lectura que produjo df (None si df no viene de leer_excel)
+    """
+    return df.attrs.get(ATRIBUTO_TIEMPO)
+
+def reporte_tiempos_lectura(*dfs):
+    """
+    Reporte de tiempos de las lecturas que produjeron los DataFrames dados
+
+    Returns:
+        DataFrame con archivo, tamaño, filas, columnas, segundos y motor
+    """
+    tiempos = [tiempo for tiempo in map(tiempo_lectura, dfs) if tiempo is not None]
+    return pd.DataFrame(tiempos,
+                        columns=['archivo', 'tamano_mb', 'filas', 'columnas', 'segundos', 'motor'])
@@ -0,0 +1,70 @@
+# Matriz de códigos CIE-10 - clasificaciones como enteros para la similitud ponderada
+import numpy as np
+import pandas as pd
+
+# ============================================================================
+# CONFIGURACIÓN
+# ============================================================================
+# Celda vacía en la matriz (no coincide con nada, igual que NaN == NaN)
+SIN_VALOR = -1
+
+# ============================================================================
+# API
+# ============================================================================
+def construir_matriz_codigos(df_codigos, columnas):
+    """
+    Convierte la tabla de códigos en una matriz densa (códigos × columnas) con cada
+    clasificación como entero, más el mapa código → fila
+
+    Args:
+        df_codigos: Tabla de códigos con la columna 'Código' ya normalizada
+        columnas: Columnas a comparar, en el orden de los pesos
+
+    Returns:
+        tuple: (indice_codigos, matriz)
+            indice_codigos: dict código → fila (si un código se repite vale la última fila;
+                            los códigos vacíos no se indexan)
+            matriz: np.ndarray int32 con SIN_VALOR en las celdas vacías
+    """
+    indice_codigos = {codigo: fila for fila, codigo in enumerate(df_codigos['Código'].tolist()) if codigo}
+
+    matriz = np.empty((len(df_codigos), len(columnas)), dtype=np.int32)
+    for j, columna in enumerate(columnas):
+        # factorize deja -1 (SIN_VALOR) en los nulos
+        matriz[:, j] = pd.factorize(df_codigos[columna])[0]
+
+    return indice_codigos, matriz
+
+def filas_de_codigos(indice_codigos, codigos):
+    """
+    Fila de la matriz de cada código (-1 si no está en la tabla); se busca una vez
+    por código distinto
+
+    Returns:
+        np.ndarray int64 alineado con codigos
+    """
+    posiciones, unicos = pd.factorize(pd.Series(codigos, dtype=object))
+    filas_unicos = np.array([indice_codigos.get(codigo, -1) for codigo in unicos] + [-1], dtype=np.int64)
+    return filas_unicos[posiciones]
+
+def similitud_ponderada(matriz, filas_ancla, filas_historicas, pesos):
+    """
+    Porcentaje ponderado de coincidencia de todos los pares (ancla, histórico) a la vez
+
+    Args:
+        matriz: Matriz de construir_matriz_codigos
+        filas_ancla, filas_historicas: Filas de la matriz de cada par (ambas en la tabla)
+        pesos: Peso de cada columna de la matriz (p. ej. 0.25 → 25%)
+
+    Returns:
+        np.ndarray float64 con el porcentaje (0-100) de cada par
+    """
+    ancla = matriz[filas_ancla]
+    historico = matriz[filas_historicas]
+    coincide = (ancla == historico) & (ancla != SIN_VALOR)
+
+    # Suma columna a columna en el orden de los pesos (mismo redondeo que sumar par a par)
+    porcentaje = np.zeros(len(ancla), dtype=np.float64)
+    for j, peso in enumerate(pesos):
+        porcentaje += np.where(coincide[:, j], peso * 100, 0.0)
+    return porcentaje
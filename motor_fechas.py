@@ -0,0 +1,207 @@
+# Motor de fechas compartido - inferencia de formato por columna y parseo en una sola pasada
+import pandas as pd
+import numpy as np
+from datetime import date, datetime
+
+# ============================================================================
+# CONFIGURACIÓN
+# ============================================================================
+# Formatos candidatos, en orden de preferencia (día primero, como en toda la auditoría)
+FORMATOS_CANDIDATOS = [
+    '%d/%m/%Y',
+    '%Y-%m-%d',
+    '%d/%m/%Y %H:%M:%S',
+    '%Y-%m-%d %H:%M:%S',
+    '%d/%m/%Y %H:%M',
+    '%Y-%m-%dT%H:%M:%S',
+    '%d-%m-%Y',
+    '%Y/%m/%d',
+    '%d.%m.%Y',
+]
+
+# Textos que representan "sin fecha"
+VALORES_SIN_FECHA = {'', 'nan', 'NaN', 'None', 'none', 'NaT', 'nat', 'null', 'NULL'}
+
+# Valores distintos que se usan para inferir el formato de cada columna
+TAMANO_MUESTRA = 500
+
+# Clave de Series.attrs con las estadísticas de la conversión que produjo la serie
+ATRIBUTO_ESTADISTICAS = 'estadisticas_fechas'
+
+# ============================================================================
+# FUNCIONES AUXILIARES
+# ============================================================================
+def _parsear_exacto(valores, formato):
+    return pd.to_datetime(valores, format=formato, errors='coerce')
+
+def _inferir_formato(valores_unicos, formatos):
+    """
+    Elige el formato que más valores de la muestra interpreta (empate → el primero de la lista)
+    """
+    if len(valores_unicos) == 0:
+        return None
+    paso = max(1, len(valores_unicos) // TAMANO_MUESTRA)
+    muestra = valores_unicos[::paso][:TAMANO_MUESTRA]
+
+    mejor_formato, mejor_aciertos = None, 0
+    for formato in formatos:
+        aciertos = int(_parsear_exacto(muestra, formato).notna().sum())
+        if aciertos > mejor_aciertos:
+            mejor_formato, mejor_aciertos = formato, aciertos
+            if aciertos == len(muestra):
+                break
+    return mejor_formato
+
+# ============================================================================
+# API
+# ============================================================================
+def parsear_fechas(serie, nombre=None, formatos=None, respaldo='mixed', dayfirst=True, estricto=False):
+    """
+    Convierte una columna a datetime infiriendo una vez el formato dominante
+
+    La columna se muestrea, se elige el formato de FORMATOS_CANDIDATOS que más
+    valores interpreta y se parsea con ese formato exacto. Solo los valores que
+    no encajan pasan a los demás formatos y, al final, al respaldo lento.
+
+    Args:
+        serie: Series con fechas (texto, datetime o mezcla)
+        nombre: Nombre para las estadísticas (por defecto serie.name)
+        formatos: Lista de formatos candidatos (por defecto FORMATOS_CANDIDATOS)
+        respaldo: 'mixed' para usar format='mixed' con los que no encajan; None los deja en NaT
+        dayfirst: Día primero en el respaldo
+        estricto: True → solo el formato dominante, sin otros formatos ni respaldo (como
+                  to_datetime sin formato: los valores en otro formato quedan NaT)
+
+    Returns:
+        Series datetime64 alineada con la original; las estadísticas de esta
+        conversión viajan en sus attrs (ver resumen_fechas)
+    """
+    nombre = nombre or serie.name
+    formatos = list(formatos or FORMATOS_CANDIDATOS)
+
+    # Columnas ya tipadas (p. ej. Excel con fechas reales): no se vuelven a parsear
+    if pd.api.types.is_datetime64_any_dtype(serie):
+        total = int(serie.notna().sum())
+        fechas = serie.copy(deep=False)
+        fechas.attrs[ATRIBUTO_ESTADISTICAS] = {
+            'columna': nombre, 'formato': 'datetime', 'valores': total, 'exactos': total,
+            'otros_formatos': 0, 'respaldo': 0, 'no_interpretados': 0,
+        }
+        return fechas
+
+    # Cada valor distinto se interpreta una sola vez y luego se reparte a las filas
+    codigos, unicos = pd.factorize(serie)
+    unicos = np.asarray(unicos, dtype=object)
+    filas_por_valor = np.bincount(codigos[codigos >= 0], minlength=len(unicos))
+    resultado = np.full(len(unicos), pd.NaT, dtype=object)
+
+    # Valores que ya son fechas (Timestamp, datetime, date) se conservan
+    es_fecha = np.array([isinstance(v, (datetime, date, np.datetime64)) for v in unicos], dtype=bool)
+    for i in np.flatnonzero(es_fecha):
+        resultado[i] = pd.Timestamp(unicos[i])
+
+    # Textos: se limpian y se descartan los que representan "sin fecha"
+    es_texto = np.array([isinstance(v, str) for v in unicos], dtype=bool)
+    limpios = np.empty(len(unicos), dtype=object)
+    limpios[es_texto] = [v.strip() for v in unicos[es_texto]]
+    pendientes = np.flatnonzero(es_texto)
+    pendientes = pendientes[~pd.Index(limpios[pendientes]).isin(VALORES_SIN_FECHA)]
+
+    formato = _inferir_formato(pd.Index(limpios[pendientes]), formatos)
+    exactos = int(filas_por_valor[es_fecha].sum())
+    otros = por_respaldo = 0
+
+    # Formato dominante primero; los que no encajan prueban los demás formatos
+    orden = ([formato] if formato else []) + ([] if estricto else [f for f in formatos if f != formato])
+    for i, fmt in enumerate(orden):
+        if len(pendientes) == 0:
+            break
+        parseados = _parsear_exacto(pd.Index(limpios[pendientes]), fmt)
+        ok = np.asarray(parseados.notna())
+        resultado[pendientes[ok]] = parseados[ok].astype(object)
+        filas = int(filas_por_valor[pendientes[ok]].sum())
+        if i == 0 and formato:
+            exactos += filas
+        else:
+            otros += filas
+        pendientes = pendientes[~ok]
+
+    # Respaldo lento solo para lo que ningún formato interpretó
+    if len(pendientes) > 0 and respaldo == 'mixed' and not estricto:
+        parseados = pd.to_datetime(pd.Index(limpios[pendientes]), errors='coerce',
+                                   dayfirst=dayfirst, format='mixed')
+        ok = np.asarray(parseados.notna())
+        resultado[pendientes[ok]] = parseados[ok].astype(object)
+        por_respaldo = int(filas_por_valor[pendientes[ok]].sum())
+        pendientes = pendientes[~ok]
+
+    no_nulos = int(filas_por_valor.sum())
+    estadisticas = {
+        'columna': nombre,
+        'formato': formato or '',
+        'valores': no_nulos,
+        'exactos': exactos,
+        'otros_formatos': otros,
+        'respaldo': por_respaldo,
+        'no_interpretados': no_nulos - exactos - otros - por_respaldo,
+    }
+
+    # Posición final = NaT para los nulos (código -1 de factorize)
+    fechas = pd.DatetimeIndex(list(resultado) + [pd.NaT])
+    if fechas.isna().all():
+        fechas = fechas.astype('datetime64[ns]')
+    fechas = pd.Series(fechas.to_numpy()[codigos], index=serie.index, name=serie.name)
+    fechas.attrs[ATRIBUTO_ESTADISTICAS] = estadisticas
+    return fechas
+
+def estadisticas_fechas(fechas):
+    """
+    Estadísticas de la conversión que produjo fechas (None si no viene de parsear_fechas)
+    """
+    return fechas.attrs.get(ATRIBUTO_ESTADISTICAS)
+
+def resumen_fechas(fechas):
+    """
+    Línea de resumen de la conversión que produjo una columna
+
+    Args:
+        fechas: Series devuelta por parsear_fechas
+
+    Returns:
+        String con formato inferido y porcentajes de acierto
+    """
+    e = estadisticas_fechas(fechas)
+    if not e:
+        return f"{fechas.name}: sin estadísticas"
+    nombre = e['columna']
+    total = e['valores'] or 1
+    return (f"{nombre}: formato '{e['formato']}' | exacto {e['exactos'] / total * 100:.1f}% | "
+            f"otros formatos {e['otros_formatos'] / total * 100:.1f}% | "
+            f"respaldo {e['respaldo'] / total * 100:.1f}% | "
+            f"sin fecha {e['no_interpretados'] / total * 100:.1f}%")
+
+def reporte_fechas(*columnas_fechas):
+    """
+    Reporte de aciertos de las conversiones que produjeron las columnas dadas
+
+    Args:
+        *columnas_fechas: Series devueltas por parsear_fechas
+
+    Returns:
+        DataFrame con una fila por columna
+    """
+    filas = []
+    for e in filter(None, map(estadisticas_fechas, columnas_fechas)):
+        nombre = e['columna']
+        total = e['valores'] or 1
+        filas.append({
+            'columna': nombre,
+            'formato': e['formato'],
+            'valores': e['valores'],
+            'pct_exacto': round(e['exactos'] / total * 100, 2),
+            'pct_otros_formatos': round(e['otros_formatos'] / total * 100, 2),
+            'pct_respaldo': round(e['respaldo'] / total * 100, 2),
+            'pct_sin_fecha': round(e['no_interpretados'] / total * 100, 2),
+        })
+    return pd.DataFrame(filas, columns=['columna', 'formato', 'valores', 'pct_exacto',
+                                        'pct_otros_formatos', 'pct_respaldo', 'pct_sin_fecha'])
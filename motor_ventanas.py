@@ -0,0 +1,120 @@
+# Motor de ventanas por id_personal - un solo ordenamiento para todos los empleados
+import pandas as pd
+import numpy as np
+
+# ============================================================================
+# FUNCIONES AUXILIARES
+# ============================================================================
+def _fechas_como_enteros(fechas, nat_primero):
+    """
+    Fechas como int64 ordenables: NaT al principio (nat_primero) o al final
+    """
+    enteros = fechas.view('i8').copy()
+    nulos = np.isnat(fechas)
+    enteros[nulos] = np.iinfo(np.int64).min if nat_primero else np.iinfo(np.int64).max
+    return enteros
+
+def _limites_por_grupo(grupos_ordenados, n_grupos):
+    """
+    Inicio y fin (exclusivo) de cada grupo en un arreglo ordenado por grupo
+    """
+    grupos = np.arange(n_grupos)
+    return (np.searchsorted(grupos_ordenados, grupos, side='left'),
+            np.searchsorted(grupos_ordenados, grupos, side='right'))
+
+def _repartir_ventana(orden, desde, hasta, anclas, codigo, inicio_fechas):
+    """
+    Filas de cada ventana (tramos orden[desde:hasta]) sin las que chocan con el ancla;
+    el orden de los tramos se conserva (start_date y, en empate, la posición original)
+    """
+    n_ids = len(anclas)
+    largo = hasta - desde
+    id_de_fila = np.repeat(np.arange(n_ids), largo)
+    filas = orden[np.repeat(desde - np.cumsum(largo) + largo, largo) + np.arange(largo.sum())]
+    ancla_fila = anclas[id_de_fila]
+    choca = (codigo[filas] == codigo[ancla_fila]) & (inicio_fechas[filas] == inicio_fechas[ancla_fila])
+    filas, id_de_fila = filas[~choca], id_de_fila[~choca]
+    limites = np.concatenate(([0], np.cumsum(np.bincount(id_de_fila, minlength=n_ids))))
+    return filas, limites
+
+# ============================================================================
+# API
+# ============================================================================
+def ubicar_ventanas(ids_objetivo, id_personal, start_date, last_approval, codigo, ventanas_dias):
+    """
+    Ubica para cada id el registro ancla y las filas de sus ventanas de días, sin
+    filtrar el DataFrame una vez por empleado
+
+    - Ancla: start_date más reciente; empate → last_approval más reciente; empate →
+      la primera fila (como sort_values(['start_date', 'last_approval_status_date'],
+      ascending=False).iloc[0]; las fechas vacías van al final)
+    - Ventana: filas con start_date entre la del ancla menos los días y la del ancla, sin las
+      que repiten el código y la fecha del ancla (el código que choca), ordenadas por
+      start_date con los empates en el orden original de las filas (como
+      sort_values('start_date', kind='stable'))
+
+    El ordenamiento, las anclas y el final de cada tramo son comunes a todas las
+    ventanas (una ventana menor es la cola de una mayor): cada ventana adicional solo
+    agrega un searchsorted para su inicio
+
+    Args:
+        ids_objetivo: ids en el orden del reporte (únicos)
+        id_personal: Columna id_personal de las filas candidatas
+        start_date, last_approval: Columnas datetime de esas filas
+        codigo: Códigos ya normalizados de esas filas
+        ventanas_dias: Lista de días hacia atrás desde el start_date del ancla
+
+    Returns:
+        tuple: (anclas, ventanas)
+            anclas: posición de la fila ancla de cada id (-1 si el id no tiene filas)
+            ventanas: dict días → (filas, limites)
+                filas: posiciones de las filas de todas las ventanas, una tras otra
+                limites: la ventana del id i es filas[limites[i]:limites[i + 1]]
+    """
+    n_ids = len(ids_objetivo)
+    id_personal = pd.Series(id_personal).reset_index(drop=True)
+    inicio_fechas = np.asarray(start_date)
+    aprobacion = np.asarray(last_approval)
+    codigo = np.asarray(codigo, dtype=object)
+
+    # Grupo de cada fila = posición de su id en ids_objetivo (igualdad como '==': NaN no agrupa)
+    grupo = pd.Index(ids_objetivo).get_indexer(id_personal)
+    grupo[id_personal.isna().to_numpy()] = -1
+    candidatas = np.flatnonzero(grupo >= 0)
+
+    # Ancla: última fila de cada grupo ordenando por (start_date, last_approval) con las
+    # fechas vacías primero y, en empate total, la primera posición al final
+    orden_ancla = candidatas[np.lexsort((
+        -candidatas,
+        _fechas_como_enteros(aprobacion[candidatas], nat_primero=True),
+        _fechas_como_enteros(inicio_fechas[candidatas], nat_primero=True),
+        grupo[candidatas],
+    ))]
+    inicio_ancla, fin_ancla = _limites_por_grupo(grupo[orden_ancla], n_ids)
+    con_filas = fin_ancla > inicio_ancla
+    anclas = np.full(n_ids, -1, dtype=np.int64)
+    anclas[con_filas] = orden_ancla[fin_ancla[con_filas] - 1]
+
+    # Filas ordenadas por (grupo, start_date, posición): cada ventana es un tramo contiguo
+    inicio_enteros = _fechas_como_enteros(inicio_fechas, nat_primero=False)
+    orden = candidatas[np.lexsort((inicio_enteros[candidatas], grupo[candidatas]))]
+    fechas_distintas, rango = np.unique(inicio_enteros[orden], return_inverse=True)
+    clave = grupo[orden].astype(np.int64) * (len(fechas_distintas) + 1) + rango.reshape(-1)
+
+    ancla_valida = np.flatnonzero(con_filas)
+    ancla_valida = ancla_valida[~np.isnat(inicio_fechas[anclas[ancla_valida]])]
+    fecha_ancla = inicio_fechas[anclas[ancla_valida]]
+    base = ancla_valida.astype(np.int64) * (len(fechas_distintas) + 1)
+    hasta = np.zeros(n_ids, dtype=np.int64)
+    hasta[ancla_valida] = np.searchsorted(
+        clave, base + np.searchsorted(fechas_distintas, fecha_ancla.view('i8'), side='left'), side='right')
+
+    ventanas = {}
+    for dias in ventanas_dias:
+        fecha_limite = fecha_ancla - np.timedelta64(dias, 'D')
+        desde = hasta.copy()
+        desde[ancla_valida] = np.searchsorted(
+            clave, base + np.searchsorted(fechas_distintas, fecha_limite.view('i8'), side='left'), side='left')
+        ventanas[dias] = _repartir_ventana(orden, desde, hasta, anclas, codigo, inicio_fechas)
+
+    return anclas, ventanas
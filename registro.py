@@ -0,0 +1,108 @@
+# Registro (logging) compartido por los módulos de la auditoría
+import logging
+import os
+import sys
+import threading
+
+# ============================================================================
+# CONFIGURACIÓN
+# ============================================================================
+# Logger raíz de la auditoría: todos los módulos cuelgan de él
+NOMBRE_RAIZ = 'auditoria'
+
+# Nivel por defecto del proceso (se puede cambiar con la variable de entorno AUDITORIA_NIVEL_LOG);
+# configurar_nivel lo cambia solo para el hilo que la llama (en app.py, la sesión)
+# DEBUG   → todos los diagnósticos (ejemplos, conteos, repr de columnas)
+# INFO    → solo el avance de cada paso y los resultados
+# WARNING → solo advertencias y errores
+NIVEL_POR_DEFECTO = 'INFO'
+
+NIVELES = ['DEBUG', 'INFO', 'WARNING', 'ERROR']
+
+# Nivel elegido por cada hilo (sin valor → nivel del proceso)
+_nivel_hilo = threading.local()
+
+
+class FiltroNivel(logging.Filter):
+    """
+    Deja pasar solo los mensajes del nivel vigente en el hilo que los emite, así
+    dos sesiones con niveles distintos no se pisan
+    """
+    def filter(self, record):
+        return record.levelno >= logging.getLevelName(nivel_actual())
+
+
+class ManejadorSalidaEstandar(logging.Handler):
+    """
+    Escribe en el sys.stdout vigente al momento de emitir, así las capturas
+    de salida (p. ej. StringIO en app.py) siguen recibiendo los mensajes
+    """
+    def emit(self, record):
+        try:
+            sys.stdout.write(self.format(record) + '\n')
+        except Exception:
+            self.handleError(record)
+
+
+def _raiz():
+    raiz = logging.getLogger(NOMBRE_RAIZ)
+    if not any(isinstance(h, ManejadorSalidaEstandar) for h in raiz.handlers):
+        manejador = ManejadorSalidaEstandar()
+        # Solo el mensaje: se conserva el formato de consola de siempre
+        manejador.setFormatter(logging.Formatter('%(message)s'))
+        manejador.addFilter(FiltroNivel())
+        raiz.addHandler(manejador)
+        raiz.propagate = False
+        # El corte por nivel lo hace FiltroNivel según el hilo; el logger deja pasar todo
+        raiz.setLevel(logging.DEBUG)
+    return raiz
+
+def _nivel_proceso():
+    return os.environ.get('AUDITORIA_NIVEL_LOG', NIVEL_POR_DEFECTO).upper()
+
+# ============================================================================
+# API
+# ============================================================================
+def obtener_logger(nombre):
+    """
+    Logger de un módulo de la auditoría (hijo de 'auditoria')
+
+    Args:
+        nombre: Normalmente __name__ del módulo
+
+    Returns:
+        logging.Logger
+    """
+    _raiz()
+    return logging.getLogger(f"{NOMBRE_RAIZ}.{nombre}")
+
+def configurar_nivel(nivel=None):
+    """
+    Cambia el nivel de los módulos de la auditoría para el hilo actual (en app.py,
+    el de la sesión que ejecuta el script); los demás hilos no se ven afectados
+
+    Args:
+        nivel: 'DEBUG', 'INFO', 'WARNING', 'ERROR' (None = AUDITORIA_NIVEL_LOG o INFO)
+
+    Returns:
+        Nombre del nivel aplicado
+    """
+    nivel = (nivel or _nivel_proceso()).upper()
+    if not isinstance(logging.getLevelName(nivel), int):
+        raise ValueError(f"Nivel de log no soportado: {nivel}")
+    _nivel_hilo.nivel = nivel
+    return nivel
+
+def nivel_actual():
+    """
+    Nombre del nivel vigente de la auditoría en el hilo actual
+    """
+    return getattr(_nivel_hilo, 'nivel', None) or _nivel_proceso()
+
+def diagnostico_activo(logger):
+    """
+    Indica si se deben calcular los diagnósticos costosos (solo en nivel DEBUG).
+    Los bloques de diagnóstico se envuelven en `if diagnostico_activo(logger):`
+    para que en niveles más silenciosos no se calculen en absoluto.
+    """
+    return logger.isEnabledFor(logging.DEBUG) and nivel_actual() == 'DEBUG'
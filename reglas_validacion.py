@@ -0,0 +1,416 @@
+# Reglas de validación del paso 2 - todas las alertas se evalúan en una sola pasada
+import pandas as pd
+import numpy as np
+
+# ============================================================================
+# CONFIGURACIÓN
+# ============================================================================
+COLUMNA_CODIGO = 'homologacion_clase_de_ausentismo_ssf_vs_sap'
+COLUMNA_DIAGNOSTICO = 'descripcion_general_external_code'
+
+# Clases de 'Relación laboral' y el texto que identifica cada una (sin distinguir
+# mayúsculas); un valor que contenga el texto de varias queda en la primera
+CLASES_RELACION = {
+    'APRENDIZAJE': 'Aprendizaje',
+    'LEY50': 'Ley 50',
+    'INTEGRAL': 'Integral',
+}
+CLASE_OTRO = 'OTRO'
+CATEGORIAS_RELACION = list(CLASES_RELACION) + [CLASE_OTRO]
+
+# Valores de las columnas de validación por concepto
+SI_APLICA = 'Concepto Si Aplica'
+NO_APLICA = 'Concepto No Aplica'
+
+# Conceptos VÁLIDOS para SENA (Aprendizaje)
+CONCEPTOS_VALIDOS_SENA = [
+    'Incapacidad gral SENA',
+    'Licencia de Maternidad SENA',
+    'Suspensión contrato SENA'
+]
+
+# Códigos PROHIBIDOS para Ley 50: códigos de SENA e INTEGRAL
+CODIGOS_SENA = [280, 281, 398, 198]
+CODIGOS_PROHIBIDOS_LEY50 = [
+    # Códigos de SENA
+    280,  # Incapacidad gral SENA
+    281,  # Incapacidad ARL SENA
+    398,  # Lic Maternidad SENA
+    198,  # Suspensión contrato SENA
+
+    # Códigos de INTEGRAL
+    197,  # Ausencia No Justific Int
+    331,  # Calamidad Domést Integral
+    333,  # Cuarent Prev. 100% Int.
+    334,  # Cuarent Prev. 66.66% Intg
+    203,  # Enf Gral Int SOAT
+    216,  # Inc. Acci Trabajo Integra
+    201,  # Inca. Enfer Gral Integral
+    341,  # Ley de Luto Integral
+    332,  # Lic remunerada Integral
+    303,  # Licenc Mater especial Int
+    301,  # Licencia Maternidad Integ
+    196,  # Licencia No Remunerada In
+    311,  # Licencia Paternidad Inegr
+    233,  # Prorr Enf Gral Int SOAT
+    251,  # Prorr Inc.Accid. Tr Integ
+    231   # Prorr Inc/Enf Gral ntegra
+]
+
+# Códigos PROHIBIDOS para Integral (los 25 que NO deben estar)
+CODIGOS_PROHIBIDOS_INTEGRAL = [
+    380,  # Ausencia No Justificada
+    330,  # Calamidad Doméstica
+    291,  # Cuarentena Prev. 100%
+    204,  # cuarentena Prev. 66.67
+    202,  # Enf Gral SOAT
+    215,  # Inc. Accidente de Trabajo
+    210,  # Inc. Enfer. General Hospi
+    220,  # Inc. Enfermed Profesional
+    200,  # Inca. Enfermedad  General
+    281,  # Incapacidad ARL SENA
+    280,  # Incapacidad gral SENA
+    340,  # Ley de Luto
+    345,  # Lic Jurado Votación
+    305,  # Lic Mater Interrumpida
+    398,  # Lic Maternidad SENA
+    302,  # Licencia Mater especial
+    300,  # Licencia Maternidad
+    191,  # Licencia No Remunerada
+    310,  # Licencia Paternidad
+    190,  # Licencia Remunerada
+    232,  # Prorroga Enf Gral SOAT
+    250,  # Prorroga Inc. Accid. Trab
+    230,  # Prorroga Inca/Enfer Gene
+    381,  # Suspensión
+    198   # Suspensión contrato SENA
+]
+
+CONCEPTOS_INCAPACIDAD = [
+    'Incapacidad enfermedad general',
+    'Prorroga Inca/Enfer Gene',
+    'Enf Gral SOAT',
+    'Inc. Accidente de Trabajo',
+    'Prorroga Inc. Accid. Trab'
+]
+
+CONCEPTOS_SIN_PAGO = [
+    'Aus Reg sin Soporte',
+    'Suspensión'
+]
+
+# Códigos de incapacidad que requieren diagnóstico (se comparan como texto)
+CODIGOS_REQUIEREN_DIAGNOSTICO = [
+    '203', '202', '216', '215', '210', '220', '201', '200',
+    '188', '235', '383', '233', '251', '231', '232', '250', '230'
+]
+
+# Columnas del archivo de validadores no encontrados (las que existan)
+COLUMNAS_VALIDADOR_NO_ENCONTRADO = [
+    'id_personal',
+    'nombre_completo',
+    'last_modified_by',
+    'llave',
+    'start_date',
+    'end_date',
+    'nombre_validador',
+    'usuario_validador',
+    'codigo_validador',
+    'Relación laboral'
+]
+
+# Registro de reglas. Cada regla es un AND de sus condiciones:
+#   relacion            clase de 'Relación laboral' (clasificar_relacion)
+#   conceptos           external_name_label está en la lista
+#   conceptos_fuera_de  external_name_label NO está en la lista (vacío = fuera)
+#   codigos             código de homologación (numérico) está en la lista
+#   dias_no_cumplen     (columna, operador, valor): la columna NO cumple (vacío = no cumple)
+#   dias_mayores_a      (columna, valor): la columna es mayor al valor
+#   fse_sin_fecha       fse = 'Si Aplica' y fse_fechas vacía
+#   sin_diagnostico     código (texto) en la lista y sin descripcion_general_external_code
+#   diagnostico_corto   descripción no vacía con menos caracteres que el valor
+#   igual_a             (columna, valor)
+# y lo que se retoca al sacar sus filas:
+#   codigo_numerico_en  el código queda numérico como en la población dada (otra regla)
+#   codigo_texto        el código queda como texto sin espacios
+#   marca_diagnostico   texto que reemplaza la descripción
+#   diagnostico_texto   columna extra con la descripción como texto sin espacios
+#   columnas            solo estas columnas (las que existan)
+# Las reglas sin 'archivo' son poblaciones (solo se cuentan). Las que tienen 'columna'
+# además dan la columna de validación SI_APLICA / NO_APLICA (concepto con los días que
+# le corresponden = Si Aplica; la alerta son las filas del concepto con No Aplica)
+REGLAS = [
+    # Relación laboral
+    {'nombre': 'aprendizaje', 'relacion': 'APRENDIZAJE'},
+    {'nombre': 'ley50', 'relacion': 'LEY50'},
+    {'nombre': 'integral', 'relacion': 'INTEGRAL'},
+    {'nombre': 'errores_sena', 'archivo': 'Sena_error_validar.csv',
+     'relacion': 'APRENDIZAJE', 'conceptos_fuera_de': CONCEPTOS_VALIDOS_SENA},
+    {'nombre': 'errores_ley50', 'archivo': 'Ley_50_error_validar.csv',
+     'relacion': 'LEY50', 'codigos': CODIGOS_PROHIBIDOS_LEY50, 'codigo_numerico_en': 'ley50'},
+    {'nombre': 'errores_integral', 'archivo': 'Integral_error_validar.csv',
+     'relacion': 'INTEGRAL', 'codigos': CODIGOS_PROHIBIDOS_INTEGRAL, 'codigo_numerico_en': 'integral'},
+
+    # Días que no corresponden al concepto
+    {'nombre': 'licencia_paternidad', 'archivo': 'alerta_licencia_paternidad.csv',
+     'conceptos': ['Licencia Paternidad'], 'dias_no_cumplen': ('calendar_days', '==', 14),
+     'columna': 'licencia_paternidad'},
+    {'nombre': 'licencia_maternidad', 'archivo': 'alerta_licencia_maternidad.csv',
+     'conceptos': ['Licencia Maternidad'], 'dias_no_cumplen': ('calendar_days', '==', 126),
+     'columna': 'licencia_maternidad'},
+    {'nombre': 'ley_de_luto', 'archivo': 'alerta_ley_de_luto.csv',
+     'conceptos': ['Ley de luto'], 'dias_no_cumplen': ('quantity_in_days', '==', 5),
+     'columna': 'ley_de_luto'},
+    {'nombre': 'incap_fuera_de_turno', 'archivo': 'alerta_incap_fuera_de_turno.csv',
+     'conceptos': ['Incapa.fuera de turno'], 'dias_no_cumplen': ('calendar_days', '<=', 1),
+     'columna': 'incap_fuera_de_turno'},
+    {'nombre': 'lic_maternidad_sena', 'archivo': 'alerta_lic_maternidad_sena.csv',
+     'conceptos': ['Licencia de Maternidad SENA'], 'dias_no_cumplen': ('calendar_days', '==', 126),
+     'columna': 'lic_maternidad_sena'},
+    {'nombre': 'lic_jurado_votacion', 'archivo': 'alerta_lic_jurado_votacion.csv',
+     'conceptos': ['Lic Jurado Votación'], 'dias_no_cumplen': ('calendar_days', '<=', 1),
+     'columna': 'lic_jurado_votacion'},
+    {'nombre': 'incp_mayor_30_dias', 'archivo': 'incp_mayor_30_dias.csv',
+     'conceptos': CONCEPTOS_INCAPACIDAD, 'dias_mayores_a': ('calendar_days', 30)},
+    {'nombre': 'sin_pago_mayor_10_dias', 'archivo': 'Validacion_ausentismos_sin_pago_mayor_10_dias.csv',
+     'conceptos': CONCEPTOS_SIN_PAGO, 'dias_mayores_a': ('calendar_days', 10)},
+    {'nombre': 'dia_de_la_familia', 'archivo': 'dia_de_la_familia.csv',
+     'conceptos': ['Día de la familia'], 'dias_mayores_a': ('calendar_days', 1)},
+
+    # Enlace FSE, diagnóstico y validador
+    {'nombre': 'incapacidad_sin_enlace', 'archivo': 'Incapacidad_sin_enlace.csv',
+     'fse_sin_fecha': True},
+    {'nombre': 'registros_sin_diagnostico', 'archivo': 'registros_sin_diagnostico.csv',
+     'sin_diagnostico': CODIGOS_REQUIEREN_DIAGNOSTICO, 'codigo_texto': True,
+     'marca_diagnostico': 'registros_sin_diagnostico'},
+    {'nombre': 'diagnostico_incorrecto', 'archivo': 'diagnostico_incorrecto.csv',
+     'diagnostico_corto': 2, 'codigo_texto': True,
+     'diagnostico_texto': 'descripcion_general_external_code_str'},
+    {'nombre': 'usuario_aprobador_no_encontrado', 'archivo': 'usuario_aprobador_no_encontrado.csv',
+     'igual_a': ('nombre_validador', 'ALERTA VALIDADOR NO ENCONTRADO'),
+     'columnas': COLUMNAS_VALIDADOR_NO_ENCONTRADO},
+]
+
+# Alertas de concepto con días que no corresponden, en el orden de sus archivos
+REGLAS_DIAS_POR_CONCEPTO = [
+    'licencia_paternidad', 'licencia_maternidad', 'ley_de_luto', 'incap_fuera_de_turno',
+    'lic_maternidad_sena', 'lic_jurado_votacion', 'incp_mayor_30_dias',
+    'sin_pago_mayor_10_dias', 'dia_de_la_familia',
+]
+
+_REGLAS_POR_NOMBRE = {regla['nombre']: regla for regla in REGLAS}
+
+_OPERADORES = {'==': np.equal, '<=': np.less_equal, '>': np.greater}
+
+# ============================================================================
+# FUNCIONES AUXILIARES
+# ============================================================================
+def _difundir(posiciones, por_valor):
+    """
+    Resultado por valor distinto → resultado por fila (los vacíos de factorize,
+    posición -1, quedan en False)
+    """
+    return np.append(np.asarray(por_valor, dtype=bool), False)[posiciones]
+
+
+class _Compartidas(dict):
+    """
+    Columnas precalculadas que comparten las reglas; cada una se calcula la primera
+    vez que una regla la pide
+    """
+    def __init__(self, df):
+        super().__init__()
+        self.df = df
+
+    def __missing__(self, clave):
+        df = self.df
+        if clave == 'concepto':
+            # Etiquetas: se comparan una vez por valor distinto
+            posiciones, valores = pd.factorize(df['external_name_label'])
+            valor = (posiciones, pd.Series(valores, dtype=df['external_name_label'].dtype))
+        elif clave == 'relacion':
+            valor = clasificar_relacion(df['Relación laboral']).cat.codes.to_numpy()
+        elif clave == 'codigo':
+            valor = pd.to_numeric(df[COLUMNA_CODIGO], errors='coerce').to_numpy(dtype=np.float64)
+        elif clave in ('codigo_texto', 'diagnostico_texto'):
+            columna = COLUMNA_CODIGO if clave == 'codigo_texto' else COLUMNA_DIAGNOSTICO
+            valor = df[columna].astype(str).str.strip()
+        else:
+            # Días: ('dias', columna)
+            valor = pd.to_numeric(df[clave[1]], errors='coerce').to_numpy(dtype=np.float64, na_value=np.nan)
+        self[clave] = valor
+        return valor
+
+
+def _condicion(compartidas, condicion, valor):
+    """
+    Máscara booleana (np.ndarray) de una condición del registro
+    """
+    df = compartidas.df
+    if condicion == 'relacion':
+        return compartidas['relacion'] == CATEGORIAS_RELACION.index(valor)
+    if condicion in ('conceptos', 'conceptos_fuera_de'):
+        posiciones, valores = compartidas['concepto']
+        en_lista = _difundir(posiciones, valores.isin(valor))
+        return en_lista if condicion == 'conceptos' else ~en_lista
+    if condicion == 'codigos':
+        return np.isin(compartidas['codigo'], valor)
+    if condicion == 'dias_no_cumplen':
+        columna, operador, referencia = valor
+        return ~_OPERADORES[operador](compartidas[('dias', columna)], referencia)
+    if condicion == 'dias_mayores_a':
+        columna, referencia = valor
+        return compartidas[('dias', columna)] > referencia
+    if condicion == 'fse_sin_fecha':
+        return ((df['fse'] == 'Si Aplica') &
+                (df['fse_fechas'].isna() | (df['fse_fechas'] == ''))).to_numpy(dtype=bool)
+    if condicion == 'sin_diagnostico':
+        diagnostico = compartidas['diagnostico_texto']
+        return (compartidas['codigo_texto'].isin(valor) & (
+            df[COLUMNA_DIAGNOSTICO].isna() | (diagnostico == '') | (diagnostico == 'nan')
+        )).to_numpy(dtype=bool)
+    if condicion == 'diagnostico_corto':
+        diagnostico = compartidas['diagnostico_texto']
+        return ((diagnostico != '') & (diagnostico != 'nan') &
+                (diagnostico.str.len() < valor)).to_numpy(dtype=bool)
+    if condicion == 'igual_a':
+        columna, referencia = valor
+        return (df[columna] == referencia).to_numpy(dtype=bool)
+    raise ValueError(f"Condición desconocida en el registro de reglas: {condicion}")
+
+
+def _columnas_requeridas(regla):
+    """
+    Columnas sin las que la regla no se evalúa (las que se validan antes de filtrar)
+    """
+    if 'fse_sin_fecha' in regla:
+        return ['fse_fechas']
+    if 'sin_diagnostico' in regla:
+        return [COLUMNA_CODIGO, COLUMNA_DIAGNOSTICO]
+    if 'diagnostico_corto' in regla:
+        return [COLUMNA_DIAGNOSTICO]
+    if 'igual_a' in regla:
+        return [regla['igual_a'][0]]
+    return []
+
+
+_CONDICIONES = ('relacion', 'conceptos', 'conceptos_fuera_de', 'codigos', 'dias_no_cumplen',
+                'dias_mayores_a', 'fse_sin_fecha', 'sin_diagnostico', 'diagnostico_corto', 'igual_a')
+
+# ============================================================================
+# API
+# ============================================================================
+def clasificar_relacion(relacion):
+    """
+    Clase de cada 'Relación laboral' (APRENDIZAJE, LEY50, INTEGRAL u OTRO): el texto se
+    busca una vez por valor distinto y el resultado se reparte a las filas
+
+    Args:
+        relacion: Columna 'Relación laboral'
+
+    Returns:
+        Series category (categorías CATEGORIAS_RELACION) alineada con relacion; los
+        vacíos quedan en OTRO
+    """
+    posiciones, valores = pd.factorize(relacion)
+    valores = pd.Series(valores, dtype=relacion.dtype)
+
+    # Última posición = vacíos; se recorre al revés para que gane la primera clase
+    clase_valor = np.full(len(valores) + 1, CATEGORIAS_RELACION.index(CLASE_OTRO), dtype=np.int8)
+    for clase, texto in reversed(list(CLASES_RELACION.items())):
+        contiene = valores.str.contains(texto, case=False, na=False).to_numpy(dtype=bool)
+        clase_valor[:-1][contiene] = CATEGORIAS_RELACION.index(clase)
+
+    return pd.Series(pd.Categorical.from_codes(clase_valor[posiciones], categories=CATEGORIAS_RELACION),
+                     index=relacion.index, name='clase_relacion')
+
+def evaluar_reglas(df, reglas=None):
+    """
+    Evalúa todas las reglas sobre df en una pasada: las columnas que comparten
+    (código numérico, etiqueta, relación laboral, días, diagnóstico) se preparan una
+    sola vez y cada regla es un AND de máscaras vectorizadas
+
+    Args:
+        df: Registros con relación laboral
+        reglas: Reglas a evaluar (None = todo el registro REGLAS)
+
+    Returns:
+        DataFrame booleano filas × reglas (mismo índice que df, una columna por nombre de
+        regla); no incluye las reglas cuyas columnas no están en df
+    """
+    reglas = REGLAS if reglas is None else reglas
+    reglas = [regla for regla in reglas if all(col in df.columns for col in _columnas_requeridas(regla))]
+    compartidas = _Compartidas(df)
+
+    aciertos = np.ones((len(reglas), len(df)), dtype=bool)
+    for i, regla in enumerate(reglas):
+        for condicion in _CONDICIONES:
+            if condicion in regla:
+                aciertos[i] &= _condicion(compartidas, condicion, regla[condicion])
+
+    return pd.DataFrame(aciertos.T, index=df.index, columns=[regla['nombre'] for regla in reglas])
+
+def filas_de_regla(df, aciertos, nombre):
+    """
+    Filas de df que cumplen una regla, con los retoques de su archivo de salida
+
+    Args:
+        df: El mismo DataFrame (mismas filas) que se pasó a evaluar_reglas
+        aciertos: Resultado de evaluar_reglas
+        nombre: Nombre de la regla
+
+    Returns:
+        DataFrame nuevo (no modifica df)
+    """
+    regla = _REGLAS_POR_NOMBRE[nombre]
+    mascara = aciertos[nombre].to_numpy()
+    filas = df[mascara]
+
+    if 'codigo_numerico_en' in regla:
+        # Numérico como queda al convertir toda la población (int o float según sus vacíos)
+        poblacion = aciertos[regla['codigo_numerico_en']].to_numpy()
+        codigo = pd.to_numeric(df[COLUMNA_CODIGO][poblacion], errors='coerce')
+        filas[COLUMNA_CODIGO] = codigo[mascara[poblacion]].to_numpy()
+    if regla.get('codigo_texto') and COLUMNA_CODIGO in filas.columns:
+        filas[COLUMNA_CODIGO] = filas[COLUMNA_CODIGO].astype(str).str.strip()
+    if 'marca_diagnostico' in regla:
+        filas[COLUMNA_DIAGNOSTICO] = regla['marca_diagnostico']
+    if 'diagnostico_texto' in regla:
+        filas[regla['diagnostico_texto']] = filas[COLUMNA_DIAGNOSTICO].astype(str).str.strip()
+    if 'columnas' in regla:
+        filas = filas[[col for col in regla['columnas'] if col in filas.columns]].copy()
+
+    return filas
+
+def columnas_concepto_aplica(df, categoricas=False):
+    """
+    Columnas de validación por concepto (licencia_paternidad, ley_de_luto, ...): SI_APLICA
+    si la fila es del concepto y tiene los días que le corresponden, si no NO_APLICA
+
+    Args:
+        df: Registros con external_name_label y las columnas de días
+        categoricas: True = columnas category (dos categorías) en vez de texto
+
+    Returns:
+        dict columna → Series alineada con df, en el orden del registro
+    """
+    compartidas = _Compartidas(df)
+    valores = np.array([NO_APLICA, SI_APLICA], dtype=object)
+    columnas = {}
+    for regla in REGLAS:
+        if 'columna' not in regla:
+            continue
+        aplica = (_condicion(compartidas, 'conceptos', regla['conceptos']) &
+                  ~_condicion(compartidas, 'dias_no_cumplen', regla['dias_no_cumplen']))
+        if categoricas:
+            columna = pd.Categorical.from_codes(aplica.astype(np.int8), categories=valores)
+        else:
+            columna = pd.array(valores[aplica.astype(np.int8)], dtype=str)
+        columnas[regla['columna']] = pd.Series(columna, index=df.index, name=regla['columna'])
+    return columnas
+
+def archivo_de_regla(nombre):
+    """
+    Nombre del archivo de salida de una regla
+    """
+    return _REGLAS_POR_NOMBRE[nombre]['archivo']
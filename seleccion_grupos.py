@@ -0,0 +1,64 @@
+# Selección por grupo - la fila ganadora de cada id_personal sin ordenar todo el DataFrame
+import pandas as pd
+import numpy as np
+
+# ============================================================================
+# FUNCIONES AUXILIARES
+# ============================================================================
+def _como_comparable(valores):
+    """
+    Valores listos para np.maximum: fechas como int64 y los vacíos (NaT/NaN) como el
+    menor valor posible (pierden siempre, igual que na_position='last' al ordenar desc)
+    """
+    valores = np.asarray(valores)
+    if np.issubdtype(valores.dtype, np.datetime64):
+        enteros = valores.view('i8').copy()
+        enteros[np.isnat(valores)] = np.iinfo(np.int64).min
+        return enteros
+    valores = valores.astype(np.float64)
+    return np.where(np.isnan(valores), -np.inf, valores)
+
+# ============================================================================
+# API
+# ============================================================================
+def agrupar(columna):
+    """
+    Grupo de cada fila según el orden ascendente de la columna (los vacíos forman
+    el último grupo, como en sort_values)
+
+    Returns:
+        tuple: (grupo, valores) con grupo = posición en valores de cada fila
+    """
+    grupo, valores = pd.factorize(columna, sort=True, use_na_sentinel=False)
+    return grupo, valores
+
+def seleccionar_por_grupo(grupo, n_grupos, claves, filas=None):
+    """
+    Fila ganadora de cada grupo con una prioridad lexicográfica: gana el mayor valor
+    de la primera clave, en empate el de la segunda, etc. y, si sigue el empate, la
+    primera fila. Es lo mismo que ordenar por (grupo, claves desc) y quedarse con la
+    primera fila de cada grupo, pero cada clave es solo un máximo por grupo
+
+    Args:
+        grupo: Grupo de cada fila (resultado de agrupar)
+        n_grupos: Cantidad de grupos
+        claves: Columnas (fechas o números) de mayor a menor prioridad
+        filas: Máscara de las filas candidatas (None = todas)
+
+    Returns:
+        np.ndarray con la posición de la fila ganadora de cada grupo (-1 si el grupo
+        no tiene filas candidatas)
+    """
+    candidatas = np.arange(len(grupo)) if filas is None else np.flatnonzero(filas)
+
+    for valores in claves:
+        valores = _como_comparable(valores)[candidatas]
+        grupo_candidatas = grupo[candidatas]
+        maximo = np.full(n_grupos, valores.min() if len(valores) else 0, dtype=valores.dtype)
+        np.maximum.at(maximo, grupo_candidatas, valores)
+        candidatas = candidatas[valores == maximo[grupo_candidatas]]
+
+    ganadora = np.full(n_grupos, len(grupo), dtype=np.int64)
+    np.minimum.at(ganadora, grupo[candidatas], candidatas)
+    ganadora[ganadora == len(grupo)] = -1
+    return ganadora